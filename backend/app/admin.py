@@ -0,0 +1,22 @@
+# -------------------------------------------------------------
+# Why: Operator-only endpoints (diagnostics, maintenance) are guarded by a
+# shared ADMIN_TOKEN rather than user roles, so they work from scripts and
+# `manage.py` and stay disabled unless the token is configured.
+# -------------------------------------------------------------
+import hmac
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+
+def admin_required(fn):
+    """Require `X-Admin-Token: <ADMIN_TOKEN>`; respond 404 when no token is configured."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('ADMIN_TOKEN')
+        if not token:
+            return jsonify({'msg': 'Not found'}), 404
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+            return jsonify({'msg': 'Unauthorized'}), 401
+        return fn(*args, **kwargs)
+    return wrapper
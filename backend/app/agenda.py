@@ -0,0 +1,137 @@
+# -------------------------------------------------------------
+# Why: "What do I have this week" meant three list calls (tasks, plans,
+# every group's plan tasks) merged on the client, with due dates compared
+# in UTC rather than the user's own day boundaries.
+#
+# Why this design?
+#   - Each source is one range query on an index that matches it: tasks on
+#     (user_id, due_date), plans on (user_id, generated_at), group plan
+#     tasks on (plan_id, due). Rows stream in date order (yield_per), and
+#     heapq.merge interleaves them, so a page reads only about as many rows
+#     as it returns.
+#   - Days are the caller's: the window and each entry's date use an IANA
+#     time zone (zoneinfo). Tasks have a UTC due time; group plan tasks
+#     and plan days are all-day and sort before timed entries that day.
+#   - A plan's "Day k" is k-1 days after the (local) day it was generated.
+#   - Pages are cut by an opaque cursor holding the last entry's sort key,
+#     so entries added before the cursor don't shift later pages.
+# -------------------------------------------------------------
+import base64
+import heapq
+import json
+from datetime import datetime, time, timedelta, timezone
+from itertools import islice
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import select
+
+from .extensions import db
+from .models import GroupPlan, GroupPlanTask, StudyPlan, Task
+from .planner import day_key, day_number, normalize_item
+
+# Order of same-day, same-time entries from different sources
+TASK, GROUP_TASK, PLAN_ITEM = 0, 1, 2
+PLAN_LOOKBACK_DAYS = 366  # plans generated longer ago than this are not searched
+_YIELD_PER = 200
+
+
+class AgendaError(ValueError):
+    pass
+
+
+def zone(name):
+    """ZoneInfo for an IANA name; AgendaError if unknown."""
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise AgendaError(f"Unknown time zone: {name}") from exc
+
+
+def _utc_naive(day, tz):
+    # Local midnight of `day` as the naive UTC datetime the database stores
+    return datetime.combine(day, time(), tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if [type(part) for part in key] != [str, int, str, int, int, int]:
+            raise ValueError(token)
+        datetime.fromisoformat(key[0])
+        return key
+    except (ValueError, TypeError) as exc:
+        raise AgendaError("Invalid cursor") from exc
+
+
+# Sort keys are [local date, 0 all-day / 1 timed, UTC time, source, id, index]
+def _tasks(user_id, start, end, tz):
+    rows = db.session.scalars(
+        select(Task).where(Task.user_id == user_id, Task.due_date >= _utc_naive(start, tz),
+                           Task.due_date < _utc_naive(end, tz))
+        .order_by(Task.due_date, Task.id).execution_options(yield_per=_YIELD_PER))
+    for task in rows:
+        at = task.due_date.replace(tzinfo=timezone.utc).astimezone(tz)
+        yield [at.date().isoformat(), 1, task.due_date.isoformat(), TASK, task.id, 0], {
+            "kind": "task", "id": task.id, "title": task.title, "date": at.date().isoformat(),
+            "at": at.isoformat(), "all_day": False, "minutes": task.estimate_minutes,
+            "priority": task.priority, "completed": bool(task.completed)}
+
+
+def _group_tasks(group_ids, start, end):
+    if not group_ids:
+        return
+    rows = db.session.execute(
+        select(GroupPlanTask, GroupPlan.title, GroupPlan.group_id)
+        .join(GroupPlan, GroupPlan.id == GroupPlanTask.plan_id)
+        .where(GroupPlan.group_id.in_(sorted(group_ids)), GroupPlanTask.due >= start, GroupPlanTask.due < end)
+        .order_by(GroupPlanTask.due, GroupPlanTask.id).execution_options(yield_per=_YIELD_PER))
+    for task, plan_title, group_id in rows:
+        yield [task.due.isoformat(), 0, "", GROUP_TASK, task.id, 0], {
+            "kind": "group_task", "id": task.id, "title": task.task, "date": task.due.isoformat(),
+            "at": None, "all_day": True, "minutes": task.duration, "priority": task.priority,
+            "group_plan_id": task.plan_id, "group_plan_title": plan_title, "group_id": group_id}
+
+
+def _plan_items(user_id, start, end, tz):
+    # Plans are few per user, but their days come out of JSON: expand the
+    # ones that can reach the window, then sort the (bounded) result
+    plans = db.session.execute(
+        select(StudyPlan.id, StudyPlan.title, StudyPlan.content, StudyPlan.generated_at)
+        .where(StudyPlan.user_id == user_id, StudyPlan.generated_at < _utc_naive(end, tz),
+               StudyPlan.generated_at >= _utc_naive(start - timedelta(days=PLAN_LOOKBACK_DAYS), tz))).all()
+    entries = []
+    for plan_id, title, content, generated_at in plans:
+        first = generated_at.replace(tzinfo=timezone.utc).astimezone(tz).date()
+        for key, items in (content or {}).items():
+            n = day_number(key)
+            day = first + timedelta(days=n - 1) if n else None
+            if day is None or not start <= day < end:
+                continue
+            for index, item in enumerate(items or []):
+                item = normalize_item(item)
+                entries.append(([day.isoformat(), 0, "", PLAN_ITEM, plan_id, index], {
+                    "kind": "plan_item", "id": plan_id, "title": item["task"], "date": day.isoformat(),
+                    "at": None, "all_day": True, "minutes": item["duration"], "plan_title": title,
+                    "day": day_key(n), "index": index}))
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+
+def agenda(user_id, group_ids, start, end, tz, limit, cursor=None):
+    """(entries, next cursor or None) for local dates start <= date < end, in time order."""
+    if cursor is not None:
+        start = max(start, datetime.fromisoformat(cursor[0]).date())
+    if start >= end:
+        return [], None
+    merged = heapq.merge(_tasks(user_id, start, end, tz), _group_tasks(group_ids, start, end),
+                         _plan_items(user_id, start, end, tz), key=lambda entry: entry[0])
+    if cursor is not None:
+        merged = (entry for entry in merged if entry[0] > cursor)
+    page = list(islice(merged, limit + 1))
+    more = len(page) > limit
+    page = page[:limit]
+    return [entry for _key, entry in page], encode_cursor(page[-1][0]) if more else None
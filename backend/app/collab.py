@@ -0,0 +1,312 @@
+# -------------------------------------------------------------
+# Why: Live collaborative editing of a group plan's task list. Concurrent
+# editors used to overwrite each other (last PUT wins on the whole blob);
+# here every edit is a small op that the server sequences and rebroadcasts,
+# so all viewers converge on the same list.
+#
+# Why this design?
+#   - Ops are anchored on task ids, not list indexes (insert/move "after"
+#     a task id, update/delete by id), so they never need index transforms:
+#     applying them in the server's sequence order is the merge. Updates
+#     merge per field (last writer wins per field, not per task).
+#   - Order is a float `position` on GroupPlanTask; an insert/move takes
+#     the midpoint between its neighbours, so only the moved row changes.
+#     Deleted anchors leave a tombstone position, so "insert after X" still
+#     lands in the right place if X was deleted concurrently.
+#   - Every op is written in the request (or socket event) that made it:
+#     the changed row plus GroupPlan.tasks_seq, in the caller's transaction
+#     (flushed here, committed by the caller), so REST reads, search, sync
+#     and restarts always see it. Only the changed row is written.
+#   - The database orders ops: an op claims the next sequence number with
+#     `UPDATE ... SET tasks_seq = n + 1 WHERE tasks_seq = n`. A process
+#     whose copy is behind (another worker wrote first) loses the claim,
+#     reloads and applies the op again on the current state.
+#   - The in-memory PlanDoc per plan is a cache of the rows plus the recent
+#     op log (catch-up by seq); it is checked against tasks_seq on every use
+#     and reloaded when it differs, so no worker's memory is authoritative.
+#     Catch-up across a reload falls back to the full state.
+#   - Inserts/moves that leave two positions closer than _MIN_GAP renumber
+#     the list in the same transaction, as a sequenced "renumber" op so
+#     clients stay in step.
+# -------------------------------------------------------------
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+
+from sqlalchemy import select, update
+
+from .extensions import db
+from .models import GroupPlan, GroupPlanTask
+
+FIELDS = ("task", "duration", "notes", "due", "priority")
+OPS = ("insert", "move", "update", "delete")
+_END = object()  # no "after" given: append at the end
+_MIN_GAP = 1e-6
+_IDLE_SECONDS = 300
+_CLAIM_ATTEMPTS = 5
+
+_docs = {}
+_docs_lock = threading.Lock()
+_settings = {"log_size": 500}
+
+
+class CollabError(ValueError):
+    pass
+
+
+class StaleDoc(Exception):
+    """Another process advanced the plan's sequence first."""
+
+
+def _clean_fields(fields, partial):
+    if not isinstance(fields, dict):
+        raise CollabError("fields must be an object")
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise CollabError(f"unknown fields: {', '.join(sorted(unknown))}")
+    out = {}
+    if "task" in fields or not partial:
+        task = fields.get("task")
+        if not isinstance(task, str) or not task.strip() or len(task) > 255:
+            raise CollabError("task must be a non-empty string (max 255)")
+        out["task"] = task
+    for key, default in (("duration", 30), ("priority", 3)):
+        if key in fields or not partial:
+            try:
+                out[key] = int(fields.get(key, default))
+            except (TypeError, ValueError):
+                raise CollabError(f"{key} must be an integer")
+    if "notes" in fields or not partial:
+        notes = fields.get("notes") or ""
+        if not isinstance(notes, str):
+            raise CollabError("notes must be a string")
+        out["notes"] = notes
+    if "due" in fields or not partial:
+        due = fields.get("due")
+        if due:
+            try:
+                due = datetime.strptime(due, "%Y-%m-%d").date().isoformat()
+            except (TypeError, ValueError):
+                raise CollabError("due must be YYYY-MM-DD or null")
+        out["due"] = due or None
+    return out
+
+
+def _row_state(row):
+    return {
+        "id": row.id,
+        "plan_id": row.plan_id,
+        "task": row.task,
+        "duration": row.duration,
+        "notes": row.notes or "",
+        "due": row.due.isoformat() if row.due else None,
+        "priority": row.priority,
+        "position": row.position if row.position is not None else float(row.id),
+    }
+
+
+class PlanDoc:
+    """Cached task list of one group plan at sequence number `seq`."""
+
+    def __init__(self, plan_id, seq, rows):
+        self.plan_id = plan_id
+        self.seq = seq
+        self.tasks = {row.id: _row_state(row) for row in rows}
+        self.tombstones = {}   # deleted id -> last position
+        self.log = deque(maxlen=_settings["log_size"])
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+
+    def ordered(self):
+        return sorted(self.tasks.values(), key=lambda t: (t["position"], t["id"]))
+
+    def _position_after(self, after, moving=None):
+        order = [t for t in self.ordered() if t["id"] != moving]
+        if after is _END:
+            return order[-1]["position"] + 1.0 if order else 1.0
+        if after is None:
+            return order[0]["position"] - 1.0 if order else 1.0
+        if after in self.tasks and after != moving:
+            anchor = self.tasks[after]["position"]
+        elif after in self.tombstones:
+            anchor = self.tombstones[after]
+        else:
+            raise CollabError(f"unknown anchor task {after}")
+        following = next((t["position"] for t in order if t["position"] > anchor), None)
+        return anchor + 1.0 if following is None else (anchor + following) / 2.0
+
+    def _claim(self, user_id, effect):
+        # Next sequence number, unless another process took it (then this copy is stale)
+        claimed = db.session.execute(
+            update(GroupPlan).where(GroupPlan.id == self.plan_id, GroupPlan.tasks_seq == self.seq)
+            .values(tasks_seq=self.seq + 1).execution_options(synchronize_session=False))
+        if claimed.rowcount != 1:
+            raise StaleDoc(self.plan_id)
+        self.seq += 1
+        entry = {"seq": self.seq, "op": effect, "user_id": user_id}
+        self.log.append(entry)
+        return entry
+
+    def _row(self, task_id):
+        row = db.session.get(GroupPlanTask, task_id)
+        if row is None or row.plan_id != self.plan_id:
+            raise StaleDoc(self.plan_id)
+        return row
+
+    def apply(self, op, user_id):
+        """Sequence and write one op in the current session (flushed, not committed).
+
+        Returns the log entries: the op, then a renumber if positions were
+        compacted; [] for a no-op. insert/move take "after": <task id>
+        (null = first; omitted = last). Raises CollabError before writing
+        anything, StaleDoc if this copy is behind the database.
+        """
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind not in OPS:
+            raise CollabError(f"op must be one of {', '.join(OPS)}")
+        target = op.get("id")
+        if kind != "insert" and target not in self.tasks:
+            if target in self.tombstones:
+                return []  # concurrently deleted: dropping the op is the merge
+            raise CollabError(f"unknown task {target}")
+
+        if kind == "insert":
+            fields = _clean_fields(op.get("fields") or {}, partial=False)
+            position = self._position_after(op.get("after", _END))
+            row = GroupPlanTask(plan_id=self.plan_id, position=position,
+                                **dict(fields, due=date.fromisoformat(fields["due"]) if fields["due"] else None))
+            effect = {"op": "insert", "id": None, "after": op.get("after"), "position": position,
+                      "fields": fields, "cid": op.get("cid")}
+            entry = self._claim(user_id, effect)
+            db.session.add(row)
+            db.session.flush()  # the DB assigns the id
+            effect["id"] = row.id
+            self.tasks[row.id] = dict(fields, id=row.id, plan_id=self.plan_id, position=position)
+        elif kind == "move":
+            position = self._position_after(op.get("after", _END), moving=target)
+            row = self._row(target)
+            entry = self._claim(user_id, {"op": "move", "id": target, "after": op.get("after"),
+                                          "position": position})
+            row.position = position
+            self.tasks[target]["position"] = position
+        elif kind == "update":
+            fields = _clean_fields(op.get("fields") or {}, partial=True)
+            changed = {k: v for k, v in fields.items() if self.tasks[target].get(k) != v}
+            if not changed:
+                return []
+            row = self._row(target)
+            entry = self._claim(user_id, {"op": "update", "id": target, "fields": changed})
+            for key, value in changed.items():
+                setattr(row, key, date.fromisoformat(value) if key == "due" and value else value)
+            self.tasks[target].update(changed)
+        else:
+            row = self._row(target)
+            entry = self._claim(user_id, {"op": "delete", "id": target})
+            db.session.delete(row)
+            self.tombstones[target] = self.tasks.pop(target)["position"]
+
+        entries = [entry]
+        if kind in ("insert", "move"):
+            renumber = self._compact_positions()
+            if renumber is not None:
+                entries.append(renumber)
+        db.session.flush()
+        self.last_used = time.monotonic()
+        return entries
+
+    def since(self, seq):
+        """Entries after `seq`, or None if the log no longer reaches back that far."""
+        if seq >= self.seq:
+            return []
+        if not self.log or self.log[0]["seq"] > seq + 1:
+            return None
+        return [e for e in self.log if e["seq"] > seq]
+
+    def state(self):
+        return {"plan_id": self.plan_id, "seq": self.seq, "tasks": self.ordered()}
+
+    def _compact_positions(self):
+        """Renumber positions 1..n once midpoints get too close; returns the sequenced entry."""
+        order = self.ordered()
+        gaps = [b["position"] - a["position"] for a, b in zip(order, order[1:])]
+        if not gaps or min(gaps) >= _MIN_GAP:
+            return None
+        positions = {t["id"]: float(i) for i, t in enumerate(order, start=1) if t["position"] != float(i)}
+        entry = self._claim(None, {"op": "renumber", "positions": positions})
+        rows = db.session.scalars(select(GroupPlanTask).where(GroupPlanTask.id.in_(list(positions)))).all()
+        for row in rows:
+            row.position = positions[row.id]
+        for task_id, position in positions.items():
+            self.tasks[task_id]["position"] = position
+        self.tombstones.clear()
+        return entry
+
+
+def _evict_idle():
+    # Caller holds _docs_lock
+    idle = time.monotonic() - _IDLE_SECONDS
+    for plan_id, doc in list(_docs.items()):
+        if doc.last_used < idle:
+            _docs.pop(plan_id, None)
+
+
+def load(plan_id):
+    """The PlanDoc for a plan, current with the database; None if the plan doesn't exist."""
+    seq = db.session.scalar(select(GroupPlan.tasks_seq).where(GroupPlan.id == plan_id))
+    with _docs_lock:
+        if seq is None:
+            _docs.pop(plan_id, None)
+            return None
+        doc = _docs.get(plan_id)
+        if doc is not None and doc.seq == seq:
+            doc.last_used = time.monotonic()
+            return doc
+        # First use, or another process (or a rolled back transaction) changed the plan
+        _evict_idle()
+        rows = GroupPlanTask.query.filter_by(plan_id=plan_id).all()
+        doc = _docs[plan_id] = PlanDoc(plan_id, seq, rows)
+        return doc
+
+
+def submit(plan_id, op, user_id):
+    """Apply an op from a client in the caller's transaction (the caller commits).
+
+    Returns the sequenced entries ([] when it was a no-op).
+    """
+    for _attempt in range(_CLAIM_ATTEMPTS):
+        doc = load(plan_id)
+        if doc is None:
+            raise CollabError("plan not found")
+        with doc.lock:
+            try:
+                return doc.apply(op, user_id)
+            except StaleDoc:
+                forget(plan_id)
+    raise CollabError("plan is busy, try again")
+
+
+def state(plan_id):
+    doc = load(plan_id)
+    if doc is None:
+        return None
+    with doc.lock:
+        return doc.state()
+
+
+def ops_since(plan_id, seq):
+    doc = load(plan_id)
+    if doc is None:
+        return None
+    with doc.lock:
+        return doc.since(seq)
+
+
+def forget(plan_id):
+    """Drop a plan's cached state (it was deleted, or the cache is behind)."""
+    with _docs_lock:
+        _docs.pop(plan_id, None)
+
+
+def init_collab(app):
+    _settings["log_size"] = int(app.config.get("COLLAB_LOG_SIZE", 500))
@@ -7,45 +7,175 @@
 #   - Supports best practices for security and maintainability.
 #   - Makes it easier to update settings without changing business logic.
 # -------------------------------------------------------------
+import json
 import os
 from datetime import timedelta
 
+
+def _normalize_uri(uri):
+    # Normalize DATABASE_URL for SQLAlchemy across providers
+    if uri and uri.startswith('postgres://'):
+        uri = uri.replace('postgres://', 'postgresql://', 1)
+    if uri and uri.startswith('mysql://'):
+        uri = uri.replace('mysql://', 'mysql+pymysql://', 1)
+    return uri
+
+
+def database_uri():
+    """DATABASE_URL if set (production/Render), else built from the DB_* variables (local dev)."""
+    uri = _normalize_uri(os.environ.get('DATABASE_URL'))
+    if uri:
+        return uri
+    parts = {var: os.environ.get(var) for var in ('DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_PORT', 'DB_NAME')}
+    missing = [var for var, val in parts.items() if not val]
+    if missing:
+        raise RuntimeError(f"Missing required DB environment variables: {', '.join(missing)}")
+    return (f"mysql+pymysql://{parts['DB_USER']}:{parts['DB_PASSWORD']}@{parts['DB_HOST']}:{parts['DB_PORT']}"
+            f"/{parts['DB_NAME']}")
+
+
+def resolve_database(config):
+    """Fill SQLALCHEMY_DATABASE_URI / SQLALCHEMY_BINDS from the environment where not set."""
+    if not config.get('SQLALCHEMY_DATABASE_URI'):
+        config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+    if config.get('SQLALCHEMY_BINDS') is None:
+        replica = _normalize_uri(os.environ.get('REPLICA_DATABASE_URL'))
+        config['SQLALCHEMY_BINDS'] = {'replica': replica} if replica else {}
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret")
 
-    # Prefer DATABASE_URL if set (for production/Render), else build from individual vars (for local dev)
-    # Normalize DATABASE_URL for SQLAlchemy across providers
-    _raw_uri = os.environ.get('DATABASE_URL')
-    if _raw_uri and _raw_uri.startswith('postgres://'):
-        _raw_uri = _raw_uri.replace('postgres://', 'postgresql://', 1)
-    if _raw_uri and _raw_uri.startswith('mysql://'):
-        _raw_uri = _raw_uri.replace('mysql://', 'mysql+pymysql://', 1)
-
-    SQLALCHEMY_DATABASE_URI = _raw_uri
-    if not SQLALCHEMY_DATABASE_URI:
-        _db_user = os.environ.get('DB_USER')
-        _db_password = os.environ.get('DB_PASSWORD')
-        _db_host = os.environ.get('DB_HOST')
-        _db_port = os.environ.get('DB_PORT')
-        _db_name = os.environ.get('DB_NAME')
-        missing = [var for var, val in {
-            'DB_USER': _db_user,
-            'DB_PASSWORD': _db_password,
-            'DB_HOST': _db_host,
-            'DB_PORT': _db_port,
-            'DB_NAME': _db_name
-        }.items() if not val]
-        if missing:
-            raise RuntimeError(f"Missing required DB environment variables: {', '.join(missing)}")
-        SQLALCHEMY_DATABASE_URI = (
-            f"mysql+pymysql://{_db_user}:{_db_password}@{_db_host}:{_db_port}/{_db_name}"
-        )
+    # Resolved from the environment by create_app (resolve_database below), so
+    # importing the config never needs a database, and overrides/TestConfig win
+    SQLALCHEMY_DATABASE_URI = None
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool (see app/db_pool.py). Size for greenlet concurrency per worker
+    # and keep workers * (size + overflow) under the database's connection limit.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    # Recycle below the ~5 min idle cutoff of hosted Postgres (Render)
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 280))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    # Set when connecting through PgBouncer in transaction pooling mode
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER") == "1"
+    # Connections each gunicorn worker opens before serving (gunicorn.conf.py)
+    WARM_POOL_CONNECTIONS = int(os.getenv("WARM_POOL_CONNECTIONS", 2))
+
+    # Optional read replica for @read_replica GET endpoints (see app/db_routing.py);
+    # None: REPLICA_DATABASE_URL, resolved with the primary URI
+    SQLALCHEMY_BINDS = None
+    # Seconds a user's reads stay on the primary after they write
+    READ_STICKY_SECONDS = float(os.getenv("READ_STICKY_SECONDS", 5))
+
+    # Per-request timing, SQL counts and Server-Timing headers (app/instrumentation.py)
+    INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED") == "1"
+    # Allow ?_profile=1 outside debug mode (never enable on a public deployment)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED") == "1"
+
+    # Slow-query log (app/slow_queries.py); disabled unless SLOW_QUERY_MS > 0
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 0))
+    SLOW_QUERY_EXPLAIN_MS = float(os.getenv("SLOW_QUERY_EXPLAIN_MS", 0))
+    SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", 200))
+
+    # Shared secret for /api/admin/* operator endpoints (disabled when unset)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+    # Bearer token required to scrape /api/metrics (the endpoint is off when unset)
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Plan edit ops kept per plan for /ops?since= catch-up (app/plan_versions.py)
+    PLAN_OPS_RETAIN = int(os.getenv("PLAN_OPS_RETAIN", 200))
+
+    # /api/sync change log (app/sync.py): how long a change must age before the token
+    # moves past it (longer than any write transaction), and how long entries are kept
+    SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", 2))
+    SYNC_RETAIN_DAYS = int(os.getenv("SYNC_RETAIN_DAYS", 30))
+
+    # Deletions touching more rows than PURGE_INLINE_ROWS run in the background,
+    # PURGE_CHUNK_SIZE rows per transaction (app/purge.py)
+    PURGE_INLINE_ROWS = int(os.getenv("PURGE_INLINE_ROWS", 5000))
+    PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", 1000))
+    # A running purge job silent this long was interrupted and may be resumed
+    PURGE_STALE_SECONDS = int(os.getenv("PURGE_STALE_SECONDS", 300))
+
+    # Background jobs (app/jobs.py) run in `manage.py worker` processes. JOB_EMBEDDED_WORKER=1
+    # runs them inside the web process instead (development: run.py and TestConfig)
+    JOB_EMBEDDED_WORKER = os.getenv("JOB_EMBEDDED_WORKER", "0") == "1"
+    JOB_VISIBILITY_SECONDS = int(os.getenv("JOB_VISIBILITY_SECONDS", 300))
+    JOB_RETRY_SECONDS = float(os.getenv("JOB_RETRY_SECONDS", 5))
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+    JOB_RETAIN_DAYS = int(os.getenv("JOB_RETAIN_DAYS", 7))
+    # Requests larger than this are queued instead of handled inline
+    JOB_INLINE_PLAN_TASKS = int(os.getenv("JOB_INLINE_PLAN_TASKS", 200))
+    JOB_INLINE_IMPORT_ROWS = int(os.getenv("JOB_INLINE_IMPORT_ROWS", 100))
+    TASK_IMPORT_MAX_ROWS = int(os.getenv("TASK_IMPORT_MAX_ROWS", 5000))
+    # Group plan split into member schedules (app/group_schedules.py): more members
+    # than this are queued; workers use a process pool from POOL_MIN_MEMBERS up
+    GROUP_SCHEDULE_INLINE_MEMBERS = int(os.getenv("GROUP_SCHEDULE_INLINE_MEMBERS", 10))
+    GROUP_SCHEDULE_POOL_MIN_MEMBERS = int(os.getenv("GROUP_SCHEDULE_POOL_MIN_MEMBERS", 8))
+    GROUP_SCHEDULE_PROCESSES = int(os.getenv("GROUP_SCHEDULE_PROCESSES", 0))  # 0: one per CPU
+    # Redis/AMQP URL shared by web and worker processes so jobs can emit socket events
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+
+    # /api/bootstrap list sizes and /api/batch fan-out (app/routes/bootstrap_routes.py)
+    BOOTSTRAP_LIST_LIMIT = int(os.getenv("BOOTSTRAP_LIST_LIMIT", 20))
+    BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", 10))
+
+    # /api/agenda: widest from..to window in days, and largest page
+    AGENDA_MAX_DAYS = int(os.getenv("AGENDA_MAX_DAYS", 92))
+    AGENDA_MAX_LIMIT = int(os.getenv("AGENDA_MAX_LIMIT", 500))
+
+    # Token-bucket rate limiting (app/rate_limit.py). Costs are JSON, e.g.
+    # {"plans_bp.generate_plan": 10, "search_bp": 2}; Redis shares buckets across workers
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+    RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 60))
+    RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", 120))
+    RATE_LIMIT_COSTS = json.loads(os.getenv("RATE_LIMIT_COSTS", "{}"))
+    RATE_LIMIT_BYTES_PER_TOKEN = int(os.getenv("RATE_LIMIT_BYTES_PER_TOKEN", 65536))
+    RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL")
+    # Reverse proxies in front of the app (Render: 1). Their X-Forwarded-For/-Proto
+    # give request.remote_addr the real client; 0 trusts no forwarded headers
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+    # Max rooms one Socket.IO connection may join (app/sockets.py)
+    SOCKET_MAX_ROOMS = int(os.getenv("SOCKET_MAX_ROOMS", 50))
+    # Per-connection outbound queues (app/outbound.py): size limit, overflow
+    # policy ("drop" or "disconnect"), transport packets in flight, drain cadence
+    SOCKET_QUEUE_MAX = int(os.getenv("SOCKET_QUEUE_MAX", 200))
+    SOCKET_QUEUE_POLICY = os.getenv("SOCKET_QUEUE_POLICY", "drop")
+    SOCKET_TRANSPORT_HIGH_WATER = int(os.getenv("SOCKET_TRANSPORT_HIGH_WATER", 16))
+    SOCKET_DRAIN_SECONDS = float(os.getenv("SOCKET_DRAIN_SECONDS", 0.05))
+
+    # Live group plan task editing (app/collab.py): ops kept per plan for catch-up
+    COLLAB_LOG_SIZE = int(os.getenv("COLLAB_LOG_SIZE", 500))
+
 
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv("JWT_ACCESS_MINUTES", 15)))
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_REFRESH_DAYS", 30)))
 
     JWT_TOKEN_LOCATION = ("headers",)
     PROPAGATE_EXCEPTIONS = True
+
+    # Tests: create_all() + search schema inside create_app (TestConfig only)
+    CREATE_SCHEMA_ON_START = False
+
+
+class TestConfig(Config):
+    """In-memory SQLite with the schema created on start: `create_app(config_class=TestConfig)`.
+
+    Queued jobs stay queued (no embedded runner: nothing is monkey-patched for
+    its greenlet); run them with `jobs.work(app, burst=True)`.
+    """
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    SQLALCHEMY_BINDS = {}
+    SECRET_KEY = "test-secret"
+    JWT_SECRET_KEY = "test-jwt-secret-0123456789abcdef0123456789"
+    RATE_LIMIT_ENABLED = False
+    JOB_EMBEDDED_WORKER = False
+    CREATE_SCHEMA_ON_START = True
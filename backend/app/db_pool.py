@@ -0,0 +1,124 @@
+# -------------------------------------------------------------
+# Why: Make the SQLAlchemy connection pool an explicit, tunable part of
+# the deployment instead of the implicit QueuePool(5 + 10) default.
+#
+# Why this design?
+#   - Under gevent every request is a greenlet; with the default pool the
+#     16th concurrent request silently waits on a connection. Size, overflow
+#     and timeout come from config so they can match the worker count and the
+#     database's connection limit.
+#   - Render's Postgres drops idle connections: pre-ping + recycle (+ LIFO
+#     reuse so surplus idle connections age out) avoid handing out dead ones.
+#   - QueuePool's internals are monkey-patched by gevent, so the pool is
+#     greenlet-safe as-is; InstrumentedQueuePool only adds timing.
+#   - Checkout wait and saturation are exported through app.metrics. The
+#     instrumented engines are kept on their app (app.extensions), so every
+#     create_app call doesn't grow a process-wide list and a scrape only
+#     reports the serving app's pools.
+#   - SQLite connections turn on foreign key enforcement, so the schema's
+#     ON DELETE CASCADE rules hold in development as in production.
+# -------------------------------------------------------------
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.engine import make_url
+
+from . import metrics
+
+POOL_WAIT = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+POOL_TIMEOUTS = metrics.counter("db_pool_checkout_timeouts_total", "Pool checkouts that hit pool_timeout")
+POOL_CONNECTS = metrics.counter("db_pool_connections_opened_total", "New DB connections opened by the pool")
+POOL_INVALIDATED = metrics.counter("db_pool_connections_invalidated_total", "Connections discarded (pre-ping failures, errors)")
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        POOL_WAIT.observe(time.perf_counter() - start)
+        return conn
+
+
+def build_engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS derived from the DB_POOL_* / DB_STATEMENT_TIMEOUT_MS settings."""
+    uri = config.get("SQLALCHEMY_DATABASE_URI")
+    if not uri:
+        return {}
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}  # Flask-SQLAlchemy picks StaticPool for in-memory SQLite
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(config.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(config.get("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": float(config.get("DB_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(config.get("DB_POOL_RECYCLE", 280)),
+        "pool_pre_ping": bool(config.get("DB_POOL_PRE_PING", True)),
+        "pool_use_lifo": True,
+    }
+    timeout_ms = int(config.get("DB_STATEMENT_TIMEOUT_MS", 0))
+    if timeout_ms and backend == "postgresql" and not config.get("DB_PGBOUNCER"):
+        # PgBouncer rejects the `options` startup parameter; see instrument_engine
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    elif timeout_ms and backend == "mysql":
+        options["connect_args"] = {"init_command": f"SET SESSION max_execution_time={timeout_ms}"}
+    return options
+
+
+def instrument_engine(app, engine):
+    """Attach pool/connection event listeners and track the engine for the saturation gauges."""
+    config = app.config
+    timeout_ms = int(config.get("DB_STATEMENT_TIMEOUT_MS", 0))
+    if timeout_ms and config.get("DB_PGBOUNCER") and engine.dialect.name == "postgresql":
+        # Transaction pooling can't keep session-level SETs; scope it to each transaction
+        @event.listens_for(engine, "begin")
+        def _set_local_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        POOL_CONNECTS.inc()
+        if engine.dialect.name == "sqlite":
+            # SQLite ignores foreign keys (and ON DELETE CASCADE) unless asked per connection
+            cursor = dbapi_conn.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(_dbapi_conn, _record, _exception):
+        POOL_INVALIDATED.inc()
+
+    engines = app.extensions.setdefault("db_pool_engines", [])
+    if engine not in engines:
+        engines.append(engine)
+
+
+@metrics.register_collector
+def _pool_gauges():
+    checked_out, capacity, saturation = [], [], []
+    engines = current_app.extensions.get("db_pool_engines", []) if has_app_context() else []
+    for engine in engines:
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        labels = {"db": engine.url.get_backend_name()}
+        limit = pool.size() + max(pool._max_overflow, 0)
+        used = pool.checkedout()
+        checked_out.append((labels, used))
+        capacity.append((labels, limit))
+        saturation.append((labels, round(used / limit, 4) if limit else 0))
+    yield "db_pool_checked_out", "gauge", "Connections currently checked out", checked_out
+    yield "db_pool_capacity", "gauge", "pool_size + max_overflow", capacity
+    yield "db_pool_saturation", "gauge", "checked_out / capacity", saturation
@@ -0,0 +1,111 @@
+# -------------------------------------------------------------
+# Why: Send read-heavy GET endpoints to a read replica (when one is
+# configured) so they stop competing with writes on the primary.
+#
+# Why this design?
+#   - Routing lives in the session's get_bind: handlers keep using
+#     db.session / Model.query unchanged and opt in with @read_replica.
+#   - Only SELECTs from GET/HEAD requests are routed, and never after the
+#     request itself has flushed, so writes and read-modify-write flows
+#     always see the primary.
+#   - Read-your-writes: after a request from a user writes, that user's reads
+#     stay on the primary for READ_STICKY_SECONDS (covers replica lag). The
+#     window is tracked per process, so keep it comfortably above typical lag.
+#   - The replica is the SQLALCHEMY_BINDS["replica"] engine; two SQLite
+#     files or two local Postgres instances are enough to exercise it.
+# -------------------------------------------------------------
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+REPLICA_BIND = "replica"
+_STICKY_MAX_USERS = 10000
+
+
+class _StickyUsers:
+    """Bounded map of user id -> monotonic deadline for primary-only reads."""
+
+    def __init__(self, maxsize=_STICKY_MAX_USERS):
+        self.maxsize = maxsize
+        self._until = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, user_id, seconds):
+        with self._lock:
+            self._until[user_id] = time.monotonic() + seconds
+            self._until.move_to_end(user_id)
+            while len(self._until) > self.maxsize:
+                self._until.popitem(last=False)
+
+    def is_sticky(self, user_id):
+        with self._lock:
+            deadline = self._until.get(user_id)
+            if deadline is None:
+                return False
+            if deadline < time.monotonic():
+                self._until.pop(user_id, None)
+                return False
+            return True
+
+
+sticky_users = _StickyUsers()
+
+
+def _current_identity():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+class RoutingSession(FlaskSession):
+    """Flask-SQLAlchemy session that sends flagged SELECTs to the replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and has_request_context() and g.get("db_route") == REPLICA_BIND
+                and not g.get("db_wrote") and not self._flushing
+                and isinstance(clause, Select)):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(fn):
+    """Route this GET handler's reads to the replica unless the caller recently wrote.
+
+    Place below @jwt_required() so the identity is known for stickiness.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if request.method in ("GET", "HEAD") and REPLICA_BIND in (current_app.config.get("SQLALCHEMY_BINDS") or {}):
+            user_id = _current_identity()
+            if user_id is None or not sticky_users.is_sticky(str(user_id)):
+                g.db_route = REPLICA_BIND
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_write(_session, _ctx):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def init_routing(app):
+    """Start the caller's read-your-writes window after any request that wrote."""
+
+    @app.after_request
+    def _stick_writer(response):
+        if g.get("db_wrote"):
+            user_id = _current_identity()
+            if user_id is not None:
+                sticky_users.mark(str(user_id), app.config.get("READ_STICKY_SECONDS", 5))
+        return response
@@ -1,5 +1,5 @@
 # -------------------------------------------------------------
-# Why: This file initializes Flask extensions (SQLAlchemy, Marshmallow, JWT, etc.).
+# Why: This file initializes Flask extensions (SQLAlchemy, JWT, Socket.IO).
 #
 # Why this design?
 #   - Centralizes extension setup for clarity and maintainability.
@@ -8,13 +8,13 @@
 #   - Follows Flask best practices for scalable projects.
 # -------------------------------------------------------------
 from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
 import os
+from .db_routing import RoutingSession
 
-db = SQLAlchemy()
-ma = Marshmallow()
+# RoutingSession sends @read_replica GET reads to SQLALCHEMY_BINDS["replica"]
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 
 # Socket.IO CORS must match frontend origin when using credentials
@@ -0,0 +1,107 @@
+# -------------------------------------------------------------
+# Why: A group plan is one shared task list; each participant still needs
+# to know which of those tasks are theirs and when to do them.
+#
+# Why this design?
+#   - Split first, then schedule: planner.assign_members balances minutes
+#     across participants deadline by deadline, then planner.schedule_items
+#     lays out each member's share day by day. Both are pure functions of
+#     plain dicts, so they run anywhere, including a child process.
+#   - Members are independent once assigned, so large groups (at least
+#     GROUP_SCHEDULE_POOL_MIN_MEMBERS) schedule in a process pool, but only
+#     inside `manage.py worker` processes: the web process runs on gevent,
+#     where forking or blocking on a pool would stall every greenlet.
+#   - The shares are saved as personal StudyPlan rows tagged with
+#     group_plan_id. Regenerating replaces the previous shares; all new rows
+#     are added in one flush, which SQLAlchemy sends as a batched INSERT
+#     while keeping the ORM hooks (sync log, search index).
+# -------------------------------------------------------------
+import os
+import threading
+from datetime import date
+
+from sqlalchemy import select
+
+from . import planner
+from .extensions import db
+from .models import GroupPlanTask, StudyPlan
+from .plan_versions import delete_ops
+
+DEFAULT_DAYS = 7
+MAX_DAYS = 366
+
+_settings = {"pool_min_members": 8, "processes": 0}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _processes():
+    return _settings["processes"] or os.cpu_count() or 1
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing  # only worker processes ever get here
+            from concurrent.futures import ProcessPoolExecutor
+            _pool = ProcessPoolExecutor(max_workers=_processes(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _schedule_one(args):
+    items, days, daily_minutes, start = args
+    return planner.schedule_items(items, days, daily_minutes, start)
+
+
+def _map(work, use_pool):
+    if use_pool and len(work) >= _settings["pool_min_members"]:
+        chunksize = max(1, len(work) // (4 * _processes()))
+        return list(_executor().map(_schedule_one, work, chunksize=chunksize))
+    return [_schedule_one(args) for args in work]
+
+
+def plan_items(plan_id):
+    """The group plan's tasks as planner items, in list order."""
+    rows = db.session.scalars(select(GroupPlanTask).where(GroupPlanTask.plan_id == plan_id)
+                              .order_by(GroupPlanTask.position, GroupPlanTask.id)).all()
+    return [{"task": t.task, "duration": t.duration or 30, "notes": t.notes or "",
+             "due": t.due.isoformat() if t.due else None, "priority": t.priority or 3,
+             "group_task_id": t.id} for t in rows]
+
+
+def default_days(plan, items, start):
+    """Days until the plan's due date, else until the last task's, else a week."""
+    due = plan.due or max((date.fromisoformat(i["due"]) for i in items if i["due"]), default=None)
+    if due is None:
+        return DEFAULT_DAYS
+    return min(MAX_DAYS, max(1, (due - start).days + 1))
+
+
+def build_schedules(items, member_ids, days, daily_minutes=None, start=None, use_pool=False):
+    """{member_id: day-by-day content} splitting `items` across the members."""
+    assign = planner.assign_members(items, member_ids)
+    shares = [[] for _ in member_ids]
+    for item, m in zip(items, assign):
+        shares[m].append(item)
+    work = [(share, days, daily_minutes, start) for share in shares]
+    return dict(zip(member_ids, _map(work, use_pool)))
+
+
+def save_schedules(plan, schedules):
+    """Replace each member's previous share of `plan` with a new StudyPlan (flushed, not committed)."""
+    previous = db.session.scalars(select(StudyPlan).where(StudyPlan.group_plan_id == plan.id,
+                                                          StudyPlan.user_id.in_(list(schedules)))).all()
+    for old in previous:
+        delete_ops("plan", old.id)
+        db.session.delete(old)
+    rows = [StudyPlan(user_id=user_id, title=f"{plan.title}: my share"[:200], content=content,
+                      group_plan_id=plan.id) for user_id, content in schedules.items()]
+    db.session.add_all(rows)
+    db.session.flush()
+    return rows
+
+
+def init_group_schedules(app):
+    _settings["pool_min_members"] = int(app.config.get("GROUP_SCHEDULE_POOL_MIN_MEMBERS", 8))
+    _settings["processes"] = int(app.config.get("GROUP_SCHEDULE_PROCESSES", 0))
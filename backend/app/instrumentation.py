@@ -0,0 +1,185 @@
+# -------------------------------------------------------------
+# Why: Opt-in per-request instrumentation, so we can see where an
+# endpoint spends its time (DB vs serialization vs everything else)
+# instead of guessing from print statements.
+#
+# Why this design?
+#   - Enabled with INSTRUMENTATION_ENABLED=1; when off, no listeners or
+#     hooks are installed, so there is no overhead.
+#   - SQLAlchemy before/after_cursor_execute events time every statement;
+#     ORM `load` events count rows materialized from results.
+#   - Serialization covers Marshmallow dumps (schemas.BaseSchema) and JSON
+#     encoding (TimedJSONProvider).
+#   - Per-endpoint histograms go to app.metrics (/api/metrics) and each
+#     response carries a Server-Timing header for browser devtools.
+#   - In debug builds (or PROFILING_ENABLED=1) a request with `?_profile=1`
+#     (or the X-Profile header) is run under cProfile, or pyinstrument when
+#     installed and requested with `?_profile=pyinstrument`, and the report
+#     is returned instead of the response.
+# -------------------------------------------------------------
+import io
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+
+from . import metrics
+
+REQUEST_SECONDS = metrics.histogram("http_request_duration_seconds", "Wall time per request")
+DB_SECONDS = metrics.histogram("http_request_db_seconds", "Time spent executing SQL per request")
+SER_SECONDS = metrics.histogram("http_request_serialization_seconds", "Schema dump + JSON encoding time per request")
+QUERY_COUNT = metrics.histogram("http_request_queries", "SQL statements per request",
+                                buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100))
+ROW_COUNT = metrics.histogram("http_request_rows", "ORM rows loaded / rows affected per request",
+                              buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000))
+
+_listeners_installed = False
+
+
+def _stats():
+    if has_request_context():
+        return g.get("_instr")
+    return None
+
+
+@contextmanager
+def serialization_timer():
+    """Attribute the enclosed block to serialization time (no-op when not instrumenting)."""
+    stats = _stats()
+    if stats is None or stats["in_ser"]:
+        yield
+        return
+    stats["in_ser"] = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats["ser"] += time.perf_counter() - start
+        stats["in_ser"] = False
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with serialization_timer():
+            return super().dumps(obj, **kwargs)
+
+
+def _before_cursor(conn, _cursor, _statement, _params, _context, _executemany):
+    conn.info.setdefault("_instr_start", []).append(time.perf_counter())
+
+
+def _after_cursor(conn, cursor, _statement, _params, _context, _executemany):
+    start = conn.info["_instr_start"].pop()
+    stats = _stats()
+    if stats is None:
+        return
+    stats["db"] += time.perf_counter() - start
+    stats["queries"] += 1
+    if cursor.description is None and cursor.rowcount and cursor.rowcount > 0:
+        stats["rows"] += cursor.rowcount
+
+
+def _on_cursor_error(context):
+    # after_cursor_execute won't fire for a failed statement; keep the stack balanced
+    if context.connection is not None:
+        starts = context.connection.info.get("_instr_start")
+        if starts:
+            starts.pop()
+
+
+def _on_load(_target, _context):
+    stats = _stats()
+    if stats is not None:
+        stats["rows"] += 1
+
+
+def _install_listeners():
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor)
+    event.listen(Engine, "after_cursor_execute", _after_cursor)
+    event.listen(Engine, "handle_error", _on_cursor_error)
+    event.listen(Mapper, "load", _on_load)
+    _listeners_installed = True
+
+
+def _profile_mode(app):
+    if not (app.debug or app.config.get("PROFILING_ENABLED")):
+        return None
+    mode = request.args.get("_profile") or request.headers.get("X-Profile")
+    if not mode or mode == "0":
+        return None
+    return "pyinstrument" if mode == "pyinstrument" else "cprofile"
+
+
+def _start_profiler(mode):
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            mode = "cprofile"
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return mode, profiler
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return mode, profiler
+
+
+def _profile_response(mode, profiler):
+    if mode == "pyinstrument":
+        profiler.stop()
+        return Response(profiler.output_html(), mimetype="text/html")
+    import pstats
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(60)
+    return Response(out.getvalue(), mimetype="text/plain")
+
+
+def init_instrumentation(app):
+    """Install request hooks and SQL listeners when INSTRUMENTATION_ENABLED is set."""
+    if not app.config.get("INSTRUMENTATION_ENABLED"):
+        return
+    _install_listeners()
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_request():
+        g._instr = {"start": time.perf_counter(), "db": 0.0, "queries": 0,
+                    "rows": 0, "ser": 0.0, "in_ser": False}
+        mode = _profile_mode(app)
+        if mode:
+            g._instr_profiler = _start_profiler(mode)
+
+    @app.after_request
+    def _finish_request(response):
+        stats = g.pop("_instr", None)
+        if stats is None:
+            return response
+        wall = time.perf_counter() - stats["start"]
+        endpoint = request.endpoint or "unmatched"
+        REQUEST_SECONDS.observe(wall, endpoint=endpoint, method=request.method,
+                                status=response.status_code)
+        DB_SECONDS.observe(stats["db"], endpoint=endpoint)
+        SER_SECONDS.observe(stats["ser"], endpoint=endpoint)
+        QUERY_COUNT.observe(stats["queries"], endpoint=endpoint)
+        ROW_COUNT.observe(stats["rows"], endpoint=endpoint)
+        app_time = max(wall - stats["db"] - stats["ser"], 0.0)
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats["db"] * 1000:.2f};desc="{stats["queries"]} queries", '
+            f'ser;dur={stats["ser"] * 1000:.2f}, app;dur={app_time * 1000:.2f}, '
+            f'total;dur={wall * 1000:.2f}',
+        )
+        profiling = g.pop("_instr_profiler", None)
+        if profiling:
+            return _profile_response(*profiling)
+        return response
@@ -0,0 +1,254 @@
+# -------------------------------------------------------------
+# Why: Large plan generation, task imports and group schedules ran inside
+# the request greenlet, so request latency grew with the size of the work
+# and one big request stalled every other greenlet in the worker.
+#
+# Why this design?
+#   - A queue in the application database (the `jobs` table): no broker to
+#     run, and enqueueing commits like any other write. Routes enqueue,
+#     answer 202 with the job, and clients poll /api/jobs/<id>.
+#   - Workers (`flask --app manage.py worker [--processes N]`) claim the
+#     next job by priority (lower first), then age, with a conditional
+#     UPDATE (SKIP LOCKED where the database has it). A claim sets a
+#     visibility timeout (JOB_VISIBILITY_SECONDS); a job still running
+#     after that, e.g. because its worker died, is handed to another one.
+#   - The handler's writes and the job's "done" row commit in the same
+#     transaction, fenced on the claim (worker id + attempt), so a job that
+#     timed out and ran again can't apply its result twice. Failures retry
+#     with exponential backoff up to max_attempts, then stay 'failed'.
+#   - Socket events are sent after the commit with socketio.emit, which
+#     reaches every web worker through SOCKETIO_MESSAGE_QUEUE; each queues
+#     them per connection (app/outbound.py).
+#   - JOB_EMBEDDED_WORKER (development; off by default) runs jobs in a
+#     background greenlet of the web process instead, which is as blocking
+#     as running them inline. It starts on the first enqueue, or on the
+#     process's first request when jobs are already waiting (e.g. queued
+#     before a restart).
+# -------------------------------------------------------------
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, g
+from sqlalchemy import or_, select, update
+
+from . import metrics
+from .extensions import db, socketio
+from .models import Job
+
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 5, 10
+
+PROCESSED = metrics.counter("jobs_processed_total", "Background jobs run, by kind and outcome")
+QUEUE_WAIT = metrics.histogram("job_queue_wait_seconds", "Time from enqueue to a worker starting the job")
+RUN_SECONDS = metrics.histogram("job_run_seconds", "Time spent running a job's handler")
+
+HANDLERS = {}  # kind -> (fn(job) -> JSON result, visibility seconds or None)
+_settings = {"visibility": 300, "retry_seconds": 5.0, "poll_seconds": 1.0, "embedded": False, "in_worker": False}
+_lock = threading.Lock()
+_runner_pid = None  # process running the embedded runner (a forked child must start its own)
+_checked_pid = None
+
+
+def handler(kind, visibility=None):
+    """Register fn(job) as the handler for `kind`; it must not commit (the runner does)."""
+    def register(fn):
+        HANDLERS[kind] = (fn, visibility)
+        return fn
+    return register
+
+
+def enqueue(kind, payload, user_id=None, priority=PRIORITY_NORMAL, max_attempts=3):
+    """Queue a job (committed) and return it."""
+    job = Job(kind=kind, payload=payload, user_id=user_id, status="queued", priority=priority, attempts=0,
+              max_attempts=max_attempts, run_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    if _settings["embedded"] and not _settings["in_worker"]:
+        _ensure_runner(current_app._get_current_object())
+    return job
+
+
+def after_commit(fn, *args):
+    """Call fn(*args) once the running job's result has committed."""
+    g._job_after_commit.append((fn, args))
+
+
+def in_worker():
+    """True inside a `manage.py worker` process (no gevent: blocking calls and process pools are fine)."""
+    return _settings["in_worker"]
+
+
+def push(event, payload, room):
+    """Socket event from a job; reaches every web worker through SOCKETIO_MESSAGE_QUEUE."""
+    socketio.emit(event, payload, to=room)
+
+
+def _visibility(kind):
+    _fn, visibility = HANDLERS.get(kind, (None, None))
+    return visibility or _settings["visibility"]
+
+
+def _fence(job_id, status, attempts):
+    return (Job.id == job_id) & (Job.status == status) & (Job.attempts == attempts)
+
+
+def claim(worker_id, batch=10):
+    """Take the next runnable job for worker_id; returns it or None."""
+    now = datetime.utcnow()
+    query = (select(Job.id, Job.kind, Job.status, Job.attempts, Job.max_attempts, Job.created_at)
+             .where(or_((Job.status == "queued") & (Job.run_at <= now),
+                        (Job.status == "running") & (Job.locked_until < now)))
+             .order_by(Job.priority, Job.id).limit(batch))
+    if db.session.get_bind().dialect.name != "sqlite":
+        query = query.with_for_update(skip_locked=True)
+    for job_id, kind, status, attempts, max_attempts, created_at in db.session.execute(query).all():
+        fence = _fence(job_id, status, attempts)
+        if status == "running" and attempts >= max_attempts:
+            # Its last attempt outlived the visibility timeout
+            db.session.execute(update(Job).where(fence).values(
+                status="failed", error="Timed out", locked_until=None, finished_at=now))
+            PROCESSED.inc(kind=kind, outcome="timeout")
+            continue
+        claimed = db.session.execute(update(Job).where(fence).values(
+            status="running", attempts=attempts + 1, locked_by=worker_id, started_at=now,
+            locked_until=now + timedelta(seconds=_visibility(kind)))).rowcount
+        if claimed:
+            db.session.commit()
+            QUEUE_WAIT.observe((now - created_at).total_seconds())
+            return db.session.get(Job, job_id)
+    db.session.commit()
+    return None
+
+
+def run_one(worker_id):
+    """Claim and run one job; returns it, or None when nothing was runnable."""
+    job = claim(worker_id)
+    if job is None:
+        return None
+    job_id, kind, attempt = job.id, job.kind, job.attempts
+    fence = _fence(job_id, "running", attempt) & (Job.locked_by == worker_id)
+    g._job_after_commit = []
+    start = time.perf_counter()
+    try:
+        fn, _visibility_seconds = HANDLERS[kind]
+        result = fn(job)
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception("job %s (%s) attempt %s failed", job_id, kind, attempt)
+        RUN_SECONDS.observe(time.perf_counter() - start, kind=kind)
+        now = datetime.utcnow()
+        job = db.session.get(Job, job_id)
+        if attempt < job.max_attempts:
+            values = {"status": "queued", "locked_until": None,
+                      "run_at": now + timedelta(seconds=_settings["retry_seconds"] * 2 ** (attempt - 1))}
+            outcome = "retry"
+        else:
+            values = {"status": "failed", "locked_until": None, "finished_at": now}
+            outcome = "failed"
+        db.session.execute(update(Job).where(fence).values(error=f"{type(exc).__name__}: {exc}"[:2000], **values))
+        db.session.commit()
+        PROCESSED.inc(kind=kind, outcome=outcome)
+        return job
+    RUN_SECONDS.observe(time.perf_counter() - start, kind=kind)
+    finished = db.session.execute(update(Job).where(fence).values(
+        status="done", result=result, error=None, locked_until=None, finished_at=datetime.utcnow())).rowcount
+    if not finished:
+        # Our claim expired and another worker owns the job now: discard our writes
+        db.session.rollback()
+        PROCESSED.inc(kind=kind, outcome="lost_claim")
+        return db.session.get(Job, job_id)
+    db.session.commit()
+    PROCESSED.inc(kind=kind, outcome="done")
+    for fn, args in g.pop("_job_after_commit", ()):
+        try:
+            fn(*args)
+        except Exception:
+            current_app.logger.exception("job %s after-commit callback failed", job_id)
+    return db.session.get(Job, job_id)
+
+
+def _sleep(seconds):
+    if _settings["in_worker"]:
+        time.sleep(seconds)
+    else:
+        socketio.sleep(seconds)
+
+
+def work(app, worker_id=None, burst=False):
+    """Run jobs until stopped (or, with burst, until the queue is empty)."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    with app.app_context():
+        while True:
+            try:
+                job = run_one(worker_id)
+            except Exception:
+                app.logger.exception("job worker %s: claim failed", worker_id)
+                db.session.rollback()
+                job = None
+            finally:
+                db.session.remove()
+            if job is None:
+                if burst:
+                    return
+                _sleep(_settings["poll_seconds"])
+
+
+def _ensure_runner(app):
+    global _runner_pid
+    with _lock:
+        if _runner_pid == os.getpid():
+            return
+        _runner_pid = os.getpid()
+    socketio.start_background_task(work, app, f"{socket.gethostname()}:{os.getpid()}:embedded")
+
+
+def _worker_process(burst):
+    from .main import create_app
+    _settings["in_worker"] = True
+    app = create_app()
+    work(app, burst=burst)
+
+
+def run_workers(processes=1, burst=False):
+    """Entry point of `manage.py worker`: run `processes` worker processes (blocking)."""
+    if processes <= 1:
+        _worker_process(burst)
+        return
+    import multiprocessing
+    ctx = multiprocessing.get_context("spawn")  # each process builds its own app and connection pool
+    children = [ctx.Process(target=_worker_process, args=(burst,), daemon=False) for _ in range(processes)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+
+def prune(retain_days):
+    """Delete finished jobs older than retain_days; returns how many were removed."""
+    cutoff = datetime.utcnow() - timedelta(days=retain_days)
+    removed = Job.query.filter(Job.status.in_(("done", "failed")), Job.finished_at < cutoff) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def init_jobs(app):
+    _settings["visibility"] = int(app.config.get("JOB_VISIBILITY_SECONDS", 300))
+    _settings["retry_seconds"] = float(app.config.get("JOB_RETRY_SECONDS", 5))
+    _settings["poll_seconds"] = float(app.config.get("JOB_POLL_SECONDS", 1))
+    _settings["embedded"] = bool(app.config.get("JOB_EMBEDDED_WORKER", False))
+    if _settings["embedded"] and not _settings["in_worker"]:
+        app.before_request(lambda: _resume_waiting(app))
+
+
+def _resume_waiting(app):
+    # Once per process: start the embedded runner if jobs are already waiting
+    global _checked_pid
+    if _checked_pid == os.getpid():
+        return
+    _checked_pid = os.getpid()
+    waiting = db.session.scalar(select(Job.id).where(Job.status.in_(("queued", "running"))).limit(1))
+    if waiting is not None:
+        _ensure_runner(app)
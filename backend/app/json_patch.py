@@ -0,0 +1,151 @@
+# -------------------------------------------------------------
+# Why: Apply RFC 6902 JSON Patch documents to plan JSON, so an edit that
+# moves one item sends (and stores, and broadcasts) one small op instead
+# of the whole plan.
+#
+# Why this design?
+#   - Small, dependency-free implementation of the six operations (add,
+#     remove, replace, move, copy, test) with RFC 6901 pointers.
+#   - apply_patch never mutates its input: it works on a deep copy, so a
+#     failing op halfway through a patch leaves the stored plan untouched.
+#   - Every problem is a PatchError (a ValueError) with a message that
+#     names the offending op, which routes turn into a 400/409.
+# -------------------------------------------------------------
+import copy
+
+OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+class PatchError(ValueError):
+    pass
+
+
+class PatchTestFailed(PatchError):
+    """A `test` op did not match: the document changed under the client."""
+
+
+def parse_pointer(pointer):
+    """RFC 6901 pointer -> list of reference tokens ("" is the whole document)."""
+    if not isinstance(pointer, str):
+        raise PatchError(f"path must be a string, got {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"path must start with '/': {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def escape_token(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _index(container, token, allow_end=False):
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise PatchError(f"invalid array index {token!r}")
+    i = int(token)
+    if i > len(container) or (i == len(container) and not allow_end):
+        raise PatchError(f"array index {i} out of range")
+    return i
+
+
+def _parent(doc, tokens, pointer):
+    target = doc
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise PatchError(f"path not found: {pointer}")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_index(target, token)]
+        else:
+            raise PatchError(f"path not found: {pointer}")
+    return target
+
+
+def _get(doc, pointer):
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return doc
+    parent, last = _parent(doc, tokens, pointer), tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise PatchError(f"path not found: {pointer}")
+        return parent[last]
+    if isinstance(parent, list):
+        return parent[_index(parent, last)]
+    raise PatchError(f"path not found: {pointer}")
+
+
+def _add(doc, pointer, value):
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return value
+    parent, last = _parent(doc, tokens, pointer), tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, last, allow_end=True), value)
+    else:
+        raise PatchError(f"path not found: {pointer}")
+    return doc
+
+
+def _remove(doc, pointer):
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        raise PatchError("cannot remove the whole document")
+    parent, last = _parent(doc, tokens, pointer), tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise PatchError(f"path not found: {pointer}")
+        return parent.pop(last)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, last))
+    raise PatchError(f"path not found: {pointer}")
+
+
+def apply_op(doc, op):
+    """Apply one operation to `doc` in place; returns the (possibly new) root."""
+    if not isinstance(op, dict) or op.get("op") not in OPERATIONS:
+        raise PatchError(f"invalid operation: {op!r}")
+    kind, path = op["op"], op.get("path")
+    if not isinstance(path, str):
+        raise PatchError(f"'{kind}' requires a string path")
+    if kind in ("move", "copy") and not isinstance(op.get("from"), str):
+        raise PatchError(f"'{kind}' requires a string from")
+    if kind in ("add", "replace", "test") and "value" not in op:
+        raise PatchError(f"'{kind}' requires a value")
+    if kind == "add":
+        return _add(doc, path, copy.deepcopy(op["value"]))
+    if kind == "remove":
+        _remove(doc, path)
+        return doc
+    if kind == "replace":
+        _get(doc, path)  # target must exist
+        if not parse_pointer(path):
+            return copy.deepcopy(op["value"])
+        _remove(doc, path)
+        return _add(doc, path, copy.deepcopy(op["value"]))
+    if kind == "test":
+        if _get(doc, path) != op["value"]:
+            raise PatchTestFailed(f"test failed at {path}")
+        return doc
+    source = op.get("from")
+    if kind == "move":
+        if path != source and path.startswith(f"{source}/"):
+            raise PatchError("cannot move a value into one of its children")
+        value = _remove(doc, source)
+        return _add(doc, path, value)
+    return _add(doc, path, copy.deepcopy(_get(doc, source)))  # copy
+
+
+def apply_patch(doc, ops):
+    """Return a patched deep copy of `doc`; raises PatchError and leaves `doc` as is."""
+    if not isinstance(ops, list):
+        raise PatchError("a patch must be a list of operations")
+    result = copy.deepcopy(doc)
+    for op in ops:
+        result = apply_op(result, op)
+    return result
@@ -5,24 +5,72 @@
 #   - App factory pattern enables flexible configuration and testing.
 #   - Blueprints are registered here for modularity and scalability.
 #   - Centralizes app setup, making it easier to manage extensions and config.
+#   - Start-up cost is paid only for what the process uses: route modules are
+#     imported when create_app registers them, operator-only blueprints only
+#     when configured, and Flask-Migrate/Alembic only by the CLI (manage.py)
+#     and migrate_once. benchmarks/startup.py measures the cold start.
 # -------------------------------------------------------------
 from flask import Flask, jsonify
-from .config import Config
-from .extensions import db, ma, jwt, socketio
-from .routes.auth_routes import auth_bp
-from .routes.task_routes import tasks_bp
-from .routes.plan_routes import plans_bp
-from .routes.group_routes import study_groups_bp
-from .routes.invite_and_groupplan_routes import invites_bp, group_plans_bp
-from .routes.notification_routes import notifications_bp
-from .routes.public_routes import public_bp
+from importlib import import_module
+from .config import Config, resolve_database
+from .extensions import db, jwt, socketio
+from .db_pool import build_engine_options, instrument_engine
+from .db_routing import init_routing
+from .instrumentation import init_instrumentation
+from .slow_queries import init_slow_query_log
+from .rate_limit import init_rate_limit
+from .collab import init_collab
+from .outbound import client_manager, init_outbound
+from .jobs import init_jobs
+from .group_schedules import init_group_schedules
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
-from flask_migrate import Migrate
 
-def create_app():
+# (module under app.routes, blueprint names); imported by create_app, not by this module
+BLUEPRINTS = (
+    ('auth_routes', ('auth_bp',)),
+    ('task_routes', ('tasks_bp',)),
+    ('plan_routes', ('plans_bp',)),
+    ('group_routes', ('study_groups_bp',)),
+    ('invite_and_groupplan_routes', ('invites_bp', 'group_plans_bp')),
+    ('notification_routes', ('notifications_bp',)),
+    ('public_routes', ('public_bp',)),
+    ('user_routes', ('users_bp',)),
+    ('search_routes', ('search_bp',)),
+    ('metrics_routes', ('metrics_bp',)),
+    ('bootstrap_routes', ('bootstrap_bp',)),
+    ('sync_routes', ('sync_bp',)),
+    ('purge_routes', ('purge_jobs_bp',)),
+    ('job_routes', ('jobs_bp',)),
+    ('agenda_routes', ('agenda_bp',)),
+)
+# Registered only when their config key is set (they answer 404 otherwise)
+OPTIONAL_BLUEPRINTS = (
+    ('ADMIN_TOKEN', 'admin_routes', ('admin_bp',)),
+)
+
+
+def _register_blueprints(app):
+    optional = [(module, names) for key, module, names in OPTIONAL_BLUEPRINTS if app.config.get(key)]
+    for module, names in BLUEPRINTS + tuple(optional):
+        routes = import_module(f'.routes.{module}', __package__)
+        for name in names:
+            app.register_blueprint(getattr(routes, name))
+
+
+def create_app(config_overrides=None, config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
+    # Overrides (benchmarks, tests) are applied before any extension reads config
+    if config_overrides:
+        app.config.update(config_overrides)
+    resolve_database(app.config)
+    # Behind a reverse proxy the socket peer is the proxy; take the client from
+    # the headers set by the trusted hops (rate limiting keys on it)
+    hops = int(app.config.get('TRUSTED_PROXY_HOPS', 0))
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     # Enable CORS globally; configure allowed origins via FRONTEND_ORIGIN env (comma-separated), default to localhost
     _origins = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
     origins_list = [o.strip() for o in _origins.split(',') if o.strip()]
@@ -35,28 +83,52 @@ def create_app():
         expose_headers=["Authorization"],
     )
 
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS entries win over the DB_POOL_* defaults
+    engine_options = build_engine_options(app.config)
+    engine_options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
     db.init_app(app)
-    ma.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(app, engine)
+    init_routing(app)
+    init_instrumentation(app)
+    init_slow_query_log(app)
+    init_rate_limit(app)
     jwt.init_app(app)
-    Migrate(app, db)
+    # Register the JWT user loader (cached current_user for protected routes);
+    # the process-wide user caches start empty for each app
+    from .user_cache import user_cache
+    user_cache.clear()
+    from .user_search import init_user_search
+    init_user_search(app)
+    # Cached membership/ownership lookups for socket room checks
+    from . import membership_cache  # noqa: F401
+    # Per-user "next task" index, kept current by task writes
+    from . import recommend  # noqa: F401
 
     # Initialize Socket.IO (real-time updates, presence, notifications)
-    socketio.init_app(app)
+    # The client manager publishes through SOCKETIO_MESSAGE_QUEUE (if set) and
+    # delivers through per-connection queues (app/outbound.py)
+    socketio.init_app(app, client_manager=client_manager(app.config.get('SOCKETIO_MESSAGE_QUEUE')))
     # Import socket handlers to register events
     from . import sockets  # noqa: F401
+    init_outbound(app)
+    init_collab(app)
+    init_jobs(app)
+    init_group_schedules(app)
 
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(tasks_bp)
-    app.register_blueprint(plans_bp)
-    app.register_blueprint(study_groups_bp)
-    app.register_blueprint(invites_bp)
-    app.register_blueprint(group_plans_bp)
-    app.register_blueprint(notifications_bp)
-    app.register_blueprint(public_bp)
-
+    _register_blueprints(app)
 
     @app.route('/api/health')
     def health():
         return jsonify({'status':'ok'})
 
+    if app.config.get('CREATE_SCHEMA_ON_START'):
+        from .search import create_schema
+        with app.app_context():
+            db.create_all()
+            with db.engine.begin() as conn:
+                create_schema(conn)
+
     return app
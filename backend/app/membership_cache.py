@@ -0,0 +1,106 @@
+# -------------------------------------------------------------
+# Why: Socket room authorization needs "is this user in group X / does
+# this user own plan Y" on every join. Answering that from a bounded cache
+# keeps join storms (reconnects, page loads) off the database.
+#
+# Why this design?
+#   - Three small LRUs with a TTL (same UserLRU as user_cache): user ->
+#     group ids, study plan -> (owner, is_public), group plan -> group id.
+#   - Entries for memberships, plans or group plans that a transaction
+#     changed or deleted are evicted when it commits (collected at flush,
+#     as in user_cache), so revocations apply on the next join in this
+#     process and a concurrent join can't re-cache the old rows. The TTL
+#     (MEMBERSHIP_CACHE_TTL_SECONDS) bounds staleness for changes made by
+#     other workers or bulk SQL.
+#   - Misses for unknown plans are cached too, so probing random ids is as
+#     cheap as a hit.
+# -------------------------------------------------------------
+import os
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import GroupMembership, GroupPlan, StudyPlan
+from .user_cache import UserLRU
+
+_MISSING = ("missing",)
+
+_size = int(os.getenv("MEMBERSHIP_CACHE_SIZE", 4096))
+_ttl = int(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", 300))
+_groups_by_user = UserLRU(maxsize=_size, ttl=_ttl)
+_plans = UserLRU(maxsize=_size, ttl=_ttl)
+_group_plans = UserLRU(maxsize=_size, ttl=_ttl)
+
+
+def group_ids(user_id):
+    """Frozen set of group ids the user belongs to."""
+    groups = _groups_by_user.get(user_id)
+    if groups is None:
+        rows = db.session.query(GroupMembership.group_id).filter_by(user_id=user_id).all()
+        groups = frozenset(gid for (gid,) in rows)
+        _groups_by_user.put(user_id, groups)
+    return groups
+
+
+def is_member(user_id, group_id):
+    return group_id in group_ids(user_id)
+
+
+def plan_access(plan_id):
+    """(owner user id, is_public) for a study plan, or None if it doesn't exist."""
+    access = _plans.get(plan_id)
+    if access is None:
+        row = db.session.query(StudyPlan.user_id, StudyPlan.is_public).filter_by(id=plan_id).first()
+        access = (row[0], bool(row[1])) if row else _MISSING
+        _plans.put(plan_id, access)
+    return None if access is _MISSING else access
+
+
+def group_of_plan(plan_id):
+    """Group id of a group plan, or None if it doesn't exist."""
+    group_id = _group_plans.get(plan_id)
+    if group_id is None:
+        row = db.session.query(GroupPlan.group_id).filter_by(id=plan_id).first()
+        group_id = row[0] if row else _MISSING
+        _group_plans.put(plan_id, group_id)
+    return None if group_id is _MISSING else group_id
+
+
+def invalidate(users=(), plans=(), group_plans=()):
+    """Evict entries; bulk SQL, which skips the session hooks below, calls this itself."""
+    for user_id in users:
+        _groups_by_user.invalidate(int(user_id))
+    for plan_id in plans:
+        _plans.invalidate(plan_id)
+    for plan_id in group_plans:
+        _group_plans.invalidate(plan_id)
+
+
+def clear():
+    _groups_by_user.clear()
+    _plans.clear()
+    _group_plans.clear()
+
+
+@event.listens_for(Session, "after_flush", propagate=True)
+def _collect(session, _ctx):
+    evict = session.info.setdefault("membership_cache_evict", {"users": set(), "plans": set(),
+                                                               "group_plans": set()})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, GroupMembership):
+            # user_id may still be the JWT identity string it was assigned from
+            evict["users"].add(int(obj.user_id))
+        elif isinstance(obj, StudyPlan):
+            evict["plans"].add(obj.id)
+        elif isinstance(obj, GroupPlan) and obj not in session.dirty:
+            evict["group_plans"].add(obj.id)
+
+
+@event.listens_for(Session, "after_commit", propagate=True)
+@event.listens_for(Session, "after_rollback", propagate=True)
+def _evict(session):
+    # Also on rollback: an entry cached mid-transaction may hold rolled-back rows
+    evict = session.info.pop("membership_cache_evict", None)
+    if evict:
+        invalidate(**evict)
@@ -0,0 +1,136 @@
+# -------------------------------------------------------------
+# Why: A tiny in-process metrics registry rendered in the Prometheus text
+# format at /api/metrics, without pulling in prometheus_client.
+#
+# Why this design?
+#   - Counters, gauges and histograms cover everything the app exports
+#     (pool waits, request timings, socket queues).
+#   - Collectors are callables evaluated at scrape time, for values that are
+#     cheaper to read than to track (e.g. current pool checkouts).
+#   - Values are per process; under gunicorn each worker is scraped or
+#     aggregated separately, as with the stock client's default mode.
+# -------------------------------------------------------------
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_metrics = {}
+_collectors = []
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _fmt_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, doc):
+        self.name, self.doc = name, doc
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        for key, value in list(self._values.items()):
+            yield self.name + _fmt_labels(key), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with _lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, doc, buckets=DEFAULT_BUCKETS):
+        self.name, self.doc = name, doc
+        self.buckets = tuple(buckets)
+        self._values = {}  # label key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self):
+        for key, row in list(self._values.items()):
+            running = 0
+            for bound, count in zip(self.buckets, row):
+                running += count
+                yield self.name + "_bucket" + _fmt_labels(key, [("le", bound)]), running
+            yield self.name + "_bucket" + _fmt_labels(key, [("le", "+Inf")]), row[-1]
+            yield self.name + "_sum" + _fmt_labels(key), row[-2]
+            yield self.name + "_count" + _fmt_labels(key), row[-1]
+
+
+def _register(metric):
+    with _lock:
+        existing = _metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        _metrics[metric.name] = metric
+        return metric
+
+
+def counter(name, doc):
+    return _register(Counter(name, doc))
+
+
+def gauge(name, doc):
+    return _register(Gauge(name, doc))
+
+
+def histogram(name, doc, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, doc, buckets))
+
+
+def register_collector(fn):
+    """Register fn() -> iterable of (name, kind, doc, [(labels_dict, value), ...]) evaluated per scrape."""
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    """Prometheus text exposition (format 0.0.4)."""
+    lines = []
+    for metric in list(_metrics.values()):
+        lines.append(f"# HELP {metric.name} {metric.doc}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(f"{sample} {value}" for sample, value in metric.samples())
+    for collect in _collectors:
+        for name, kind, doc, values in collect():
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{_fmt_labels(_label_key(labels))} {value}" for labels, value in values)
+    return "\n".join(lines) + "\n"
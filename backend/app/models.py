@@ -8,11 +8,16 @@
 #     efficient queries and extensibility (e.g., group invites, plan sharing).
 #   - SQLAlchemy ORM is used to avoid raw SQL and enable migrations.
 #   - Each model is normalized to reduce data duplication and support future features.
+#   - Child rows are removed by ON DELETE CASCADE foreign keys; relationships
+#     use passive_deletes=True so deleting a parent never loads its children
+#     (bulk deletions go through app/purge.py in chunks).
 # -------------------------------------------------------------
 
 
 from .extensions import db
+from .text import normalize_text
 from datetime import datetime
+from sqlalchemy.orm import validates
 
 
 class GroupPlanTask(db.Model):
@@ -25,8 +30,14 @@ class GroupPlanTask(db.Model):
     due = db.Column(db.Date, nullable=True)
     priority = db.Column(db.Integer, default=3)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Sort key within the plan; collaborative inserts/moves use midpoints (app/collab.py)
+    position = db.Column(db.Float, nullable=True)
 
-    plan = db.relationship("GroupPlan", backref=db.backref("tasks", cascade="all, delete-orphan"))
+    plan = db.relationship("GroupPlan", backref=db.backref("tasks", cascade="all, delete-orphan", passive_deletes=True))
+
+    __table_args__ = (db.Index("ix_group_plan_tasks_plan_position", "plan_id", "position"),
+                      db.Index("ix_group_plan_tasks_plan_due", "plan_id", "due"))
 
 
 
@@ -34,13 +45,21 @@ class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
     fullname = db.Column(db.String(120), nullable=False)
+    # Normalized copy of fullname for indexed prefix/trigram user search
+    search_name = db.Column(db.String(120), nullable=True, index=True)
     email = db.Column(db.String(200), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    tasks = db.relationship("Task", back_populates="user", cascade="all, delete-orphan")
-    plans = db.relationship("StudyPlan", back_populates="user", cascade="all, delete-orphan")
-    memberships = db.relationship("GroupMembership", back_populates="user", cascade="all, delete-orphan")
+    tasks = db.relationship("Task", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    plans = db.relationship("StudyPlan", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    memberships = db.relationship("GroupMembership", back_populates="user", cascade="all, delete-orphan",
+                                  passive_deletes=True)
+
+    @validates("fullname")
+    def _sync_search_name(self, _key, value):
+        self.search_name = normalize_text(value)
+        return value
 
 # --- Collaborative Study Groups ---
 # Why: These models enable users to form groups, collaborate, and share study plans, making the app more engaging and useful.
@@ -50,16 +69,18 @@ class StudyGroup(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text, default="")
-    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Informational; ownership is the 'owner' membership. Kept (NULL) if that account is deleted
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    memberships = db.relationship("GroupMembership", back_populates="group", cascade="all, delete-orphan")
+    memberships = db.relationship("GroupMembership", back_populates="group", cascade="all, delete-orphan",
+                                  passive_deletes=True)
 
 class GroupMembership(db.Model):
     __tablename__ = "group_memberships"
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    group_id = db.Column(db.Integer, db.ForeignKey("study_groups.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("study_groups.id", ondelete="CASCADE"), nullable=False)
     role = db.Column(db.String(20), default="member")  # 'member', 'admin', 'owner'
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -69,7 +90,7 @@ class GroupMembership(db.Model):
 class Task(db.Model):
     __tablename__ = "tasks"
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, default="")
     estimate_minutes = db.Column(db.Integer, default=30)
@@ -77,26 +98,38 @@ class Task(db.Model):
     priority = db.Column(db.Integer, default=3)
     completed = db.Column(db.Boolean, default=False)
     # Optional advanced fields
-    depends_on_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=True)
+    depends_on_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete="SET NULL"), nullable=True)
     recurrence = db.Column(db.String(20), nullable=True)  # e.g., 'daily','weekly','monthly'
     reminder_minutes_before = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = db.relationship("User", back_populates="tasks")
     depends_on = db.relationship('Task', remote_side=[id], uselist=False)
 
+    __table_args__ = (db.Index("ix_tasks_user_due", "user_id", "due_date"),)
+
 class StudyPlan(db.Model):
     __tablename__ = "study_plans"
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = db.Column(db.String(200), default="Auto-generated Plan")
     content = db.Column(db.JSON, nullable=False)
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # Public sharing
     is_public = db.Column(db.Boolean, default=False)
     public_id = db.Column(db.String(36), unique=True, nullable=True)
+    # Bumped on every content/title change; PATCH requires the client's copy to match
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Set on a member's share of a group plan (app/group_schedules.py); regenerating replaces it
+    group_plan_id = db.Column(db.Integer, db.ForeignKey("group_plans.id", ondelete="SET NULL"), nullable=True,
+                              index=True)
 
     user = db.relationship("User", back_populates="plans")
+    # UPDATEs check the version they loaded; app.plan_versions bumps it explicitly
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+    __table_args__ = (db.Index("ix_study_plans_user_generated", "user_id", "generated_at"),)
 
 # --- In-App Group Invites and Group Plan Sharing ---
 # Why: These models enable users to invite others to groups (in-app, not email) and to collaborate on shared group study plans.
@@ -104,38 +137,49 @@ class StudyPlan(db.Model):
 class GroupInvite(db.Model):
     __tablename__ = "group_invites"
     id = db.Column(db.Integer, primary_key=True)
-    inviter_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    invitee_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    group_id = db.Column(db.Integer, db.ForeignKey("study_groups.id"), nullable=False)
+    inviter_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    invitee_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("study_groups.id", ondelete="CASCADE"), nullable=False)
     status = db.Column(db.String(20), default="pending")  # 'pending', 'accepted', 'declined'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    inviter = db.relationship("User", foreign_keys=[inviter_id], backref="sent_invites")
-    invitee = db.relationship("User", foreign_keys=[invitee_id], backref="received_invites")
-    group = db.relationship("StudyGroup", backref="invites")
+    # passive_deletes="all": the database deletes these rows; never null their keys
+    inviter = db.relationship("User", foreign_keys=[inviter_id],
+                              backref=db.backref("sent_invites", passive_deletes="all"))
+    invitee = db.relationship("User", foreign_keys=[invitee_id],
+                              backref=db.backref("received_invites", passive_deletes="all"))
+    group = db.relationship("StudyGroup", backref=db.backref("invites", passive_deletes="all"))
 
 class GroupPlan(db.Model):
     __tablename__ = "group_plans"
     id = db.Column(db.Integer, primary_key=True)
-    group_id = db.Column(db.Integer, db.ForeignKey("study_groups.id"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("study_groups.id", ondelete="CASCADE"), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.JSON, nullable=False)
     description = db.Column(db.Text, default="")
     due = db.Column(db.Date, nullable=True)  # Top-level due date for the plan
-    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # The plan belongs to the group; it outlives its creator's account (NULL)
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Last persisted sequence number of the live task-list editor (app/collab.py)
+    tasks_seq = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
-    group = db.relationship("StudyGroup", backref="plans")
-    creator = db.relationship("User", backref="created_group_plans")
+    group = db.relationship("StudyGroup", backref=db.backref("plans", passive_deletes="all"))
+    creator = db.relationship("User", backref=db.backref("created_group_plans", passive_deletes=True))
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+    __table_args__ = (db.Index("ix_group_plans_group", "group_id"),)
 
 class GroupPlanParticipant(db.Model):
     __tablename__ = "group_plan_participants"
     id = db.Column(db.Integer, primary_key=True)
     plan_id = db.Column(db.Integer, db.ForeignKey("group_plans.id", ondelete="CASCADE"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    plan = db.relationship("GroupPlan", backref=db.backref("participants", cascade="all, delete-orphan"))
+    plan = db.relationship("GroupPlan", backref=db.backref("participants", cascade="all, delete-orphan",
+                                                           passive_deletes=True))
     user = db.relationship("User")
 
 
@@ -145,11 +189,107 @@ class GroupPlanParticipant(db.Model):
 class Notification(db.Model):
     __tablename__ = "notifications"
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     message = db.Column(db.String(255), nullable=False)
     type = db.Column(db.String(50), default="info")  # e.g., 'invite', 'plan', 'info'
     read = db.Column(db.Boolean, default=False)
     invite_id = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = db.relationship("User", backref=db.backref("notifications", passive_deletes="all"))
+
+
+# --- Plan edit log ---
+# Why: Each versioned change to a StudyPlan / GroupPlan is stored as the JSON Patch
+# ops that produced it, so clients that missed socket broadcasts can catch up by version.
+
+class PlanOp(db.Model):
+    __tablename__ = "plan_ops"
+    id = db.Column(db.Integer, primary_key=True)
+    plan_kind = db.Column(db.String(20), nullable=False)  # 'plan' or 'group_plan'
+    plan_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False)  # plan version after these ops
+    ops = db.Column(db.JSON, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("plan_kind", "plan_id", "version", name="uq_plan_ops_version"),
+    )
+
+
+# --- Sync change log ---
+# Why: One row per insert/update/delete of a synced row (tasks, plans, group plans,
+# group plan tasks, notifications), so clients can fetch only what changed since
+# their last sync token (the id). Written by app/sync.py from after_flush.
+
+class ChangeLog(db.Model):
+    __tablename__ = "change_log"
+    id = db.Column(db.Integer, primary_key=True)  # monotonic sync sequence
+    # 'task', 'plan', 'group_plan', 'group_task', 'notification', or 'group' when a
+    # member joined or left (row_id is the group, user_id the member)
+    kind = db.Column(db.String(20), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    # Audience: the owning user for personal rows, the group for group rows
+    user_id = db.Column(db.Integer, nullable=True)
+    group_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_change_log_user_seq", "user_id", "id"),
+        db.Index("ix_change_log_group_seq", "group_id", "id"),
+        {"sqlite_autoincrement": True},  # never reuse ids: tokens must only grow
+    )
+
+
+# --- Purge jobs ---
+# Why: Deleting a group or an account can touch many rows, so it runs as a
+# background job (app/purge.py) whose progress and state survive a crash.
+
+class PurgeJob(db.Model):
+    __tablename__ = "purge_jobs"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'group_plan', 'group' or 'user'
+    target_id = db.Column(db.Integer, nullable=False)
+    # No foreign key: the requester may be the account being purged
+    requested_by = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # 'pending', 'running', 'done', 'failed'
+    step = db.Column(db.String(40), nullable=True)  # table currently being cleared
+    deleted_rows = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped after every chunk; a 'running' job that stops heartbeating was interrupted
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_purge_jobs_status", "status"),)
+
+
+# --- Background job queue ---
+# Why: Expensive work (large plan generation, task imports, group schedules) is
+# queued here and executed by app/jobs.py workers instead of inside the request.
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)  # handler name, e.g. 'generate_plan'
+    payload = db.Column(db.JSON, nullable=False)
+    # Requester (may read the status); no foreign key, like purge_jobs.requested_by
+    user_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # 'queued', 'running', 'done', 'failed'
+    priority = db.Column(db.Integer, nullable=False, default=5)  # lower runs first
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # not before (retry backoff)
+    # Visibility timeout: a running job not finished by then is handed to another worker
+    locked_until = db.Column(db.DateTime, nullable=True)
+    locked_by = db.Column(db.String(64), nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
 
-    user = db.relationship("User", backref="notifications")
\ No newline at end of file
+    __table_args__ = (db.Index("ix_jobs_dequeue", "status", "priority", "id"),)
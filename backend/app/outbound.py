@@ -0,0 +1,240 @@
+# -------------------------------------------------------------
+# Why: Server-to-client Socket.IO messages used to be handed straight to
+# the transport for every member of a room. A slow client (e.g. mobile on
+# long-polling) never drains its engine.io packet queue, so the worker
+# buffered an unbounded backlog for it.
+#
+# Why this design?
+#   - Events are published with the regular socketio.emit, so with
+#     SOCKETIO_MESSAGE_QUEUE they reach every worker. The queueing happens
+#     where they are delivered: client_manager() builds the Socket.IO client
+#     manager (plain or message-queue backed) with local delivery replaced
+#     by a bounded queue per connection (sid), on whichever worker holds
+#     the connection.
+#   - Messages move on to the transport only while its packet queue is
+#     below SOCKET_TRANSPORT_HIGH_WATER; the rest wait here, where they can
+#     still be coalesced. A background task drains the backlog.
+#   - Superseded messages are coalesced: only the latest `presence`,
+#     `plan_updated` and `group_plan_updated` per room stays queued. Plan
+#     updates carry a version, so a client that skipped some catches up
+#     via /ops?since= (app/plan_versions.py).
+#   - Past SOCKET_QUEUE_MAX messages the policy applies: "drop" discards
+#     the oldest message and later sends a `resync` event ({"dropped": n})
+#     so the client refetches; "disconnect" closes the connection (the
+#     client reconnects and refetches).
+#   - Queue depth, coalesced/dropped counts and disconnects are exported
+#     through app.metrics. Queues are per process: each worker queues only
+#     for the connections it holds.
+# -------------------------------------------------------------
+import itertools
+import threading
+from collections import OrderedDict
+
+import socketio as socketio_server
+
+from . import metrics
+from .extensions import socketio
+
+NAMESPACE = "/"
+COALESCED_EVENTS = ("presence", "plan_updated", "group_plan_updated")
+POLICIES = ("drop", "disconnect")
+
+SENT = metrics.counter("socket_outbound_messages_total", "Socket.IO messages handed to the transport")
+COALESCED = metrics.counter("socket_outbound_coalesced_total", "Queued messages replaced by a newer one for the same room")
+DROPPED = metrics.counter("socket_outbound_dropped_total", "Messages dropped because a connection's queue was full")
+DISCONNECTS = metrics.counter("socket_outbound_disconnects_total", "Connections closed because their queue was full")
+
+_queues = {}
+_queues_lock = threading.Lock()
+_ids = itertools.count()
+_loop_started = False
+_settings = {"max": 200, "policy": "drop", "high_water": 16, "drain_seconds": 0.05}
+
+
+class OutQueue:
+    """Pending messages of one connection, oldest first."""
+
+    def __init__(self, sid):
+        self.sid = sid
+        self.items = OrderedDict()  # key -> (event, payload)
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def put(self, event, payload, room):
+        """Queue a message; returns False if the connection must be closed."""
+        if event in COALESCED_EVENTS and room is not None:
+            key = (event, room)
+            if self.items.pop(key, None) is not None:
+                COALESCED.inc(event=event)
+        else:
+            key = next(_ids)
+        self.items[key] = (event, payload)
+        if len(self.items) <= _settings["max"]:
+            return True
+        if _settings["policy"] == "disconnect":
+            self.items.clear()
+            return False
+        _key, (old_event, _payload) = self.items.popitem(last=False)
+        self.dropped += 1
+        DROPPED.inc(event=old_event)
+        return True
+
+    def drain(self):
+        """Hand messages to the transport while it has room; returns how many are left."""
+        budget = _settings["high_water"] - _transport_depth(self.sid)
+        if budget > 0 and self.dropped:
+            _send(self.sid, "resync", {"dropped": self.dropped})
+            self.dropped = 0
+            budget -= 1
+        while budget > 0 and self.items:
+            _key, (event, payload) = self.items.popitem(last=False)
+            _send(self.sid, event, payload)
+            SENT.inc(event=event)
+            budget -= 1
+        return len(self.items)
+
+
+def _transport_depth(sid):
+    """Packets waiting in the engine.io queue of a connection (0 if unknown)."""
+    server = socketio.server
+    try:
+        sock = server.eio.sockets.get(server.manager.eio_sid_from_sid(sid, NAMESPACE))
+        return sock.queue.qsize() if sock is not None else 0
+    except Exception:
+        return 0
+
+
+def _send(sid, event, payload):
+    # Straight to a local connection's transport, past the queues and the message queue
+    socketio_server.Manager.emit(socketio.server.manager, event, payload, NAMESPACE, room=sid)
+
+
+def _close(sid):
+    DISCONNECTS.inc()
+    forget(sid)
+    try:
+        socketio.server.disconnect(sid, namespace=NAMESPACE)
+    except Exception:
+        pass
+
+
+def _enqueue(sid, event, payload, room):
+    with _queues_lock:
+        queue = _queues.get(sid)
+        if queue is None:
+            queue = _queues[sid] = OutQueue(sid)
+    with queue.lock:
+        if not queue.put(event, payload, room):
+            backlog = None
+        else:
+            backlog = queue.drain()
+    if backlog is None:
+        _close(sid)
+    elif backlog:
+        _ensure_drainer()
+
+
+def emit(event, payload, room):
+    """Send `event` to `room` (a room name or a sid) on every worker, through the connections' queues."""
+    socketio.emit(event, payload, to=room, namespace=NAMESPACE)
+
+
+def _deliver(manager, event, data, namespace, room, skip_sid):
+    skip = skip_sid if isinstance(skip_sid, list) else [skip_sid]
+    for sid, _eio_sid in list(manager.get_participants(namespace or NAMESPACE, room)):
+        if sid not in skip:
+            _enqueue(sid, event, data, room if room != sid else None)
+
+
+class _QueuedManager(socketio_server.Manager):
+    """Single process: every emit is delivered through the connection queues."""
+
+    def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        room = to or room
+        if callback is not None or namespace not in self.rooms:
+            return super().emit(event, data, namespace, room=room, skip_sid=skip_sid, callback=callback)
+        _deliver(self, event, data, namespace, room, skip_sid)
+
+
+class _QueuedPubSub:
+    """Mixin for PubSubManager backends: messages from the queue (this worker's
+    included) are delivered through the connection queues."""
+
+    def _handle_emit(self, message):
+        if message.get("callback") is not None or message.get("binary"):
+            return super()._handle_emit(message)
+        data = message["data"]
+        if isinstance(data, list):
+            data = data[0] if len(data) == 1 else tuple(data)
+        _deliver(self, message["event"], data, message.get("namespace"), message.get("room"),
+                 message.get("skip_sid"))
+
+
+def client_manager(url=None, channel="flask-socketio"):
+    """Socket.IO client manager for SOCKETIO_MESSAGE_QUEUE (None: single process), queueing per connection."""
+    if not url:
+        return _QueuedManager()
+    if url.startswith(("redis://", "rediss://")):
+        base = socketio_server.RedisManager
+    elif url.startswith("kafka://"):
+        base = socketio_server.KafkaManager
+    elif url.startswith("zmq"):
+        base = socketio_server.ZmqManager
+    else:
+        base = socketio_server.KombuManager
+    return type(f"Queued{base.__name__}", (_QueuedPubSub, base), {})(url, channel=channel)
+
+
+def forget(sid):
+    """Drop a connection's queue (it disconnected)."""
+    with _queues_lock:
+        _queues.pop(sid, None)
+
+
+def _drain_loop():
+    while True:
+        socketio.sleep(_settings["drain_seconds"])
+        with _queues_lock:
+            queues = [q for q in _queues.values() if q.items or q.dropped]
+        for queue in queues:
+            with queue.lock:
+                queue.drain()
+
+
+def _ensure_drainer():
+    global _loop_started
+    with _queues_lock:
+        if _loop_started:
+            return
+        _loop_started = True
+    socketio.start_background_task(_drain_loop)
+
+
+def stats():
+    """Queue depth summary: {"connections", "backlogged", "depth", "max_depth"}."""
+    with _queues_lock:
+        depths = [len(q.items) for q in _queues.values()]
+    return {
+        "connections": len(depths),
+        "backlogged": sum(1 for d in depths if d),
+        "depth": sum(depths),
+        "max_depth": max(depths, default=0),
+    }
+
+
+@metrics.register_collector
+def _queue_gauges():
+    s = stats()
+    yield "socket_outbound_queue_depth", "gauge", "Messages waiting in per-connection queues", [({}, s["depth"])]
+    yield "socket_outbound_queue_max_depth", "gauge", "Deepest per-connection queue", [({}, s["max_depth"])]
+    yield "socket_outbound_backlogged_connections", "gauge", "Connections with queued messages", [({}, s["backlogged"])]
+
+
+def init_outbound(app):
+    policy = app.config.get("SOCKET_QUEUE_POLICY", "drop")
+    if policy not in POLICIES:
+        raise ValueError(f"SOCKET_QUEUE_POLICY must be one of {', '.join(POLICIES)}")
+    _settings["policy"] = policy
+    _settings["max"] = int(app.config.get("SOCKET_QUEUE_MAX", 200))
+    _settings["high_water"] = int(app.config.get("SOCKET_TRANSPORT_HIGH_WATER", 16))
+    _settings["drain_seconds"] = float(app.config.get("SOCKET_DRAIN_SECONDS", 0.05))
@@ -0,0 +1,149 @@
+# -------------------------------------------------------------
+# Why: Versioned, op-based edits for StudyPlan and GroupPlan. A client
+# sends the JSON Patch ops for its edit plus the version it edited; the
+# server applies them, bumps the version, logs the ops and broadcasts only
+# the ops. Viewers that fell behind fetch what they missed by version.
+#
+# Why this design?
+#   - Optimistic concurrency via SQLAlchemy's version_id_col (manual bumps):
+#     the UPDATE carries `WHERE version = <expected>`, so two concurrent
+#     writers can't both win. The loser gets 409 with the current version.
+#   - The patched document is the plan's editable fields ({"title",
+#     "content", ...}); ops address e.g. "/content/Day 1/0".
+#   - Every version change goes through record_change (PATCH, PUT,
+#     regenerate), so the op log (plan_ops) has no gaps. It keeps the last
+#     PLAN_OPS_RETAIN versions per plan; older catch-ups get 410 and refetch.
+# -------------------------------------------------------------
+from datetime import date, datetime
+
+from flask import current_app, request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from .extensions import db
+from .json_patch import PatchError, apply_patch, escape_token
+from .models import GroupPlan, PlanOp, StudyPlan
+
+MODELS = {"plan": StudyPlan, "group_plan": GroupPlan}
+EDITABLE = {
+    "plan": ("title", "content"),
+    "group_plan": ("title", "description", "due", "content"),
+}
+_PRUNE_EVERY = 20
+
+
+class VersionConflict(Exception):
+    def __init__(self, current):
+        super().__init__(f"plan is at version {current}")
+        self.current = current
+
+
+def document(plan, kind):
+    """The editable fields of a plan, as the JSON a patch is applied to."""
+    doc = {field: getattr(plan, field) for field in EDITABLE[kind]}
+    if isinstance(doc.get("due"), date):
+        doc["due"] = doc["due"].isoformat()
+    return doc
+
+
+def _validated(kind, doc):
+    if not isinstance(doc, dict) or set(doc) != set(EDITABLE[kind]):
+        raise PatchError(f"only {', '.join(EDITABLE[kind])} can be patched, not added or removed")
+    if not isinstance(doc["content"], dict):
+        raise PatchError("content must be an object")
+    if not isinstance(doc["title"], str) or (kind == "group_plan" and not doc["title"].strip()):
+        raise PatchError("title must be a non-empty string")
+    values = dict(doc)
+    if kind == "group_plan":
+        if values["description"] is not None and not isinstance(values["description"], str):
+            raise PatchError("description must be a string")
+        if values["due"]:
+            try:
+                values["due"] = datetime.strptime(values["due"], "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                raise PatchError("due must be YYYY-MM-DD or null")
+        else:
+            values["due"] = None
+    return values
+
+
+def replace_ops(old_doc, new_doc):
+    """Ops that turn old_doc into new_doc, one `replace` per changed field."""
+    return [{"op": "replace", "path": f"/{field}", "value": value}
+            for field, value in new_doc.items() if old_doc.get(field) != value]
+
+
+def content_ops(changes):
+    """Ops replacing whole days of a plan's content ({day: items})."""
+    return [{"op": "replace", "path": f"/content/{escape_token(day)}", "value": items}
+            for day, items in changes.items()]
+
+
+def parse_patch_request():
+    """(ops, base_version) from a PATCH body.
+
+    Accepts {"version": n, "ops": [...]} or a bare RFC 6902 array with the
+    version in an If-Match header.
+    """
+    body = request.get_json(silent=True)
+    if isinstance(body, list):
+        ops, version = body, request.headers.get("If-Match", "").strip('W/" ')
+    elif isinstance(body, dict):
+        ops, version = body.get("ops"), body.get("version", request.headers.get("If-Match", "").strip('W/" '))
+    else:
+        raise PatchError("expected a JSON Patch array or {\"version\", \"ops\"}")
+    try:
+        version = int(version)
+    except (TypeError, ValueError):
+        raise PatchError("the version being edited is required (body 'version' or If-Match)")
+    if not isinstance(ops, list) or not ops:
+        raise PatchError("ops must be a non-empty list")
+    return ops, version
+
+
+def record_change(plan, kind, ops, user_id, base_version=None):
+    """Apply ops to the plan, bump its version and log them; commits.
+
+    Raises PatchError for invalid ops and VersionConflict when the plan is
+    not at base_version (or another writer got there first).
+    """
+    if base_version is not None and base_version != plan.version:
+        raise VersionConflict(plan.version)
+    values = _validated(kind, apply_patch(document(plan, kind), ops))
+    expected = plan.version
+    for field, value in values.items():
+        if getattr(plan, field) != value:
+            setattr(plan, field, value)
+    plan.version = expected + 1
+    db.session.add(PlanOp(plan_kind=kind, plan_id=plan.id, version=plan.version, ops=ops, user_id=user_id))
+    retain = int(current_app.config.get("PLAN_OPS_RETAIN", 200))
+    if plan.version % _PRUNE_EVERY == 0:
+        PlanOp.query.filter(PlanOp.plan_kind == kind, PlanOp.plan_id == plan.id,
+                            PlanOp.version <= plan.version - retain).delete(synchronize_session=False)
+    try:
+        db.session.commit()
+    except (StaleDataError, IntegrityError):
+        db.session.rollback()
+        current = db.session.query(MODELS[kind].version).filter_by(id=plan.id).scalar()
+        raise VersionConflict(current)
+    return plan.version
+
+
+def ops_since(kind, plan_id, since, current):
+    """Logged ops after version `since`, oldest first; None if some are no longer kept."""
+    if since >= current:
+        return []
+    rows = (PlanOp.query.filter(PlanOp.plan_kind == kind, PlanOp.plan_id == plan_id, PlanOp.version > since)
+            .order_by(PlanOp.version).all())
+    if not rows or rows[0].version != since + 1:
+        return None
+    return [{"version": r.version, "ops": r.ops, "user_id": r.user_id,
+             "created_at": r.created_at.isoformat() if r.created_at else None} for r in rows]
+
+
+def delete_ops(kind, plan_id):
+    PlanOp.query.filter_by(plan_kind=kind, plan_id=plan_id).delete(synchronize_session=False)
+
+
+def broadcast_payload(plan, ops, type="patch"):
+    return {"type": type, "plan_id": plan.id, "version": plan.version, "ops": ops}
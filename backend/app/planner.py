@@ -0,0 +1,294 @@
+# -------------------------------------------------------------
+# Why: One implementation of "spread these tasks over N days", shared by
+# plan generation and regeneration, that can be imported, benchmarked and
+# property-checked without a Flask app or a database.
+#
+# Why this design?
+#   - Pure functions over plain dicts/lists: no models, no request state.
+#   - Plan content keeps its existing shape ({"Day 1": [{task, duration,
+#     notes}, ...], ...}), so stored plans and the frontend are unaffected.
+#     Rebalancing moves items whole: other keys (a group share's
+#     group_task_id, due, priority) go with them.
+#   - Generation deals tasks round-robin, keeping the caller's order.
+#   - Regeneration rebalances by minutes: LPT greedy (longest task to the
+#     least-loaded day, via a heap), optionally refined by a local search
+#     of moves/swaps off the busiest day. Pinned items stay put and blocked
+#     days take no new items. A plan that is already as balanced is left
+#     unchanged, so regenerating twice doesn't reshuffle anything.
+#   - Group plans are split across members by minutes: tasks in deadline
+#     order, longest first within a deadline, each to the least-loaded
+#     member (a heap), so loads stay balanced at every deadline. Each
+#     member's share is laid out earliest-deadline-first over the days,
+#     up to a daily budget.
+#   - Everything is deterministic: the same input always yields the same
+#     plan (see benchmarks/check_planner.py for the invariants).
+# -------------------------------------------------------------
+import heapq
+import math
+import re
+from bisect import bisect_left
+from datetime import date
+
+DEFAULT_DURATION = 30
+_DAY_NUMBER = re.compile(r"(\d+)$")
+
+
+def day_key(n):
+    return f"Day {n}"
+
+
+def normalize_item(task):
+    """Plan item from a task payload: a title string, a Task-like dict or a plan item."""
+    if isinstance(task, str):
+        return {"task": task, "duration": DEFAULT_DURATION, "notes": ""}
+    if isinstance(task, dict):
+        title = task.get("title") or task.get("task") or "Untitled"
+        duration = task.get("estimate_minutes", task.get("duration"))
+        return {
+            "task": title,
+            "duration": int(duration) if duration is not None else DEFAULT_DURATION,
+            "notes": task.get("description", task.get("notes")) or "",
+        }
+    return {"task": str(task), "duration": DEFAULT_DURATION, "notes": ""}
+
+
+def plan_item(item):
+    """normalize_item, keeping any other keys of a plan item (group_task_id, due, ...)."""
+    normalized = normalize_item(item)
+    if isinstance(item, dict) and "task" in item:
+        return {**item, **normalized}
+    return normalized
+
+
+def day_number(key):
+    """n for a "Day n" key, else None."""
+    match = _DAY_NUMBER.search(str(key))
+    return int(match.group(1)) if match else None
+
+
+def _day_order(key):
+    match = _DAY_NUMBER.search(str(key))
+    return (0, int(match.group(1)), "") if match else (1, 0, str(key))
+
+
+def plan_items(content):
+    """Flatten plan content back to its items, in day order ("Day 2" before "Day 10")."""
+    items = []
+    for key in sorted(content or {}, key=_day_order):
+        for item in content[key] or []:
+            items.append(normalize_item(item))
+    return items
+
+
+def distribute(items, days):
+    """Assign items to days round-robin, preserving their order within each day."""
+    n = max(1, int(days))
+    result = {day_key(i): [] for i in range(1, n + 1)}
+    buckets = list(result.values())
+    for idx, item in enumerate(items):
+        buckets[idx % n].append(item)
+    return result
+
+
+def build_plan(tasks, days):
+    """Plan content for a list of task payloads over `days` days."""
+    return distribute([normalize_item(t) for t in tasks], days)
+
+
+def _load(item):
+    return max(0, item["duration"])
+
+
+def balance(durations, days, fixed=None, blocked=(), local_search=False, max_rounds=1000):
+    """Day index (0-based) for each duration, minimizing the busiest day.
+
+    `fixed` maps item index -> day for pinned items; `blocked` days only
+    keep their pinned items. Raises ValueError if items have nowhere to go.
+    """
+    n = max(1, int(days))
+    fixed = fixed or {}
+    blocked = set(blocked)
+    open_days = [d for d in range(n) if d not in blocked]
+    movable = [i for i in range(len(durations)) if i not in fixed]
+    if movable and not open_days:
+        raise ValueError("every day is blocked")
+
+    assign = [0] * len(durations)
+    loads = [0] * n
+    for i, d in fixed.items():
+        assign[i] = d
+        loads[d] += durations[i]
+    heap = [(loads[d], d) for d in open_days]
+    heapq.heapify(heap)
+    # LPT: longest first, ties by original position
+    for i in sorted(movable, key=lambda i: (-durations[i], i)):
+        load, d = heapq.heappop(heap)
+        assign[i] = d
+        loads[d] = load + durations[i]
+        heapq.heappush(heap, (loads[d], d))
+
+    if local_search and len(open_days) > 1:
+        _improve(durations, assign, loads, open_days, movable, max_rounds)
+    return assign
+
+
+def _improve(durations, assign, loads, open_days, movable, max_rounds):
+    """Move or swap items off the busiest open day while that lowers it."""
+    members = {d: set() for d in open_days}
+    for i in movable:
+        members[assign[i]].add(i)
+
+    for _ in range(max_rounds):
+        hi = max(open_days, key=lambda d: (loads[d], -d))
+        best = None  # (resulting pair max, lo, item from hi, item from lo or -1)
+        for lo in sorted(open_days, key=lambda d: (loads[d], d)):
+            gap = loads[hi] - loads[lo]
+            if gap <= 1:
+                break
+            # Moving/swapping a net `delta` minutes leaves max(hi - delta, lo + delta)
+            for i in members[hi]:
+                if 0 < durations[i] < gap:
+                    cand = (max(loads[hi] - durations[i], loads[lo] + durations[i]), lo, i, -1)
+                    best = min(best, cand) if best else cand
+            lo_items = sorted(members[lo], key=lambda j: (durations[j], j))
+            lo_durations = [durations[j] for j in lo_items]
+            for i in members[hi]:
+                # want durations[j] closest to durations[i] - gap / 2, with 0 < delta < gap
+                k = bisect_left(lo_durations, durations[i] - gap / 2)
+                for j in lo_items[max(0, k - 1):k + 1]:
+                    delta = durations[i] - durations[j]
+                    if 0 < delta < gap:
+                        cand = (max(loads[hi] - delta, loads[lo] + delta), lo, i, j)
+                        best = min(best, cand) if best else cand
+        if best is None or best[0] >= loads[hi]:
+            return
+        _peak, lo, i, j = best
+        members[hi].discard(i); members[lo].add(i); assign[i] = lo
+        delta = durations[i]
+        if j >= 0:
+            members[lo].discard(j); members[hi].add(j); assign[j] = hi
+            delta -= durations[j]
+        loads[hi] -= delta
+        loads[lo] += delta
+
+
+def _resolve_day(keys, ref):
+    if isinstance(ref, int) and not isinstance(ref, bool):
+        if 1 <= ref <= len(keys):
+            return ref - 1
+    elif ref in keys:
+        return keys.index(ref)
+    raise ValueError(f"unknown day: {ref!r}")
+
+
+def rebalance_plan(content, pinned=(), blocked_days=(), local_search=False):
+    """Redistribute an existing plan's items over its days by duration.
+
+    `pinned` is a list of {"day": <key or number>, "index": <position>}
+    items that keep their day; `blocked_days` lists days (keys or numbers)
+    that only keep their pinned items. Returns new content with the same
+    day keys; the current layout is returned if it is already as balanced.
+    """
+    keys = sorted(content or {}, key=_day_order)
+    if not keys:
+        return {}
+    items, current, offsets = [], [], []
+    for d, key in enumerate(keys):
+        offsets.append(len(items))
+        for item in content[key] or []:
+            items.append(plan_item(item))
+            current.append(d)
+
+    fixed = {}
+    for ref in pinned or ():
+        if not isinstance(ref, dict):
+            raise ValueError("pinned items must look like {\"day\": ..., \"index\": ...}")
+        d = _resolve_day(keys, ref.get("day"))
+        index = ref.get("index")
+        size = len(content[keys[d]] or [])
+        if not isinstance(index, int) or not 0 <= index < size:
+            raise ValueError(f"no item {index!r} on {keys[d]}")
+        fixed[offsets[d] + index] = d
+    blocked = {_resolve_day(keys, ref) for ref in blocked_days or ()}
+
+    durations = [_load(item) for item in items]
+    assign = balance(durations, len(keys), fixed, blocked, local_search)
+
+    current_loads = [0] * len(keys)
+    for i, d in enumerate(current):
+        current_loads[d] += durations[i]
+    new_loads = [0] * len(keys)
+    for i, d in enumerate(assign):
+        new_loads[d] += durations[i]
+    current_ok = all(current[i] not in blocked or i in fixed for i in range(len(items)))
+    if current_ok and max(current_loads) <= max(new_loads):
+        assign = current
+
+    result = {key: [] for key in keys}
+    for i, d in enumerate(assign):
+        result[keys[d]].append(items[i])
+    return result
+
+
+def plan_diff(old, new):
+    """Days of `new` whose items differ from `old` (both compared normalized)."""
+    changes = {}
+    for key, items in new.items():
+        before = [plan_item(item) for item in (old or {}).get(key) or []]
+        if before != items:
+            changes[key] = items
+    return changes
+
+
+def _due_order(item):
+    # ISO dates sort as strings; undated items go last
+    due = item.get("due")
+    return (0, due) if due else (1, "")
+
+
+def assign_members(items, members):
+    """Index into `members` for each item, balancing minutes per deadline.
+
+    Items are {"duration", "due" (ISO date or None), "priority"} dicts.
+    After every deadline the busiest member has at most one task more
+    (in minutes) than the least busy one.
+    """
+    if not members:
+        raise ValueError("no members to assign to")
+    heap = [(0, m) for m in range(len(members))]
+    assign = [0] * len(items)
+    order = sorted(range(len(items)),
+                   key=lambda i: (_due_order(items[i]), -_load(items[i]), items[i].get("priority", 3), i))
+    for i in order:
+        load, m = heapq.heappop(heap)
+        assign[i] = m
+        heapq.heappush(heap, (load + _load(items[i]), m))
+    return assign
+
+
+def schedule_items(items, days, daily_minutes=None, start=None):
+    """Day-by-day content for one member's items.
+
+    Earliest deadline first (then priority), filling each day up to
+    `daily_minutes` (default: the total spread evenly); the last day takes
+    any overflow. With a `start` date (ISO), items scheduled after their
+    due date are marked "late".
+    """
+    n = max(1, int(days))
+    order = sorted(range(len(items)), key=lambda i: (_due_order(items[i]), items[i].get("priority", 3), i))
+    total = sum(_load(item) for item in items)
+    budget = max(1, int(daily_minutes) if daily_minutes else math.ceil(total / n))
+    start_day = date.fromisoformat(start) if start else None
+    result = {day_key(k): [] for k in range(1, n + 1)}
+    buckets = list(result.values())
+    d, load = 0, 0
+    for i in order:
+        item = items[i]
+        if load and load + _load(item) > budget and d < n - 1:
+            d, load = d + 1, 0
+        placed = dict(item)
+        if start_day and item.get("due") and (date.fromisoformat(item["due"]) - start_day).days < d:
+            placed["late"] = True
+        buckets[d].append(placed)
+        load += _load(item)
+    return result
@@ -0,0 +1,238 @@
+# -------------------------------------------------------------
+# Why: Deleting a big group plan, a group or an account used to load every
+# child row into the session and delete them one by one inside a single
+# request transaction, holding locks for as long as that took.
+#
+# Why this design?
+#   - Foreign keys cascade in the database (ON DELETE CASCADE with
+#     passive_deletes), so a small delete is one statement.
+#   - Large deletions remove children before parents (so no single
+#     statement cascades far) in chunks of PURGE_CHUNK_SIZE rows, one short
+#     transaction per chunk, yielding between chunks; the parent row goes
+#     last via the ORM, so the sync log and caches see it.
+#   - Large group plan, group and account deletions are PurgeJob rows:
+#     progress (step, rows deleted) commits with each chunk, and every step
+#     only deletes what is still there, so a job interrupted by a crash is
+#     simply run again. A job is claimed with a conditional UPDATE; a
+#     'running' job whose heartbeat is older than PURGE_STALE_SECONDS
+#     counts as interrupted.
+#   - Each PurgeJob is run by a 'purge' job on the job queue (app/jobs.py):
+#     purges run in worker processes, and one whose worker died is picked
+#     up again when its claim times out. `flask --app manage.py
+#     purge-resume` runs leftovers by hand.
+#   - Bulk SQL skips ORM events, so search documents and cached
+#     memberships for the removed rows are dropped explicitly, and members
+#     leaving a purged group are written to the sync log.
+# -------------------------------------------------------------
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, delete, or_, select, update
+
+from . import collab, jobs, membership_cache, recommend
+from .extensions import db, socketio
+from .models import (GroupInvite, GroupMembership, GroupPlan, GroupPlanParticipant, GroupPlanTask, Notification,
+                     PlanOp, PurgeJob, StudyGroup, StudyPlan, Task, User)
+from .plan_versions import delete_ops
+from .search import delete_scope
+from .sync import log_left_group
+
+DEFAULT_CHUNK = 1000
+ACTIVE = ("pending", "running")
+
+
+def _noop(_step, _count):
+    pass
+
+
+def _yield():
+    # Let other greenlets run between chunks (no Socket.IO server under manage.py)
+    if socketio.server is not None:
+        socketio.sleep(0)
+
+
+def delete_in_chunks(model, condition, chunk_size=DEFAULT_CHUNK, progress=_noop):
+    """Delete matching rows chunk_size at a time, committing after each chunk; returns the count."""
+    total = 0
+    while True:
+        ids = db.session.scalars(select(model.id).where(condition).limit(chunk_size)).all()
+        if not ids:
+            return total
+        db.session.execute(delete(model).where(model.id.in_(ids)), execution_options={"synchronize_session": False})
+        progress(model.__tablename__, len(ids))
+        db.session.commit()
+        total += len(ids)
+        _yield()
+
+
+def _null_in_chunks(column, value, chunk_size, progress):
+    """SET column = NULL where column == value, chunk by chunk (what ON DELETE SET NULL would do at once)."""
+    model = column.class_
+    while True:
+        ids = db.session.scalars(select(model.id).where(column == value).limit(chunk_size)).all()
+        if not ids:
+            return
+        db.session.execute(update(model).where(model.id.in_(ids)).values({column.key: None}),
+                           execution_options={"synchronize_session": False})
+        progress(model.__tablename__, 0)
+        db.session.commit()
+        _yield()
+
+
+def leave_group_plans(user_id, group_id):
+    """Drop a user's participation in one group's plans (single statement; caller commits)."""
+    db.session.execute(
+        delete(GroupPlanParticipant).where(
+            GroupPlanParticipant.user_id == user_id,
+            GroupPlanParticipant.plan_id.in_(select(GroupPlan.id).where(GroupPlan.group_id == group_id))),
+        execution_options={"synchronize_session": False})
+
+
+def _delete_row(model, row_id, progress):
+    row = db.session.get(model, row_id)
+    if row is None:
+        return 0
+    db.session.delete(row)
+    progress(model.__tablename__, 1)
+    db.session.commit()
+    return 1
+
+
+def purge_group_plan(plan_id, chunk_size=DEFAULT_CHUNK, progress=_noop):
+    """Delete a group plan with its tasks, participants and edit log; returns rows removed."""
+    collab.forget(plan_id)
+    delete_scope(db.session.connection(), plan_id=plan_id)
+    removed = delete_in_chunks(GroupPlanTask, GroupPlanTask.plan_id == plan_id, chunk_size, progress)
+    removed += delete_in_chunks(GroupPlanParticipant, GroupPlanParticipant.plan_id == plan_id, chunk_size, progress)
+    removed += delete_in_chunks(PlanOp, and_(PlanOp.plan_kind == "group_plan", PlanOp.plan_id == plan_id),
+                                chunk_size, progress)
+    return removed + _delete_row(GroupPlan, plan_id, progress)
+
+
+def purge_group(group_id, chunk_size=DEFAULT_CHUNK, progress=_noop):
+    """Delete a study group, its plans, invites and memberships; returns rows removed."""
+    removed = 0
+    for plan_id in db.session.scalars(select(GroupPlan.id).where(GroupPlan.group_id == group_id)).all():
+        removed += purge_group_plan(plan_id, chunk_size, progress)
+    delete_scope(db.session.connection(), group_id=group_id)
+    removed += delete_in_chunks(GroupInvite, GroupInvite.group_id == group_id, chunk_size, progress)
+    members = db.session.scalars(select(GroupMembership.user_id).where(GroupMembership.group_id == group_id)).all()
+    # Committed with the first membership chunk; a rerun logs the rest again (harmless)
+    log_left_group(group_id, members)
+    removed += delete_in_chunks(GroupMembership, GroupMembership.group_id == group_id, chunk_size, progress)
+    membership_cache.invalidate(users=members)
+    return removed + _delete_row(StudyGroup, group_id, progress)
+
+
+def purge_user(user_id, chunk_size=DEFAULT_CHUNK, progress=_noop):
+    """Delete an account and everything it owns; returns rows removed.
+
+    Groups the user owns are deleted too. Group plans they created and edits
+    they made in other groups stay with those groups, unattributed.
+    """
+    removed = 0
+    owned = db.session.scalars(select(GroupMembership.group_id).where(
+        GroupMembership.user_id == user_id, GroupMembership.role == "owner")).all()
+    for group_id in owned:
+        removed += purge_group(group_id, chunk_size, progress)
+    delete_scope(db.session.connection(), user_id=user_id)
+    plan_ids = db.session.scalars(select(StudyPlan.id).where(StudyPlan.user_id == user_id)).all()
+    for plan_id in plan_ids:
+        delete_ops("plan", plan_id)
+    membership_cache.invalidate(users=[user_id], plans=plan_ids)
+    for model, condition in (
+            (Task, Task.user_id == user_id),
+            (StudyPlan, StudyPlan.user_id == user_id),
+            (Notification, Notification.user_id == user_id),
+            (GroupPlanParticipant, GroupPlanParticipant.user_id == user_id),
+            (GroupMembership, GroupMembership.user_id == user_id),
+            (GroupInvite, or_(GroupInvite.invitee_id == user_id, GroupInvite.inviter_id == user_id))):
+        removed += delete_in_chunks(model, condition, chunk_size, progress)
+    recommend.invalidate(user_id)
+    for column in (PlanOp.user_id, GroupPlan.created_by, StudyGroup.created_by):
+        _null_in_chunks(column, user_id, chunk_size, progress)
+    return removed + _delete_row(User, user_id, progress)
+
+
+PURGES = {"group_plan": purge_group_plan, "group": purge_group, "user": purge_user}
+
+
+def start_job(kind, target_id, requested_by, queue=True):
+    """Create (or return the unfinished) purge job for a group plan, group or user (committed).
+
+    With `queue`, a worker runs it (queued in the same commit); otherwise the caller does.
+    """
+    job = PurgeJob.query.filter(PurgeJob.kind == kind, PurgeJob.target_id == target_id,
+                                PurgeJob.status.in_(ACTIVE)).first()
+    if job is None:
+        job = PurgeJob(kind=kind, target_id=target_id, requested_by=requested_by, status="pending")
+        db.session.add(job)
+        db.session.flush()
+        if queue:
+            jobs.enqueue("purge", {"purge_job_id": job.id}, user_id=requested_by, priority=jobs.PRIORITY_LOW)
+        else:
+            db.session.commit()
+    return job
+
+
+def _claim(job_id, stale_seconds):
+    """Mark a job running unless another worker is; returns whether we got it."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=stale_seconds)
+    claimed = db.session.execute(
+        update(PurgeJob).where(PurgeJob.id == job_id, or_(
+            PurgeJob.status.in_(("pending", "failed")),
+            and_(PurgeJob.status == "running", PurgeJob.heartbeat_at < stale)))
+        .values(status="running", heartbeat_at=now, error=None),
+        execution_options={"synchronize_session": False}).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def run_job(job_id, chunk_size=DEFAULT_CHUNK, stale_seconds=None):
+    """Run (or resume) a purge job to completion; returns it, or None if someone else holds it."""
+    if stale_seconds is None:
+        stale_seconds = current_app.config.get("PURGE_STALE_SECONDS", 300)
+    if not _claim(job_id, stale_seconds):
+        return None
+    job = db.session.get(PurgeJob, job_id)
+
+    def progress(step, count):
+        # Flushed and committed together with the chunk it describes
+        job.step = step
+        job.deleted_rows += count
+        job.heartbeat_at = datetime.utcnow()
+
+    try:
+        PURGES[job.kind](job.target_id, chunk_size, progress)
+    except Exception as exc:
+        db.session.rollback()
+        job.status, job.error = "failed", str(exc)[:1000]
+        db.session.commit()
+        raise
+    job.status, job.step, job.finished_at = "done", None, datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def resume_jobs(chunk_size=DEFAULT_CHUNK, stale_seconds=None):
+    """Run every pending, failed or interrupted job; returns the jobs this call finished."""
+    if stale_seconds is None:
+        stale_seconds = current_app.config.get("PURGE_STALE_SECONDS", 300)
+    stale = datetime.utcnow() - timedelta(seconds=stale_seconds)
+    job_ids = db.session.scalars(select(PurgeJob.id).where(or_(
+        PurgeJob.status.in_(("pending", "failed")),
+        and_(PurgeJob.status == "running", PurgeJob.heartbeat_at < stale))).order_by(PurgeJob.id)).all()
+    return [job for job in (run_job(job_id, chunk_size, stale_seconds) for job_id in job_ids) if job is not None]
+
+
+# Longer than PURGE_STALE_SECONDS (default 300): when the claim times out, a
+# purge that is still heartbeating keeps its PurgeJob and the rerun is a no-op
+@jobs.handler("purge", visibility=600)
+def _purge_job(job):
+    # Unlike other handlers this commits, chunk by chunk: every step can be rerun
+    purge_job_id = job.payload["purge_job_id"]
+    done = run_job(purge_job_id, int(current_app.config.get("PURGE_CHUNK_SIZE", DEFAULT_CHUNK)))
+    if done is None:
+        return {"purge_job_id": purge_job_id, "status": "running elsewhere"}
+    return {"purge_job_id": purge_job_id, "status": done.status, "deleted_rows": done.deleted_rows}
@@ -0,0 +1,175 @@
+# -------------------------------------------------------------
+# Why: Nothing limited request rates, so a client could tie up workers
+# with huge /plans/generate payloads, invite spam or login brute force.
+#
+# Why this design?
+#   - Token bucket per client: RATE_LIMIT_BURST tokens, refilled at
+#     RATE_LIMIT_PER_MINUTE. Each request takes its cost in tokens; when
+#     the bucket is short the request gets 429 with Retry-After. State is
+#     two numbers per key and one update per request (O(1)).
+#   - Clients are keyed by user id (from the access token) or by IP for
+#     anonymous requests; auth endpoints (login, register, refresh) are
+#     always keyed by IP so guessing passwords for many accounts is capped.
+#     The IP is the real client's behind TRUSTED_PROXY_HOPS proxies
+#     (ProxyFix in create_app), not the proxy's shared address.
+#   - Costs weight expensive endpoints (generate > list): RATE_LIMIT_COSTS
+#     maps "blueprint.endpoint" or "blueprint" to a cost (default 1), and
+#     large bodies add one token per RATE_LIMIT_BYTES_PER_TOKEN.
+#   - Buckets live in process memory (LRU-bounded) or, with
+#     RATE_LIMIT_STORAGE_URL=redis://..., in Redis via one Lua script so
+#     all workers share them. A Redis outage fails open (logged).
+#   - Responses carry RateLimit-Limit / -Remaining / -Reset (IETF draft
+#     headers); 429s are counted in app.metrics.
+# -------------------------------------------------------------
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+from flask_jwt_extended import decode_token
+
+from . import metrics
+
+LIMITED = metrics.counter("http_rate_limited_total", "Requests rejected with 429 by the rate limiter")
+
+DEFAULT_COSTS = {
+    "plans_bp.generate_plan": 10,
+    "plans_bp.regenerate_plan": 10,
+    "tasks_bp.import_tasks": 5,
+    "invites_bp.send_invite": 5,
+    "auth_bp.login": 5,
+    "auth_bp.register": 5,
+    "group_plans_bp.create_group_plan": 5,
+    "search_bp": 2,
+    "bootstrap_bp.bootstrap": 3,  # replaces ~6 separate calls; /batch items are charged individually
+}
+IP_KEYED = ("auth_bp.login", "auth_bp.register", "auth_bp.refresh")
+EXEMPT = ("metrics_bp.export_metrics", "health", "static")
+
+
+class MemoryBackend:
+    """Buckets in a process-local dict, evicting least recently used keys past max_keys."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, last refill (monotonic)]
+        self._lock = threading.Lock()
+
+    def take(self, key, cost, rate, burst):
+        """Try to take `cost` tokens; returns (allowed, tokens left)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            allowed = bucket[0] >= cost
+            if allowed:
+                bucket[0] -= cost
+            return allowed, bucket[0]
+
+
+_REDIS_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+if b[2] then tokens = math.min(burst, tokens + math.max(0, now - tonumber(b[2])) * rate) end
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBackend:
+    """Buckets shared by all workers in Redis (requires the `redis` package)."""
+
+    def __init__(self, url, prefix="ratelimit:"):
+        import redis
+        self.prefix = prefix
+        self._script = redis.Redis.from_url(url).register_script(_REDIS_SCRIPT)
+
+    def take(self, key, cost, rate, burst):
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[rate, burst, cost])
+        return bool(allowed), float(tokens)
+
+
+def _client_key(endpoint):
+    if endpoint not in IP_KEYED:
+        header = request.headers.get("Authorization", "")
+        if header.startswith("Bearer "):
+            try:
+                return f"user:{decode_token(header[7:])['sub']}"
+            except Exception:
+                pass  # invalid/expired: the route itself will reject it
+    return f"ip:{request.remote_addr}"
+
+
+def request_cost(endpoint, blueprint, costs, bytes_per_token):
+    cost = costs.get(endpoint, costs.get(blueprint, 1))
+    if bytes_per_token and request.content_length:
+        cost += request.content_length // bytes_per_token
+    return cost
+
+
+def _headers(response, burst, remaining, rate):
+    response.headers["RateLimit-Limit"] = str(burst)
+    response.headers["RateLimit-Remaining"] = str(max(int(remaining), 0))
+    response.headers["RateLimit-Reset"] = str(math.ceil((burst - remaining) / rate))
+    return response
+
+
+def init_rate_limit(app):
+    """Install the limiter as a before/after_request pair unless RATE_LIMIT_ENABLED is off."""
+    if not app.config.get("RATE_LIMIT_ENABLED", True):
+        return
+    burst = int(app.config.get("RATE_LIMIT_BURST", 60))
+    rate = float(app.config.get("RATE_LIMIT_PER_MINUTE", 120)) / 60.0
+    costs = dict(DEFAULT_COSTS, **(app.config.get("RATE_LIMIT_COSTS") or {}))
+    bytes_per_token = int(app.config.get("RATE_LIMIT_BYTES_PER_TOKEN", 65536))
+    url = app.config.get("RATE_LIMIT_STORAGE_URL")
+    if url:
+        backend = RedisBackend(url)
+    else:
+        backend = MemoryBackend(int(app.config.get("RATE_LIMIT_MAX_KEYS", 100_000)))
+    app.extensions["rate_limit"] = backend
+
+    @app.before_request
+    def _rate_limit():
+        endpoint = request.endpoint
+        if request.method == "OPTIONS" or endpoint is None or endpoint in EXEMPT:
+            return None
+        # A single request may never cost more than a full bucket
+        cost = min(request_cost(endpoint, request.blueprint, costs, bytes_per_token), burst)
+        try:
+            allowed, remaining = backend.take(_client_key(endpoint), cost, rate, burst)
+        except Exception:
+            app.logger.exception("rate limiter backend failed; allowing request")
+            return None
+        g._rate_limit = remaining
+        if allowed:
+            return None
+        LIMITED.inc(endpoint=endpoint)
+        response = jsonify({"msg": "Too many requests, slow down"})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(math.ceil((cost - remaining) / rate))
+        return response
+
+    @app.after_request
+    def _rate_limit_headers(response):
+        remaining = g.pop("_rate_limit", None)
+        if remaining is None:
+            return response
+        return _headers(response, burst, remaining, rate)
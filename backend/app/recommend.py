@@ -0,0 +1,168 @@
+# -------------------------------------------------------------
+# Why: Picking what to work on meant scrolling /api/tasks (newest first)
+# and weighing priority, due dates and dependencies by eye.
+#
+# Why this design?
+#   - Each open task gets a "start by" time: its due date, moved earlier by
+#     its estimate (ESTIMATE_LEAD x minutes) and by its priority
+#     (PRIORITY_LEAD). Undated tasks count as due UNDATED_DUE after they
+#     were created. The key doesn't depend on the current time, so the
+#     ranking never needs recomputing as time passes; only writes change it.
+#   - Per user, open tasks sit in a heap keyed by start-by time (an LRU of
+#     users with a TTL, like membership_cache). Task writes update it
+#     after their transaction commits; superseded heap entries are skipped
+#     and dropped lazily. Top-k pops k ready entries and pushes them back:
+#     O(k log n), no query and no sort per request.
+#   - Readiness is checked at read time: a task whose depends_on task is
+#     still open is skipped, so completing a dependency frees its
+#     dependents without touching their entries.
+#   - Other workers' writes reach this process's index within the TTL
+#     (RECOMMEND_CACHE_TTL_SECONDS); bulk SQL must call invalidate().
+# -------------------------------------------------------------
+import heapq
+import itertools
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import Task
+from .user_cache import UserLRU
+
+ESTIMATE_LEAD = 4  # wall-clock minutes to allow per estimated minute of work
+PRIORITY_LEAD = {1: timedelta(days=2), 2: timedelta(days=1)}  # 1 = high; others get none
+UNDATED_DUE = timedelta(days=14)
+
+Entry = namedtuple("Entry", "start_by id title priority due_date estimate_minutes depends_on_id")
+
+_size = int(os.getenv("RECOMMEND_CACHE_SIZE", 2048))
+_ttl = int(os.getenv("RECOMMEND_CACHE_TTL_SECONDS", 300))
+_indexes = UserLRU(maxsize=_size, ttl=_ttl)
+
+
+def _as_datetime(value):
+    # Routes may assign the raw ISO string; the flush stored it, the attribute still holds it
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    return value
+
+
+def entry(task_id, title, priority, due_date, estimate_minutes, depends_on_id, created_at):
+    """Index entry for an open task."""
+    due_date = _as_datetime(due_date)
+    priority = int(priority or 3)
+    estimate = max(0, int(estimate_minutes or 0))
+    due = due_date or (_as_datetime(created_at) or datetime.utcnow()) + UNDATED_DUE
+    start_by = due - timedelta(minutes=estimate * ESTIMATE_LEAD) - PRIORITY_LEAD.get(priority, timedelta())
+    return Entry(start_by, task_id, title, priority, due_date, estimate, depends_on_id)
+
+
+class TaskIndex:
+    """One user's open tasks in a lazily pruned heap."""
+
+    def __init__(self, entries=()):
+        self.open = {e.id: e for e in entries}
+        self._seq = itertools.count()  # tie-breaker: entries themselves never get compared
+        self._heap = [(e.start_by, e.priority, e.id, next(self._seq), e) for e in self.open.values()]
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
+
+    def upsert(self, e):
+        with self._lock:
+            self.open[e.id] = e
+            heapq.heappush(self._heap, (e.start_by, e.priority, e.id, next(self._seq), e))
+            self._compact()
+
+    def remove(self, task_id):
+        with self._lock:
+            self.open.pop(task_id, None)
+            self._compact()
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self.open) + 64:
+            self._heap = [item for item in self._heap if self.open.get(item[2]) is item[-1]]
+            heapq.heapify(self._heap)
+
+    def top(self, k):
+        """Up to k ready entries, earliest start-by first."""
+        with self._lock:
+            result, taken = [], []
+            while self._heap and len(result) < k:
+                item = heapq.heappop(self._heap)
+                if self.open.get(item[2]) is not item[-1]:
+                    continue  # superseded or closed
+                taken.append(item)
+                if item[-1].depends_on_id not in self.open:
+                    result.append(item[-1])
+            for item in taken:
+                heapq.heappush(self._heap, item)
+            return result
+
+
+def _load(user_id):
+    rows = db.session.execute(
+        select(Task.id, Task.title, Task.priority, Task.due_date, Task.estimate_minutes, Task.depends_on_id,
+               Task.created_at).where(Task.user_id == user_id, Task.completed.is_(False))).all()
+    return TaskIndex(entry(*row) for row in rows)
+
+
+def index_for(user_id):
+    index = _indexes.get(user_id)
+    if index is None:
+        index = _load(user_id)
+        _indexes.put(user_id, index)
+    return index
+
+
+def next_tasks(user_id, k=5, now=None):
+    """Top-k ready open tasks as dicts, with start_by and slack_minutes (negative: behind)."""
+    now = now or datetime.utcnow()
+    return [{"id": e.id, "title": e.title, "priority": e.priority,
+             "due_date": e.due_date.isoformat() if e.due_date else None,
+             "estimate_minutes": e.estimate_minutes, "depends_on_id": e.depends_on_id,
+             "start_by": e.start_by.isoformat(), "slack_minutes": int((e.start_by - now).total_seconds() // 60)}
+            for e in index_for(user_id).top(k)]
+
+
+def invalidate(user_id):
+    """Drop a user's index after bulk SQL, which skips the ORM events below."""
+    _indexes.invalidate(int(user_id))
+
+
+def clear():
+    _indexes.clear()
+
+
+@event.listens_for(Session, "after_flush", propagate=True)
+def _collect(session, _ctx):
+    changed = session.info.setdefault("recommend_changes", {})
+    for task in session.deleted:
+        if isinstance(task, Task):
+            changed[task.id] = (int(task.user_id), None)
+    for task in list(session.new) + list(session.dirty):
+        if isinstance(task, Task) and task not in session.deleted:
+            open_entry = None if task.completed else entry(
+                task.id, task.title, task.priority, task.due_date, task.estimate_minutes, task.depends_on_id,
+                task.created_at)
+            changed[task.id] = (int(task.user_id), open_entry)
+
+
+@event.listens_for(Session, "after_commit", propagate=True)
+def _apply(session):
+    for task_id, (user_id, open_entry) in session.info.pop("recommend_changes", {}).items():
+        index = _indexes.get(user_id)
+        if index is None:
+            continue  # loaded fresh on the next read
+        if open_entry is None:
+            index.remove(task_id)
+        else:
+            index.upsert(open_entry)
+
+
+@event.listens_for(Session, "after_rollback", propagate=True)
+def _discard(session):
+    session.info.pop("recommend_changes", None)
@@ -0,0 +1,36 @@
+"""Operator routes (X-Admin-Token):
+/admin/slow-queries (GET, DELETE).
+"""
+
+from flask import Blueprint, request, jsonify
+from ..admin import admin_required
+from .. import slow_queries
+
+admin_bp = Blueprint('admin_bp', __name__, url_prefix='/api/admin')
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@admin_required
+def list_slow_queries():
+    """Recent slow statements (newest first), or the worst per query shape with ?view=worst."""
+    log = slow_queries.get_log()
+    if log is None:
+        return jsonify({'enabled': False, 'entries': []}), 200
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({'msg': 'Invalid limit'}), 400
+    entries = log.worst(limit) if request.args.get('view') == 'worst' else log.entries(limit)
+    return jsonify({
+        'enabled': True,
+        'threshold_ms': log.threshold * 1000,
+        'explain_threshold_ms': log.explain_threshold * 1000,
+        'entries': entries,
+    }), 200
+
+@admin_bp.route('/slow-queries', methods=['DELETE'])
+@admin_required
+def clear_slow_queries():
+    log = slow_queries.get_log()
+    if log is not None:
+        log.clear()
+    return jsonify({'msg': 'Cleared'}), 200
@@ -0,0 +1,42 @@
+"""Agenda routes:
+/agenda?from=&to=&tz=&limit=&cursor= (tasks, plan days and group plan tasks in date order).
+"""
+
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from .. import membership_cache
+from ..agenda import AgendaError, agenda, decode_cursor, zone
+from ..db_routing import read_replica
+
+agenda_bp = Blueprint('agenda_bp', __name__, url_prefix='/api/agenda')
+
+@agenda_bp.route('', methods=['GET'])
+@jwt_required()
+@read_replica
+def get_agenda():
+    """Everything dated from `from` through `to` (local ISO dates, inclusive) in time zone `tz`.
+
+    Defaults: tz UTC, from today, to six days later. Each entry has `kind`
+    ("task", "plan_item" or "group_task"), `date` and, for timed entries,
+    `at`. Pass `next_cursor` back as `cursor` for the next page.
+    """
+    user_id = int(get_jwt_identity())
+    try:
+        tz = zone(request.args.get('tz'))
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else datetime.now(tz).date()
+        last = date.fromisoformat(request.args['to']) if request.args.get('to') else start + timedelta(days=6)
+        limit = max(1, min(int(request.args.get('limit', 100)), current_app.config.get('AGENDA_MAX_LIMIT', 500)))
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except AgendaError as e:
+        return jsonify({'msg': str(e)}), 400
+    except ValueError:
+        return jsonify({'msg': 'Invalid from, to or limit'}), 400
+    max_days = current_app.config.get('AGENDA_MAX_DAYS', 92)
+    if last < start or (last - start).days >= max_days:
+        return jsonify({'msg': f'to must be on or after from, at most {max_days} days in all'}), 400
+    entries, next_cursor = agenda(user_id, membership_cache.group_ids(user_id), start, last + timedelta(days=1),
+                                  tz, limit, cursor)
+    return jsonify({'from': start.isoformat(), 'to': last.isoformat(), 'tz': tz.key,
+                    'items': entries, 'next_cursor': next_cursor}), 200
@@ -12,15 +12,16 @@
 /register
 /login
 /refresh
-/me.
+/me (GET, PUT, DELETE).
 """
 
 from flask import Blueprint, request, jsonify
 from ..extensions import db
 from ..models import User
+from ..purge import start_job
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, decode_token
-from ..schemas import register_schema, login_schema, user_schema
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, current_user, decode_token
+from ..schemas import purge_job_schema, register_schema, login_schema, user_schema
 
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/api/auth')
 
@@ -85,6 +86,34 @@ def logout():
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def me():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    return jsonify({'user': user_schema.dump(user)}), 200
+    return jsonify({'user': user_schema.dump(current_user)}), 200
+
+@auth_bp.route('/me', methods=['PUT'])
+@jwt_required()
+def update_me():
+    """Update the current user's profile (fullname)."""
+    data = request.get_json() or {}
+    errors = user_schema.validate(data, partial=True)
+    if errors:
+        return jsonify({'errors': errors}), 400
+    if 'fullname' in data:
+        current_user.fullname = data['fullname']
+    db.session.commit()
+    return jsonify({'user': user_schema.dump(current_user)}), 200
+
+@auth_bp.route('/me', methods=['DELETE'])
+@jwt_required()
+def delete_me():
+    """Delete the current account and everything it owns (groups it owns included).
+
+    Body: {"password"}. Login stops working immediately; the data is removed
+    by a background purge job (/api/purge-jobs/<id>).
+    """
+    data = request.get_json() or {}
+    if not check_password_hash(current_user.password_hash, data.get('password') or ''):
+        return jsonify({'msg': 'Bad credentials'}), 401
+    user_id = current_user.id
+    # Not a valid hash: no password matches it while the purge runs
+    current_user.password_hash = '!deleted'
+    job = start_job('user', user_id, user_id)
+    return jsonify({'msg': 'Account deletion started', 'job': purge_job_schema.dump(job)}), 202
@@ -0,0 +1,122 @@
+"""Dashboard bootstrap and request batching:
+/bootstrap (GET), /batch (POST).
+"""
+
+from datetime import datetime, timedelta
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import current_user, get_jwt_identity, jwt_required
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import load_only
+
+from ..db_routing import read_replica
+from ..extensions import db
+from ..models import GroupInvite, GroupMembership, GroupPlan, Notification, StudyGroup, StudyPlan, Task, User
+from ..schemas import plan_summaries_schema, tasks_schema, user_schema
+
+bootstrap_bp = Blueprint('bootstrap_bp', __name__, url_prefix='/api')
+
+
+def _bounded(rows, limit):
+    """(first `limit` rows, whether there were more); callers fetch limit + 1."""
+    return rows[:limit], len(rows) > limit
+
+
+@bootstrap_bp.route('/bootstrap', methods=['GET'])
+@jwt_required()
+@read_replica
+def bootstrap():
+    """Everything the dashboard shows after login, in one response and five queries.
+
+    Lists hold at most BOOTSTRAP_LIST_LIMIT items; `more` says whether the
+    full endpoint (/tasks, /invites/pending, /groups, /plans) has others.
+    """
+    user_id = int(get_jwt_identity())
+    limit = current_app.config.get('BOOTSTRAP_LIST_LIMIT', 20)
+    start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+    tasks, more_tasks = _bounded(
+        Task.query.filter(Task.user_id == user_id, Task.due_date >= start,
+                          Task.due_date < start + timedelta(days=1))
+        .order_by(Task.completed, Task.priority, Task.due_date).limit(limit + 1).all(), limit)
+
+    unread = db.session.scalar(
+        select(func.count(Notification.id)).where(Notification.user_id == user_id, Notification.read.is_(False)))
+
+    invites, more_invites = _bounded(db.session.execute(
+        select(GroupInvite.id, GroupInvite.group_id, StudyGroup.name, GroupInvite.inviter_id,
+               User.fullname, GroupInvite.created_at)
+        .join(StudyGroup, StudyGroup.id == GroupInvite.group_id)
+        .join(User, User.id == GroupInvite.inviter_id)
+        .where(GroupInvite.invitee_id == user_id, GroupInvite.status == 'pending')
+        .order_by(GroupInvite.created_at.desc()).limit(limit + 1)).all(), limit)
+
+    member_count = (select(func.count(GroupMembership.id)).where(GroupMembership.group_id == StudyGroup.id)
+                    .correlate(StudyGroup).scalar_subquery())
+    plan_count = (select(func.count(GroupPlan.id)).where(GroupPlan.group_id == StudyGroup.id)
+                  .correlate(StudyGroup).scalar_subquery())
+    groups, more_groups = _bounded(db.session.execute(
+        select(StudyGroup.id, StudyGroup.name, GroupMembership.role, member_count, plan_count)
+        .join(GroupMembership, and_(GroupMembership.group_id == StudyGroup.id, GroupMembership.user_id == user_id))
+        .order_by(StudyGroup.name, StudyGroup.id).limit(limit + 1)).all(), limit)
+
+    # Summaries only: plan content can be large and is fetched per plan
+    plans, more_plans = _bounded(
+        StudyPlan.query.options(load_only(StudyPlan.id, StudyPlan.title, StudyPlan.generated_at,
+                                          StudyPlan.is_public, StudyPlan.public_id, StudyPlan.version))
+        .filter_by(user_id=user_id).order_by(StudyPlan.generated_at.desc()).limit(limit + 1).all(), limit)
+
+    return jsonify({
+        'user': user_schema.dump(current_user),
+        'due_today': {'items': tasks_schema.dump(tasks), 'more': more_tasks},
+        'unread_notifications': unread,
+        'pending_invites': {'items': [
+            {'id': i.id, 'group_id': i.group_id, 'group_name': i.name, 'inviter_id': i.inviter_id,
+             'inviter_name': i.fullname, 'created_at': i.created_at.isoformat() if i.created_at else None}
+            for i in invites], 'more': more_invites},
+        'groups': {'items': [
+            {'id': g.id, 'name': g.name, 'role': g.role, 'member_count': g[3], 'plan_count': g[4]}
+            for g in groups], 'more': more_groups},
+        'recent_plans': {'items': plan_summaries_schema.dump(plans), 'more': more_plans},
+    }), 200
+
+
+@bootstrap_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch():
+    """Run several GET requests in one round trip.
+
+    Body: {"requests": [{"path": "/api/tasks?completed=false"}, ...]} (at most
+    BATCH_MAX_REQUESTS). Each runs through the normal routing, auth and rate
+    limiting with the caller's Authorization header; responses come back in
+    order as {"path", "status", "body"}. A sub-request that raises gets a 500
+    of its own; the others still run.
+    """
+    items = (request.get_json(silent=True) or {}).get('requests')
+    max_requests = current_app.config.get('BATCH_MAX_REQUESTS', 10)
+    if not isinstance(items, list) or not items:
+        return jsonify({'msg': 'requests must be a non-empty list'}), 400
+    if len(items) > max_requests:
+        return jsonify({'msg': f'At most {max_requests} requests per batch'}), 400
+    paths = [item.get('path') if isinstance(item, dict) else None for item in items]
+    for path in paths:
+        if not isinstance(path, str) or not path.startswith('/api/') or path.split('?')[0].rstrip('/') == '/api/batch':
+            return jsonify({'msg': f'Invalid path: {path!r}'}), 400
+
+    app = current_app._get_current_object()
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    responses = []
+    for path in paths:
+        # A fresh app context gives each sub-request its own `g` and DB session
+        with app.app_context(), app.test_request_context(path, method='GET', headers=headers,
+                                                          environ_base={'REMOTE_ADDR': request.remote_addr}):
+            try:
+                response = app.full_dispatch_request()
+            except Exception:
+                app.logger.exception('batch sub-request %s failed', path)
+                db.session.rollback()
+                responses.append({'path': path, 'status': 500, 'body': {'msg': 'Internal server error'}})
+                continue
+            body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+        responses.append({'path': path, 'status': response.status_code, 'body': body})
+    return jsonify({'responses': responses}), 200
@@ -1,6 +1,6 @@
 """Group routes for collaborative study groups 
 routes:
-(create/join/leave/members).
+(create/join/leave/members/delete).
 
 """
 
@@ -8,7 +8,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
 from ..models import StudyGroup, GroupMembership, User
-from ..schemas import study_group_schema, study_groups_schema
+from ..purge import leave_group_plans, start_job
+from ..schemas import purge_job_schema, study_group_schema, study_groups_schema
 
 study_groups_bp = Blueprint('study_groups_bp', __name__, url_prefix='/api/groups')
 
@@ -65,6 +66,7 @@ def leave_group(group_id):
     if membership.role == 'owner':
         return jsonify({'msg': 'Owner cannot leave their own group'}), 400
     db.session.delete(membership)
+    leave_group_plans(int(user_id), group_id)
     db.session.commit()
     return jsonify({'msg': 'Left group'}), 200
 
@@ -110,5 +112,22 @@ def remove_member(group_id, user_id):
     if target.role == 'owner':
         return jsonify({'msg': 'Cannot remove owner'}), 400
     db.session.delete(target)
+    leave_group_plans(user_id, group_id)
     db.session.commit()
     return jsonify({'msg': 'Member removed'}), 200
+
+@study_groups_bp.route('/<int:group_id>', methods=['DELETE'])
+@jwt_required()
+def delete_group(group_id):
+    """Delete a group with its plans, invites and memberships (owner-only).
+
+    Runs as a background purge job; poll /api/purge-jobs/<id> for progress.
+    """
+    user_id = int(get_jwt_identity())
+    membership = GroupMembership.query.filter_by(user_id=user_id, group_id=group_id).first()
+    if not membership:
+        return jsonify({'msg': 'Not a member'}), 403
+    if membership.role != 'owner':
+        return jsonify({'msg': 'Not authorized'}), 403
+    job = start_job('group', group_id, user_id)
+    return jsonify({'msg': 'Group deletion started', 'job': purge_job_schema.dump(job)}), 202
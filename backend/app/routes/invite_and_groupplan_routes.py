@@ -11,29 +11,50 @@
 
 """ endpoints for in-app group invites and shared group plans."""
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from sqlalchemy import func, select
 from ..extensions import db
 from ..models import User, StudyGroup, GroupMembership, GroupInvite, GroupPlan, GroupPlanParticipant, Notification, GroupPlanTask
-from ..sockets import notify_user
-from ..schemas import group_invite_schema, group_invites_schema, group_plan_schema, group_plans_schema, group_plan_task_schema, group_plan_tasks_schema
-from datetime import datetime
+from ..sockets import notify_user, emit_group_plan_updated, emit_collab_ops
+from .. import collab, group_schedules, jobs
+from ..json_patch import PatchError
+from ..plan_versions import (VersionConflict, broadcast_payload, delete_ops, document, ops_since,
+                             parse_patch_request, record_change, replace_ops)
+from ..purge import leave_group_plans, start_job
+from ..search import delete_scope
+from ..user_search import find_user_by_identifier
+from ..schemas import group_invite_schema, group_invites_schema, group_plan_schema, group_plans_schema, group_plan_task_schema, group_plan_tasks_schema, purge_job_schema
+from datetime import date, datetime
+from .job_routes import accepted
 
 # Helper to check if a user is a member of a group
 def _is_member(user_id, group_id):
     return GroupMembership.query.filter_by(user_id=user_id, group_id=group_id).first() is not None
 
+# Helper: (membership, error response) for editing a group plan (creator or group owner)
+def _group_plan_editor(user_id, plan, action):
+    membership = GroupMembership.query.filter_by(user_id=user_id, group_id=plan.group_id).first()
+    if not membership:
+        return None, (jsonify({'msg': 'Not a group member'}), 403)
+    is_creator = plan.created_by == int(user_id)
+    is_owner = getattr(membership, 'role', 'member') == 'owner'
+    if not (is_creator or is_owner):
+        return None, (jsonify({'msg': f'Not authorized to {action}'}), 403)
+    return membership, None
+
 invites_bp = Blueprint('invites_bp', __name__, url_prefix='/api/invites')
 
 @invites_bp.route('/send', methods=['POST'])
 @jwt_required()
 def send_invite():
-    """Invite a user to a group by username or email (in-app only)."""
+    """Invite a user to a group by id (from /api/users/search), full name or email (in-app only)."""
     user_id = get_jwt_identity()
     data = request.get_json() or {}
     group_id = data.get('group_id')
-    identifier = data.get('identifier')  # fullname or email (MVP)
-    if not group_id or not identifier:
+    identifier = data.get('identifier')  # fullname or email
+    invitee_id = data.get('invitee_id')  # picked from typeahead results
+    if not group_id or not (identifier or invitee_id):
         return jsonify({'msg': 'group_id and identifier required'}), 400
     group = StudyGroup.query.get(group_id)
     if not group:
@@ -41,8 +62,11 @@ def send_invite():
     # Only group members can invite
     if not _is_member(user_id, group_id):
         return jsonify({'msg': 'Not a group member'}), 403
-    # Find user by fullname or email (MVP: no username field)
-    invitee = User.query.filter((User.email == identifier) | (User.fullname == identifier)).first()
+    # Resolve by id, or by email / normalized full name (both indexed)
+    if invitee_id:
+        invitee = db.session.get(User, invitee_id)
+    else:
+        invitee = find_user_by_identifier(identifier)
     if not invitee:
         return jsonify({'msg': 'User not found'}), 404
     # Prevent duplicate invites
@@ -52,9 +76,8 @@ def send_invite():
     db.session.add(invite)
     db.session.flush()  # ensure invite.id is available
     # Create notification for invitee
-    inviter = User.query.get(user_id)
     group_name = group.name if hasattr(group, 'name') else f"Group #{group_id}"
-    notif_msg = f"You were invited to join '{group_name}' by {inviter.fullname if inviter else 'a user'}"
+    notif_msg = f"You were invited to join '{group_name}' by {current_user.fullname}"
     db.session.commit()
     try:
         notify_user(invitee.id, notif_msg, 'invite', invite.id)
@@ -78,7 +101,6 @@ def respond_invite(invite_id):
     data = request.get_json() or {}
     action = data.get('action')  # 'accept' or 'decline'
     invite = GroupInvite.query.get(invite_id)
-    print(f"[DEBUG PATCHED] /invites/{invite_id}/respond: user_id={user_id} (type={type(user_id)}), invitee_id={invite.invitee_id if invite else None} (type={type(invite.invitee_id) if invite else None})")
     if not invite:
         return jsonify({'msg': 'Invite not found'}), 404
     if int(invite.invitee_id) != int(user_id):
@@ -129,7 +151,7 @@ def create_group_plan(group_id):
     db.session.add(plan)
     db.session.commit()
     # Create normalized tasks
-    for t in tasks:
+    for position, t in enumerate(tasks, start=1):
         if t.get('task'):
                 db.session.add(GroupPlanTask(
                     plan_id=plan.id,
@@ -137,11 +159,12 @@ def create_group_plan(group_id):
                     duration=t.get('duration', 30),
                     notes=t.get('notes', ''),
                     due=t.get('due'),
-                    priority=t.get('priority', 3)
+                    priority=t.get('priority', 3),
+                    position=float(position)
                 ))
     db.session.commit()
     # Reload tasks for response
-    plan_tasks = GroupPlanTask.query.filter_by(plan_id=plan.id).order_by(GroupPlanTask.created_at).all()
+    plan_tasks = GroupPlanTask.query.filter_by(plan_id=plan.id).order_by(GroupPlanTask.position, GroupPlanTask.id).all()
     plan_data = group_plan_schema.dump(plan)
     plan_data['tasks'] = [group_plan_task_schema.dump(tsk) for tsk in plan_tasks]
     return jsonify(plan_data), 201
@@ -223,6 +246,68 @@ def list_group_plan_participants(plan_id):
     return jsonify(result), 200
 
 
+@group_plans_bp.route('/<int:plan_id>/schedules', methods=['POST'])
+@jwt_required()
+def generate_group_schedules(plan_id):
+    """Split the plan's tasks across its participants and save each share as a personal plan.
+
+    Body: {days?, daily_minutes?, start? (ISO date, default today)}. Groups with
+    more than GROUP_SCHEDULE_INLINE_MEMBERS participants (or more than
+    JOB_INLINE_PLAN_TASKS tasks) are scheduled by a background job (202).
+    """
+    user_id = get_jwt_identity()
+    plan = db.session.get(GroupPlan, plan_id)
+    if not plan:
+        return jsonify({'msg': 'Plan not found'}), 404
+    _membership, error = _group_plan_editor(user_id, plan, 'schedule')
+    if error:
+        return error
+    payload = request.get_json(silent=True) or {}
+    try:
+        start = date.fromisoformat(payload['start']) if payload.get('start') else date.today()
+        days = int(payload['days']) if payload.get('days') is not None else None
+        daily_minutes = int(payload['daily_minutes']) if payload.get('daily_minutes') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'msg': 'Invalid days, daily_minutes or start'}), 400
+    if (days is not None and not 1 <= days <= group_schedules.MAX_DAYS) or (daily_minutes is not None
+                                                                            and daily_minutes < 1):
+        return jsonify({'msg': f'days must be 1-{group_schedules.MAX_DAYS}, daily_minutes positive'}), 400
+    members = db.session.scalars(select(GroupPlanParticipant.user_id).where(GroupPlanParticipant.plan_id == plan.id)
+                                 .order_by(GroupPlanParticipant.id)).all()
+    if not members:
+        return jsonify({'msg': 'Plan has no participants'}), 400
+    task_count = db.session.scalar(select(func.count(GroupPlanTask.id)).where(GroupPlanTask.plan_id == plan.id))
+    args = {'plan_id': plan.id, 'days': days, 'daily_minutes': daily_minutes, 'start': start.isoformat()}
+    if (len(members) > current_app.config.get('GROUP_SCHEDULE_INLINE_MEMBERS', 10)
+            or task_count > current_app.config.get('JOB_INLINE_PLAN_TASKS', 200)):
+        job = jobs.enqueue('group_schedules', args, user_id=int(user_id), priority=jobs.PRIORITY_HIGH)
+        return accepted(job, 'Schedules queued')
+    body = _group_schedules(**args)
+    db.session.commit()
+    return jsonify(body), 201
+
+def _group_schedules(plan_id, days, daily_minutes, start, use_pool=False):
+    """Build and save (uncommitted) every participant's share; the response body."""
+    plan = db.session.get(GroupPlan, plan_id)
+    if plan is None:
+        raise LookupError(f'group plan {plan_id} no longer exists')
+    members = db.session.scalars(select(GroupPlanParticipant.user_id).where(GroupPlanParticipant.plan_id == plan_id)
+                                 .order_by(GroupPlanParticipant.id)).all()
+    items = group_schedules.plan_items(plan_id)
+    days = days or group_schedules.default_days(plan, items, date.fromisoformat(start))
+    schedules = group_schedules.build_schedules(items, members, days, daily_minutes, start, use_pool) if members else {}
+    rows = group_schedules.save_schedules(plan, schedules)
+    return {'group_plan_id': plan_id, 'days': days, 'start': start, 'schedules': [{
+        'user_id': row.user_id, 'plan_id': row.id,
+        'tasks': sum(len(day) for day in row.content.values()),
+        'minutes': sum(item.get('duration', 0) for day in row.content.values() for item in day),
+    } for row in rows]}
+
+@jobs.handler('group_schedules')
+def _group_schedules_job(job):
+    # Worker processes may fan members out to a process pool; the web process may not (gevent)
+    return _group_schedules(**job.payload, use_pool=jobs.in_worker())
+
 @invites_bp.route('/remove-member', methods=['POST'])
 @jwt_required()
 def remove_group_member():
@@ -247,8 +332,8 @@ def remove_group_member():
     if not member:
         return jsonify({'msg': 'Member not found'}), 404
     db.session.delete(member)
-    # Remove from group plan participants
-    GroupPlanParticipant.query.filter_by(user_id=member_id).delete()
+    # Remove from this group's plans only (one statement)
+    leave_group_plans(int(member_id), int(group_id))
     db.session.commit()
     return jsonify({'msg': 'Member removed'}), 200
 
@@ -277,15 +362,19 @@ def delete_group_plan(plan_id):
     plan = GroupPlan.query.get(plan_id)
     if not plan:
         return jsonify({'msg': 'Plan not found'}), 404
-    # Check membership
-    membership = GroupMembership.query.filter_by(user_id=user_id, group_id=plan.group_id).first()
-    if not membership:
-        return jsonify({'msg': 'Not a group member'}), 403
     # Allow delete if creator or owner
-    is_creator = plan.created_by == user_id
-    is_owner = getattr(membership, 'role', 'member') == 'owner'
-    if not (is_creator or is_owner):
-        return jsonify({'msg': 'Not authorized to delete'}), 403
+    _membership, error = _group_plan_editor(user_id, plan, 'delete')
+    if error:
+        return error
+    # Big plans are purged in chunks by a background purge job (poll
+    # /api/purge-jobs/<id>); small ones cascade in the DB
+    task_count = db.session.scalar(select(func.count(GroupPlanTask.id)).where(GroupPlanTask.plan_id == plan.id))
+    if task_count > current_app.config.get('PURGE_INLINE_ROWS', 5000):
+        job = start_job('group_plan', plan.id, int(user_id))
+        return jsonify({'msg': 'Plan deletion started', 'job': purge_job_schema.dump(job)}), 202
+    delete_ops('group_plan', plan.id)
+    collab.forget(plan.id)
+    delete_scope(db.session.connection(), plan_id=plan.id)
     db.session.delete(plan)
     db.session.commit()
     return jsonify({'msg': 'Plan deleted'}), 200
@@ -298,92 +387,167 @@ def update_group_plan(plan_id):
     plan = GroupPlan.query.get(plan_id)
     if not plan:
         return jsonify({'msg': 'Plan not found'}), 404
-    membership = GroupMembership.query.filter_by(user_id=user_id, group_id=plan.group_id).first()
-    if not membership:
-        return jsonify({'msg': 'Not a group member'}), 403
-    is_creator = plan.created_by == user_id
-    is_owner = getattr(membership, 'role', 'member') == 'owner'
-    if not (is_creator or is_owner):
-        return jsonify({'msg': 'Not authorized to update'}), 403
+    _membership, error = _group_plan_editor(user_id, plan, 'update')
+    if error:
+        return error
     data = request.get_json() or {}
-    if 'title' in data:
-        plan.title = data['title']
-    if 'content' in data:
-        plan.content = data['content']
-    if 'description' in data:
-        plan.description = data['description']
+    old_doc = document(plan, 'group_plan')
+    new_doc = dict(old_doc, **{k: data[k] for k in ('title', 'content', 'description') if k in data})
     if 'due' in data:
         due_val = data['due']
-        if due_val:
-            
-            try:
-                plan.due = datetime.strptime(due_val, "%Y-%m-%d").date()
-            except Exception:
-                plan.due = None
-        else:
-            plan.due = None
-    db.session.commit()
+        try:
+            new_doc['due'] = datetime.strptime(due_val, "%Y-%m-%d").date().isoformat() if due_val else None
+        except Exception:
+            new_doc['due'] = None
+    ops = replace_ops(old_doc, new_doc)
+    if ops:
+        try:
+            record_change(plan, 'group_plan', ops, int(user_id), data.get('version'))
+        except PatchError as e:
+            return jsonify({'msg': str(e)}), 400
+        except VersionConflict as e:
+            return jsonify({'msg': 'Version conflict', 'version': e.current}), 409
+        try:
+            emit_group_plan_updated(plan.id, broadcast_payload(plan, ops))
+        except Exception:
+            pass
     return jsonify(group_plan_schema.dump(plan)), 200
 
+@group_plans_bp.route('/<int:plan_id>', methods=['PATCH'])
+@jwt_required()
+def patch_group_plan(plan_id):
+    """Apply JSON Patch ops to a group plan at a known version (see plans PATCH)."""
+    user_id = get_jwt_identity()
+    plan = GroupPlan.query.get(plan_id)
+    if not plan:
+        return jsonify({'msg': 'Plan not found'}), 404
+    _membership, error = _group_plan_editor(user_id, plan, 'update')
+    if error:
+        return error
+    try:
+        ops, version = parse_patch_request()
+        record_change(plan, 'group_plan', ops, int(user_id), version)
+    except PatchError as e:
+        return jsonify({'msg': str(e)}), 400
+    except VersionConflict as e:
+        return jsonify({'msg': 'Version conflict', 'version': e.current}), 409
+    try:
+        emit_group_plan_updated(plan.id, broadcast_payload(plan, ops))
+    except Exception:
+        pass
+    response = jsonify({'id': plan.id, 'version': plan.version})
+    response.headers['ETag'] = f'"{plan.version}"'
+    return response, 200
+
+@group_plans_bp.route('/<int:plan_id>/ops', methods=['GET'])
+@jwt_required()
+def list_group_plan_ops(plan_id):
+    """Ops applied after ?since=<version> (members only); 410 if they were pruned."""
+    user_id = get_jwt_identity()
+    plan = GroupPlan.query.get(plan_id)
+    if not plan:
+        return jsonify({'msg': 'Plan not found'}), 404
+    if not _is_member(user_id, plan.group_id):
+        return jsonify({'msg': 'Not a group member'}), 403
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'msg': 'since is required'}), 400
+    ops = ops_since('group_plan', plan.id, since, plan.version)
+    if ops is None:
+        return jsonify({'msg': 'Ops no longer available, refetch the plan', 'version': plan.version}), 410
+    return jsonify({'plan_id': plan.id, 'version': plan.version, 'ops': ops}), 200
+
 
 
 # --- Group Plan Task Endpoints ---
+# Writes go through the live editor (app/collab.py) so REST and socket
+# editors share one sequence and every change is broadcast as an op; each
+# request commits its op before responding.
+
 @group_plans_bp.route('/<int:plan_id>/tasks', methods=['GET'])
 @jwt_required()
 def list_group_plan_tasks(plan_id):
+    user_id = get_jwt_identity()
     plan = GroupPlan.query.get(plan_id)
     if not plan:
         return jsonify({'msg': 'Plan not found'}), 404
-    tasks = GroupPlanTask.query.filter_by(plan_id=plan_id).order_by(GroupPlanTask.created_at).all()
+    if not _is_member(user_id, plan.group_id):
+        return jsonify({'msg': 'Not a group member'}), 403
+    tasks = GroupPlanTask.query.filter_by(plan_id=plan_id).order_by(GroupPlanTask.position, GroupPlanTask.id).all()
     return jsonify(group_plan_tasks_schema.dump(tasks)), 200
 
 @group_plans_bp.route('/<int:plan_id>/tasks', methods=['POST'])
 @jwt_required()
 def create_group_plan_task(plan_id):
+    """Add a task (at the end, or after the task id in "after")."""
+    user_id = get_jwt_identity()
     plan = GroupPlan.query.get(plan_id)
     if not plan:
         return jsonify({'msg': 'Plan not found'}), 404
+    if not _is_member(user_id, plan.group_id):
+        return jsonify({'msg': 'Not a group member'}), 403
     data = request.get_json() or {}
     if not data.get('task'):
         return jsonify({'msg': 'Task name required'}), 400
-    task = GroupPlanTask(
-        plan_id=plan_id,
-        task=data['task'],
-        duration=data.get('duration', 30),
-        notes=data.get('notes', ''),
-        due=data.get('due'),
-        priority=data.get('priority', 3)
-    )
-    db.session.add(task)
-    db.session.commit()
+    op = {'op': 'insert', 'fields': {k: data[k] for k in collab.FIELDS if k in data}}
+    if 'after' in data:
+        op['after'] = data['after']
+    try:
+        entries = collab.submit(plan_id, op, int(user_id))
+        db.session.commit()
+    except collab.CollabError as e:
+        db.session.rollback()
+        return jsonify({'msg': str(e)}), 400
+    emit_collab_ops(plan_id, entries)
+    task = db.session.get(GroupPlanTask, entries[0]['op']['id'])
     return jsonify(group_plan_task_schema.dump(task)), 201
 
 @group_plans_bp.route('/<int:plan_id>/tasks/<int:task_id>', methods=['PUT'])
 @jwt_required()
 def update_group_plan_task(plan_id, task_id):
-    task = GroupPlanTask.query.filter_by(plan_id=plan_id, id=task_id).first()
-    if not task:
-        return jsonify({'msg': 'Task not found'}), 404
+    user_id = get_jwt_identity()
+    plan = GroupPlan.query.get(plan_id)
+    if not plan:
+        return jsonify({'msg': 'Plan not found'}), 404
+    if not _is_member(user_id, plan.group_id):
+        return jsonify({'msg': 'Not a group member'}), 403
     data = request.get_json() or {}
-    if 'task' in data:
-        task.task = data['task']
-    if 'duration' in data:
-        task.duration = data['duration']
-    if 'notes' in data:
-        task.notes = data['notes']
-    if 'due' in data:
-        task.due = data['due']
-    if 'priority' in data:
-        task.priority = data['priority']
-    db.session.commit()
-    return jsonify(group_plan_task_schema.dump(task)), 200
+    fields = {k: data[k] for k in collab.FIELDS if k in data}
+    ops = [{'op': 'update', 'id': task_id, 'fields': fields}]
+    if 'after' in data:  # optional reorder: place after this task id (null = first)
+        ops.append({'op': 'move', 'id': task_id, 'after': data['after']})
+    entries = []
+    try:
+        for op in ops:
+            entries.extend(collab.submit(plan_id, op, int(user_id)))
+        db.session.commit()
+    except collab.CollabError as e:
+        db.session.rollback()
+        if str(e).startswith('unknown task'):
+            return jsonify({'msg': 'Task not found'}), 404
+        return jsonify({'msg': str(e)}), 400
+    if entries:
+        emit_collab_ops(plan_id, entries)
+    task = next((t for t in collab.state(plan_id)['tasks'] if t['id'] == task_id), None)
+    if task is None:
+        return jsonify({'msg': 'Task not found'}), 404
+    return jsonify(task), 200
 
 @group_plans_bp.route('/<int:plan_id>/tasks/<int:task_id>', methods=['DELETE'])
 @jwt_required()
 def delete_group_plan_task(plan_id, task_id):
-    task = GroupPlanTask.query.filter_by(plan_id=plan_id, id=task_id).first()
-    if not task:
+    user_id = get_jwt_identity()
+    plan = GroupPlan.query.get(plan_id)
+    if not plan:
+        return jsonify({'msg': 'Plan not found'}), 404
+    if not _is_member(user_id, plan.group_id):
+        return jsonify({'msg': 'Not a group member'}), 403
+    try:
+        entries = collab.submit(plan_id, {'op': 'delete', 'id': task_id}, int(user_id))
+        db.session.commit()
+    except collab.CollabError:
+        db.session.rollback()
         return jsonify({'msg': 'Task not found'}), 404
-    db.session.delete(task)
-    db.session.commit()
+    if entries:
+        emit_collab_ops(plan_id, entries)
     return jsonify({'msg': 'Task deleted'}), 200
@@ -0,0 +1,29 @@
+"""Background job status:
+/jobs/<id> (GET; queued plan generation, task imports).
+"""
+
+from flask import Blueprint, jsonify, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..extensions import db
+from ..models import Job
+from ..schemas import job_schema
+
+jobs_bp = Blueprint('jobs_bp', __name__, url_prefix='/api/jobs')
+
+
+def accepted(job, msg):
+    """202 response for a queued job, pointing at its status URL."""
+    response = jsonify({'msg': msg, 'job': job_schema.dump(job)})
+    response.status_code = 202
+    response.headers['Location'] = url_for('jobs_bp.get_job', job_id=job.id)
+    return response
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Status of a job the caller started; `result` is set once it is done."""
+    job = db.session.get(Job, job_id)
+    if not job or job.user_id != int(get_jwt_identity()):
+        return jsonify({'msg': 'Job not found'}), 404
+    return jsonify(job_schema.dump(job)), 200
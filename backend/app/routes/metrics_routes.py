@@ -0,0 +1,20 @@
+"""Metrics route:
+/metrics (Prometheus text format).
+"""
+
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from .. import metrics
+
+metrics_bp = Blueprint('metrics_bp', __name__, url_prefix='/api')
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def export_metrics():
+    """Expose process metrics for Prometheus. Requires `Bearer <METRICS_TOKEN>`; not served when it is unset."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return jsonify({'msg': 'Not found'}), 404
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(supplied, token):
+        return jsonify({'msg': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
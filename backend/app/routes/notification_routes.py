@@ -3,6 +3,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
+from ..db_routing import read_replica
 from ..models import Notification
 from ..schemas import notifications_schema
 
@@ -10,6 +11,7 @@ notifications_bp = Blueprint('notifications_bp', __name__, url_prefix='/api/noti
 
 @notifications_bp.route('', methods=['GET'])
 @jwt_required()
+@read_replica
 def list_notifications():
     """List notifications for the current user (most recent first), with optional pagination."""
     user_id = get_jwt_identity()
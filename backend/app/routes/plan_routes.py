@@ -9,18 +9,26 @@
 #   - Supports both individual and group plans for flexibility and collaboration.
 # -------------------------------------------------------------
 """Minimal routes for personal study plans (CRUD, generate, update)."""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from .. import jobs
 from ..extensions import db
+from ..db_routing import read_replica
 from ..sockets import emit_plan_updated
 from ..models import StudyPlan, Task
+from ..planner import build_plan, plan_diff, rebalance_plan
+from ..json_patch import PatchError
+from ..plan_versions import (VersionConflict, broadcast_payload, content_ops, delete_ops, document,
+                             ops_since, parse_patch_request, record_change, replace_ops)
 from ..schemas import plan_schema, plans_schema
+from .job_routes import accepted
 
 
 plans_bp = Blueprint('plans_bp', __name__, url_prefix='/api/plans')
 
 @plans_bp.route('', methods=['GET'])
 @jwt_required()
+@read_replica
 def list_plans():
     user_id = get_jwt_identity()
     plans = StudyPlan.query.filter_by(user_id=user_id).order_by(StudyPlan.generated_at.desc()).all()
@@ -59,13 +67,18 @@ def delete_plan(plan_id):
     plan = StudyPlan.query.filter_by(id=plan_id, user_id=user_id).first()
     if not plan:
         return jsonify({'msg':'Not found'}), 404
+    delete_ops('plan', plan.id)
     db.session.delete(plan); db.session.commit()
     return jsonify({'msg':'Deleted'}), 200
 
 @plans_bp.route('/generate', methods=['POST'])
 @jwt_required()
 def generate_plan():
-    """Generate a deterministic multi-day study plan (round-robin)."""
+    """Generate a deterministic multi-day study plan (see app/planner.py).
+
+    More than JOB_INLINE_PLAN_TASKS tasks are planned by a background job:
+    the response is 202 with the job, whose result is what this returns inline.
+    """
     user_id = get_jwt_identity()
     payload = request.get_json() or {}
     days = int(payload.get('days', 3))
@@ -79,76 +92,68 @@ def generate_plan():
     else:
         tasks = Task.query.filter_by(user_id=user_id, completed=False).limit(50).all()
         tasks_input = [{'title': t.title, 'estimate_minutes': t.estimate_minutes, 'description': t.description} for t in tasks]
-    # Deterministic distribution of tasks over days
-    # Round-robin assign tasks to days
-    result = {}
-    n = max(1, int(days))
-    for i in range(1, n+1):
-        result[f"Day {i}"] = []
-    simple = []
-    for t in tasks_input:
-        if isinstance(t, str):
-            simple.append({"task": t, "duration": 30, "notes": ""})
-        elif isinstance(t, dict):
-            title = t.get("title") or t.get("task") or "Untitled"
-            dur = int(t.get("estimate_minutes", 30))
-            simple.append({"task": title, "duration": dur, "notes": t.get("description", "")})
-        else:
-            simple.append({"task": str(t), "duration": 30, "notes": ""})
-    for idx, item in enumerate(simple):
-        day = (idx % n) + 1
-        result[f"Day {day}"].append(item)
     save = payload.get('save', True)
-    if save:
-        plan = StudyPlan(user_id=user_id, title=f'Plan ({days} days)', content=result)
-        db.session.add(plan); db.session.commit()
-        return jsonify(plan_schema.dump(plan)), 201
-    return jsonify({'content': result}), 200
+    if len(tasks_input) > current_app.config.get('JOB_INLINE_PLAN_TASKS', 200):
+        job = jobs.enqueue('generate_plan', {'tasks': tasks_input, 'days': days, 'save': bool(save)},
+                           user_id=int(user_id), priority=jobs.PRIORITY_HIGH)
+        return accepted(job, 'Plan generation queued')
+    body = _generate(int(user_id), tasks_input, days, save)
+    db.session.commit()
+    return jsonify(body), 201 if save else 200
+
+
+def _generate(user_id, tasks_input, days, save):
+    """Build (and add, uncommitted) a plan; the response body for /generate."""
+    result = build_plan(tasks_input, days)
+    if not save:
+        return {'content': result}
+    plan = StudyPlan(user_id=user_id, title=f'Plan ({days} days)', content=result)
+    db.session.add(plan)
+    db.session.flush()
+    return plan_schema.dump(plan)
 
-# Regenerate a plan
+
+@jobs.handler('generate_plan')
+def _generate_plan_job(job):
+    p = job.payload
+    return _generate(job.user_id, p['tasks'], p['days'], p['save'])
+
+# Regenerate a plan: rebalance its items by duration across the same days
 @plans_bp.route('/<int:plan_id>/regenerate', methods=['POST'])
 @jwt_required()
 def regenerate_plan(plan_id):
+    """Rebalance a plan so the busiest day is as light as possible.
+
+    Optional body: {"pinned": [{"day": "Day 2", "index": 0}], "blocked_days": ["Day 3"],
+    "optimize": "local_search"}. Only the changed days are broadcast.
+    """
     user_id = get_jwt_identity()
     plan = StudyPlan.query.filter_by(id=plan_id, user_id=user_id).first()
     if not plan:
         return jsonify({'msg':'Not found'}), 404
-    # Use the same tasks as the original plan
-    days = len(plan.content)
-    # Try to extract tasks from the plan content
-    tasks_input = []
-    for day_items in plan.content.values():
-        for item in day_items:
-            tasks_input.append({
-                'title': item.get('task', ''),
-                'estimate_minutes': item.get('duration', 30),
-                'description': item.get('notes', '')
-            })
-    # Regenerate using deterministic algorithm
-    result = {}
-    days = len(plan.content)
-    for i in range(1, days+1):
-        result[f"Day {i}"] = []
-    simple = []
-    for day_items in plan.content.values():
-        for item in day_items:
-            simple.append({
-                'task': item.get('task', ''),
-                'duration': item.get('duration', 30),
-                'notes': item.get('notes', '')
-            })
-    for idx, item in enumerate(simple):
-        day = (idx % days) + 1
-        result[f"Day {day}"].append(item)
-    plan.content = result
-    db.session.commit()
+    payload = request.get_json(silent=True) or {}
     try:
-        emit_plan_updated(plan.id, {'type':'regenerated', 'plan': plan_schema.dump(plan)})
-    except Exception:
-        pass
-    return jsonify(plan_schema.dump(plan)), 200
+        result = rebalance_plan(plan.content, pinned=payload.get('pinned') or (),
+                                blocked_days=payload.get('blocked_days') or (),
+                                local_search=payload.get('optimize') == 'local_search')
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+    changes = plan_diff(plan.content, result)
+    if changes:
+        ops = content_ops(changes)
+        try:
+            record_change(plan, 'plan', ops, int(user_id))
+        except VersionConflict as e:
+            return jsonify({'msg': 'Plan changed while regenerating, retry', 'version': e.current}), 409
+        try:
+            emit_plan_updated(plan.id, broadcast_payload(plan, ops, 'regenerated'))
+        except Exception:
+            pass
+    body = plan_schema.dump(plan)
+    body['changed_days'] = list(changes)
+    return jsonify(body), 200
 
-# Update a plan (e.g. rename title)
+# Update a plan (e.g. rename title); replaces whole fields, see PATCH for edits
 @plans_bp.route('/<int:plan_id>', methods=['PUT'])
 @jwt_required()
 def update_plan(plan_id):
@@ -157,13 +162,60 @@ def update_plan(plan_id):
     if not plan:
         return jsonify({'msg':'Not found'}), 404
     data = request.get_json() or {}
-    if 'title' in data:
-        plan.title = data['title']
-    if 'content' in data:
-        plan.content = data['content']
-    db.session.commit()
+    old_doc = document(plan, 'plan')
+    new_doc = dict(old_doc, **{k: data[k] for k in ('title', 'content') if k in data})
+    ops = replace_ops(old_doc, new_doc)
+    if ops:
+        try:
+            record_change(plan, 'plan', ops, int(user_id), data.get('version'))
+        except PatchError as e:
+            return jsonify({'msg': str(e)}), 400
+        except VersionConflict as e:
+            return jsonify({'msg': 'Version conflict', 'version': e.current}), 409
+        try:
+            emit_plan_updated(plan.id, broadcast_payload(plan, ops))
+        except Exception:
+            pass
+    return jsonify(plan_schema.dump(plan)), 200
+
+# Apply a JSON Patch (RFC 6902) to a plan's title/content at a known version
+@plans_bp.route('/<int:plan_id>', methods=['PATCH'])
+@jwt_required()
+def patch_plan(plan_id):
+    """Body: {"version": 3, "ops": [{"op": "move", "from": "/content/Day 1/0", "path": "/content/Day 2/-"}]}
+    (or a bare ops array with If-Match: 3). 409 with the current version if the plan moved on.
+    """
+    user_id = get_jwt_identity()
+    plan = StudyPlan.query.filter_by(id=plan_id, user_id=user_id).first()
+    if not plan:
+        return jsonify({'msg':'Not found'}), 404
+    try:
+        ops, version = parse_patch_request()
+        record_change(plan, 'plan', ops, int(user_id), version)
+    except PatchError as e:
+        return jsonify({'msg': str(e)}), 400
+    except VersionConflict as e:
+        return jsonify({'msg': 'Version conflict', 'version': e.current}), 409
     try:
-        emit_plan_updated(plan.id, {'type':'updated', 'plan': plan_schema.dump(plan)})
+        emit_plan_updated(plan.id, broadcast_payload(plan, ops))
     except Exception:
         pass
-    return jsonify(plan_schema.dump(plan)), 200
+    response = jsonify({'id': plan.id, 'version': plan.version})
+    response.headers['ETag'] = f'"{plan.version}"'
+    return response, 200
+
+# Ops applied after a given version, for clients that missed broadcasts
+@plans_bp.route('/<int:plan_id>/ops', methods=['GET'])
+@jwt_required()
+def list_plan_ops(plan_id):
+    user_id = get_jwt_identity()
+    plan = StudyPlan.query.filter_by(id=plan_id, user_id=user_id).first()
+    if not plan:
+        return jsonify({'msg':'Not found'}), 404
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'msg': 'since is required'}), 400
+    ops = ops_since('plan', plan.id, since, plan.version)
+    if ops is None:
+        return jsonify({'msg': 'Ops no longer available, refetch the plan', 'version': plan.version}), 410
+    return jsonify({'plan_id': plan.id, 'version': plan.version, 'ops': ops}), 200
@@ -4,6 +4,7 @@
 from flask import Blueprint, jsonify, request
 from ..models import StudyPlan
 from ..extensions import db
+from ..db_routing import read_replica
 from ..schemas import plan_schema
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import uuid
@@ -11,6 +12,7 @@ import uuid
 public_bp = Blueprint('public_bp', __name__, url_prefix='/api/public')
 
 @public_bp.route('/plans/<public_id>', methods=['GET'])
+@read_replica
 def get_public_plan(public_id):
     plan = StudyPlan.query.filter_by(public_id=public_id, is_public=True).first()
     if not plan:
@@ -0,0 +1,20 @@
+"""Purge job status:
+/purge-jobs/<id> (GET; group plan, group and account deletions).
+"""
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..extensions import db
+from ..models import PurgeJob
+from ..schemas import purge_job_schema
+
+purge_jobs_bp = Blueprint('purge_jobs_bp', __name__, url_prefix='/api/purge-jobs')
+
+@purge_jobs_bp.route('/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_purge_job(job_id):
+    """Status and progress of a deletion the caller requested."""
+    job = db.session.get(PurgeJob, job_id)
+    if not job or job.requested_by != int(get_jwt_identity()):
+        return jsonify({'msg': 'Job not found'}), 404
+    return jsonify(purge_job_schema.dump(job)), 200
@@ -0,0 +1,31 @@
+"""Search routes:
+/search?q=&kinds=&limit=&offset= (tasks, plans, group plan tasks).
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..search import search, KINDS
+
+search_bp = Blueprint('search_bp', __name__, url_prefix='/api/search')
+
+@search_bp.route('', methods=['GET'])
+@jwt_required()
+def search_all():
+    """Ranked, paginated full-text search over the current user's data and their groups' plan tasks."""
+    user_id = get_jwt_identity()
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({'msg': 'q required'}), 400
+    kinds = [k for k in (request.args.get('kinds') or '').split(',') if k] or list(KINDS)
+    if any(k not in KINDS for k in kinds):
+        return jsonify({'msg': f"kinds must be among {', '.join(KINDS)}"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 50))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'msg': 'Invalid pagination params'}), 400
+    results, has_more = search(user_id, q, kinds, limit, offset)
+    return jsonify({
+        'results': results,
+        'next_offset': offset + limit if has_more else None,
+    }), 200
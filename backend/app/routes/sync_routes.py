@@ -0,0 +1,38 @@
+"""Incremental sync:
+/sync?since=<token>&limit= (changes to tasks, plans, group plans and their tasks, notifications).
+"""
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from .. import membership_cache
+from ..sync import MembershipChanged, TokenExpired, changes_since, current_token
+
+sync_bp = Blueprint('sync_bp', __name__, url_prefix='/api/sync')
+
+@sync_bp.route('', methods=['GET'])
+@jwt_required()
+def sync():
+    """Rows inserted, updated or deleted since `since`, oldest first.
+
+    Without a token, with an expired one, or after the caller joined or left
+    a group, the response has `reset: true` and a token: load the full
+    lists, then poll with that token.
+    Each change is {"kind", "id", "op": "upsert", "data"} or {"kind", "id", "op": "delete"}.
+    """
+    user_id = int(get_jwt_identity())
+    since = request.args.get('since')
+    try:
+        since = int(since) if since else None
+        limit = max(1, min(int(request.args.get('limit', 500)), 1000))
+    except ValueError:
+        return jsonify({'msg': 'Invalid since or limit'}), 400
+    settle = current_app.config.get('SYNC_SETTLE_SECONDS', 2)
+    if since is None or since < 0:
+        return jsonify({'token': str(current_token(settle)), 'changes': [], 'more': False, 'reset': True}), 200
+    try:
+        changes, token, more = changes_since(user_id, membership_cache.group_ids(user_id), since, limit, settle)
+    except MembershipChanged:
+        return jsonify({'token': str(current_token(settle)), 'changes': [], 'more': False, 'reset': True}), 200
+    except TokenExpired:
+        return jsonify({'msg': 'Sync token expired, reload', 'token': str(current_token(settle)), 'reset': True}), 410
+    return jsonify({'token': str(token), 'changes': changes, 'more': more}), 200
@@ -7,18 +7,23 @@
 #   - Modular route structure allows for future expansion (e.g., task comments).
 #   - Task logic is separated from plan logic for clarity 
 # -------------------------------------------------------------
-"""Minimal routes for personal tasks (CRUD, filters, complete)."""
-from flask import Blueprint, request, jsonify
+"""Minimal routes for personal tasks (CRUD, filters, complete, import, next)."""
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from marshmallow import ValidationError
+from .. import jobs, recommend
 from ..extensions import db
+from ..db_routing import read_replica
 from ..models import Task
-from ..schemas import task_schema, tasks_schema
+from ..schemas import task_import_schema, task_schema, tasks_schema
+from .job_routes import accepted
 from datetime import datetime, timedelta
 
 tasks_bp = Blueprint('tasks_bp', __name__, url_prefix='/api/tasks')
 
 @tasks_bp.route('', methods=['GET'])
 @jwt_required()
+@read_replica
 def list_tasks():
     user_id = get_jwt_identity()
     query = Task.query.filter_by(user_id=user_id)
@@ -43,6 +48,21 @@ def list_tasks():
     tasks = query.order_by(Task.created_at.desc()).all()
     return jsonify(tasks_schema.dump(tasks)), 200
 
+@tasks_bp.route('/next', methods=['GET'])
+@jwt_required()
+def next_tasks():
+    """The k (default 5, at most 50) open tasks to start next, ready ones only (see app/recommend.py).
+
+    Not on the read replica: the per-user index is cached, so it must not be
+    loaded from a lagging copy.
+    """
+    user_id = int(get_jwt_identity())
+    try:
+        k = max(1, min(int(request.args.get('k', 5)), 50))
+    except ValueError:
+        return jsonify({'msg': 'Invalid k'}), 400
+    return jsonify(recommend.next_tasks(user_id, k)), 200
+
 @tasks_bp.route('', methods=['POST'])
 @jwt_required()
 def create_task():
@@ -110,3 +130,52 @@ def delete_task(task_id):
         return jsonify({'msg':'Not found'}), 404
     db.session.delete(task); db.session.commit()
     return jsonify({'msg':'Deleted'}), 200
+
+IMPORT_FLUSH_ROWS = 500
+
+@tasks_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_tasks():
+    """Create many tasks at once: {"tasks": [{title, description, estimate_minutes, due_date, ...}]}.
+
+    At most TASK_IMPORT_MAX_ROWS; more than JOB_INLINE_IMPORT_ROWS are
+    imported by a background job (202 with the job).
+    """
+    user_id = int(get_jwt_identity())
+    rows = (request.get_json(silent=True) or {}).get('tasks')
+    max_rows = current_app.config.get('TASK_IMPORT_MAX_ROWS', 5000)
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'msg': 'tasks must be a non-empty list'}), 400
+    if len(rows) > max_rows:
+        return jsonify({'msg': f'At most {max_rows} tasks per import'}), 400
+    errors = task_import_schema.validate(rows)
+    if errors:
+        return jsonify({'errors': errors}), 400
+    if len(rows) > current_app.config.get('JOB_INLINE_IMPORT_ROWS', 100):
+        job = jobs.enqueue('import_tasks', {'tasks': rows}, user_id=user_id)
+        return accepted(job, 'Import queued')
+    result = _import(user_id, rows)
+    db.session.commit()
+    return jsonify(result), 201
+
+
+def _import(user_id, rows):
+    """Add the tasks (uncommitted), flushing in batches; returns {"created": n}.
+
+    Every row is validated before the first is added, so a ValidationError
+    leaves nothing behind.
+    """
+    loaded = task_import_schema.load(rows)
+    for start in range(0, len(loaded), IMPORT_FLUSH_ROWS):
+        db.session.add_all([Task(user_id=user_id, **fields) for fields in loaded[start:start + IMPORT_FLUSH_ROWS]])
+        db.session.flush()
+    return {'created': len(loaded)}
+
+
+@jobs.handler('import_tasks')
+def _import_tasks_job(job):
+    try:
+        return _import(job.user_id, job.payload['tasks'])
+    except ValidationError as e:
+        # Validated before queueing; not worth retrying
+        return {'created': 0, 'errors': e.messages}
@@ -0,0 +1,23 @@
+"""User directory routes:
+/search (typeahead for invites and sharing).
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from ..user_search import search_users, MAX_RESULTS
+
+users_bp = Blueprint('users_bp', __name__, url_prefix='/api/users')
+
+@users_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    """Typeahead search by name. Returns id and fullname only (no emails)."""
+    q = (request.args.get('q') or '').strip()
+    if len(q) < 2:
+        return jsonify([]), 200
+    try:
+        limit = min(int(request.args.get('limit', 10)), MAX_RESULTS)
+    except ValueError:
+        return jsonify({'msg': 'Invalid limit'}), 400
+    users = search_users(q, limit)
+    return jsonify([{'id': u.id, 'fullname': u.fullname} for u in users]), 200
@@ -7,12 +7,20 @@
 #   - Schemas enforce data integrity and prevent invalid data from reaching the DB.
 #   - separates API layer from DB models, making the API safer and easier to change.
 # -------------------------------------------------------------
-from .extensions import ma
-from marshmallow import fields, validate
+from .instrumentation import serialization_timer
+from marshmallow import EXCLUDE, Schema, fields, validate
 
 
+class BaseSchema(Schema):
+    """Base for all API schemas; attributes dump time to request instrumentation."""
 
-class GroupPlanTaskSchema(ma.Schema):
+    def dump(self, obj, *, many=None):
+        with serialization_timer():
+            return super().dump(obj, many=many)
+
+
+
+class GroupPlanTaskSchema(BaseSchema):
     id = fields.Int(dump_only=True)
     plan_id = fields.Int()
     task = fields.Str(required=True)
@@ -20,7 +28,9 @@ class GroupPlanTaskSchema(ma.Schema):
     notes = fields.Str()
     due = fields.Date(allow_none=True)
     priority = fields.Int()
+    position = fields.Float(dump_only=True)
     created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
 
 group_plan_task_schema = GroupPlanTaskSchema()
 group_plan_tasks_schema = GroupPlanTaskSchema(many=True)
@@ -37,7 +47,7 @@ and extend without unnecessary complexity.
 # --- In-App Group Invites and Group Plan Sharing Schemas ---
 # Why: These schemas enable serialization/validation for group invites and group plans, supporting in-app collaboration.
 
-class GroupInviteSchema(ma.Schema):
+class GroupInviteSchema(BaseSchema):
     """Invite between users for joining a study group."""
     id = fields.Int(dump_only=True)
     inviter_id = fields.Int()
@@ -49,7 +59,7 @@ class GroupInviteSchema(ma.Schema):
 group_invite_schema = GroupInviteSchema()
 group_invites_schema = GroupInviteSchema(many=True)
 
-class GroupPlanSchema(ma.Schema):
+class GroupPlanSchema(BaseSchema):
     """Shared plan attached to a study group."""
     id = fields.Int(dump_only=True)
     group_id = fields.Int()
@@ -58,15 +68,21 @@ class GroupPlanSchema(ma.Schema):
     tasks = fields.Nested(GroupPlanTaskSchema, many=True)
     created_by = fields.Int()
     due = fields.Date(allow_none=True)
+    content = fields.Dict()
+    version = fields.Int(dump_only=True)
+    tasks_seq = fields.Int(dump_only=True)
     created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
 
 group_plan_schema = GroupPlanSchema()
 group_plans_schema = GroupPlanSchema(many=True)
+# Sync feed rows: tasks change (and sync) on their own
+sync_group_plans_schema = GroupPlanSchema(many=True, exclude=("tasks",))
 
 # --- Collaborative Study Groups Schemas ---
 # Why: These schemas enable serialization/validation for group and membership APIs, supporting collaboration features.
 
-class StudyGroupSchema(ma.Schema):
+class StudyGroupSchema(BaseSchema):
     """Basic info for a study group."""
     id = fields.Int(dump_only=True)
     name = fields.Str(required=True)
@@ -77,7 +93,7 @@ class StudyGroupSchema(ma.Schema):
 study_group_schema = StudyGroupSchema()
 study_groups_schema = StudyGroupSchema(many=True)
 
-class GroupMembershipSchema(ma.Schema):
+class GroupMembershipSchema(BaseSchema):
     """Membership record linking a user to a group."""
     id = fields.Int(dump_only=True)
     user_id = fields.Int(required=True)
@@ -88,7 +104,7 @@ class GroupMembershipSchema(ma.Schema):
 group_membership_schema = GroupMembershipSchema()
 group_memberships_schema = GroupMembershipSchema(many=True)
 
-class UserSchema(ma.Schema):
+class UserSchema(BaseSchema):
     """Public user profile for auth responses."""
     id = fields.Int(dump_only=True)
     fullname = fields.Str(required=True, validate=validate.Length(min=1))
@@ -97,7 +113,7 @@ class UserSchema(ma.Schema):
 
 user_schema = UserSchema()
 
-class RegisterSchema(ma.Schema):
+class RegisterSchema(BaseSchema):
     """Validation schema for registration payload."""
     fullname = fields.Str(required=True, validate=validate.Length(min=1))
     email = fields.Email(required=True)
@@ -105,14 +121,14 @@ class RegisterSchema(ma.Schema):
 
 register_schema = RegisterSchema()
 
-class LoginSchema(ma.Schema):
+class LoginSchema(BaseSchema):
     """Validation schema for login payload."""
     email = fields.Email(required=True)
     password = fields.Str(required=True)
 
 login_schema = LoginSchema()
 
-class TaskSchema(ma.Schema):
+class TaskSchema(BaseSchema):
     """Personal task with optional metadata and status."""
     id = fields.Int(dump_only=True)
     title = fields.Str(required=True, validate=validate.Length(min=1))
@@ -125,28 +141,36 @@ class TaskSchema(ma.Schema):
     recurrence = fields.Str(allow_none=True)
     reminder_minutes_before = fields.Int(allow_none=True)
     created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
 
 task_schema = TaskSchema()
 tasks_schema = TaskSchema(many=True)
+# Bulk import: ids, timestamps and dependencies in the input are ignored
+task_import_schema = TaskSchema(many=True, exclude=("depends_on_id",), unknown=EXCLUDE)
 
-class StudyPlanSchema(ma.Schema):
+class StudyPlanSchema(BaseSchema):
     """Saved personal study plan content."""
     id = fields.Int(dump_only=True)
     title = fields.Str()
     content = fields.Dict(required=True)
     generated_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
     is_public = fields.Bool()
     public_id = fields.Str(allow_none=True)
+    version = fields.Int(dump_only=True)
+    group_plan_id = fields.Int(dump_only=True, allow_none=True)
 
 plan_schema = StudyPlanSchema()
 plans_schema = StudyPlanSchema(many=True)
+# Listings that don't need the (potentially large) plan content
+plan_summaries_schema = StudyPlanSchema(many=True, exclude=("content",))
 
 
 
 # --- In-App Notifications Schema ---
 # Why: This schema enables serialization/validation for notification APIs, supporting in-app notification features.
 
-class NotificationSchema(ma.Schema):
+class NotificationSchema(BaseSchema):
     """Notification message for a user."""
     id = fields.Int(dump_only=True)
     user_id = fields.Int()
@@ -155,6 +179,33 @@ class NotificationSchema(ma.Schema):
     read = fields.Bool()
     invite_id = fields.Int(allow_none=True)
     created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
 
 notification_schema = NotificationSchema()
 notifications_schema = NotificationSchema(many=True)
+
+class PurgeJobSchema(BaseSchema):
+    id = fields.Int(dump_only=True)
+    kind = fields.Str(dump_only=True)
+    target_id = fields.Int(dump_only=True)
+    status = fields.Str(dump_only=True)
+    step = fields.Str(dump_only=True, allow_none=True)
+    deleted_rows = fields.Int(dump_only=True)
+    error = fields.Str(dump_only=True, allow_none=True)
+    created_at = fields.DateTime(dump_only=True)
+    finished_at = fields.DateTime(dump_only=True, allow_none=True)
+
+purge_job_schema = PurgeJobSchema()
+
+class JobSchema(BaseSchema):
+    id = fields.Int(dump_only=True)
+    kind = fields.Str(dump_only=True)
+    status = fields.Str(dump_only=True)
+    attempts = fields.Int(dump_only=True)
+    result = fields.Raw(dump_only=True, allow_none=True)
+    error = fields.Str(dump_only=True, allow_none=True)
+    created_at = fields.DateTime(dump_only=True)
+    started_at = fields.DateTime(dump_only=True, allow_none=True)
+    finished_at = fields.DateTime(dump_only=True, allow_none=True)
+
+job_schema = JobSchema()
@@ -0,0 +1,294 @@
+# -------------------------------------------------------------
+# Why: Let users search their own tasks, saved plans and the group plan
+# tasks of groups they belong to, instead of filtering client-side.
+#
+# Why this design?
+#   - One flat document per searchable row (kind, ref_id, scope, title, body)
+#     keeps every backend and the scoping rules identical.
+#   - The backend follows the SQLALCHEMY_DATABASE_URI dialect: Postgres uses a
+#     generated, weighted tsvector with a GIN index; SQLite uses an FTS5
+#     virtual table; anything else falls back to a LIKE scan of the same table.
+#   - Documents are written from a session `after_flush` hook on the same
+#     connection, so the index commits or rolls back with the data.
+#   - Scope is checked at query time (owner, or current group membership), so
+#     leaving a group immediately hides that group's documents.
+# -------------------------------------------------------------
+import json
+import re
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import Task, StudyPlan, GroupPlanTask, GroupMembership
+
+TABLE = "search_documents"
+KINDS = ("task", "plan", "group_task")
+_KIND_CODES = {"task": 1, "plan": 2, "group_task": 3}
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Engine URL -> True once the search schema is confirmed present, else the
+# time of the last check that missed it (re-checked after SCHEMA_RECHECK_SECONDS,
+# e.g. while another instance is still applying migration 003)
+_ready_engines = {}
+SCHEMA_RECHECK_SECONDS = 30
+
+
+def _doc_id(kind, ref_id):
+    """Stable integer key so updates/deletes are primary-key lookups (FTS5 rowid)."""
+    return ref_id * 4 + _KIND_CODES[kind]
+
+
+def plan_text(content):
+    """Flatten StudyPlan.content ({"Day 1": [{task, notes}, ...]}) into searchable text."""
+    parts = []
+    if isinstance(content, dict):
+        for items in content.values():
+            for item in items or []:
+                if isinstance(item, dict):
+                    parts.append(str(item.get("task") or ""))
+                    parts.append(str(item.get("notes") or ""))
+                else:
+                    parts.append(str(item))
+    return "\n".join(p for p in parts if p)
+
+
+# --- Schema ---
+
+def create_schema(conn):
+    """Create the search table/index for this connection's dialect (idempotent)."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "title, body, kind UNINDEXED, ref_id UNINDEXED, user_id UNINDEXED, "
+            "group_id UNINDEXED, plan_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+        ))
+        return
+    if TABLE in inspect(conn).get_table_names():
+        return
+    if dialect == "postgresql":
+        conn.execute(text(
+            f"CREATE TABLE {TABLE} ("
+            "id BIGINT PRIMARY KEY, kind VARCHAR(20) NOT NULL, ref_id INTEGER NOT NULL, "
+            "user_id INTEGER, group_id INTEGER, plan_id INTEGER, "
+            "title TEXT NOT NULL DEFAULT '', body TEXT NOT NULL DEFAULT '', "
+            "tsv tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED)"
+        ))
+        conn.execute(text(f"CREATE INDEX ix_{TABLE}_tsv ON {TABLE} USING gin (tsv)"))
+    else:
+        conn.execute(text(
+            f"CREATE TABLE {TABLE} ("
+            "id BIGINT PRIMARY KEY, kind VARCHAR(20) NOT NULL, ref_id INTEGER NOT NULL, "
+            "user_id INTEGER, group_id INTEGER, plan_id INTEGER, "
+            "title TEXT NOT NULL, body TEXT NOT NULL)"
+        ))
+    conn.execute(text(f"CREATE INDEX ix_{TABLE}_user_id ON {TABLE} (user_id)"))
+    conn.execute(text(f"CREATE INDEX ix_{TABLE}_group_id ON {TABLE} (group_id)"))
+
+
+def drop_schema(conn):
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+
+def _schema_ready(conn):
+    key = str(conn.engine.url)
+    state = _ready_engines.get(key)
+    if state is True:
+        return True
+    if state is not None and time.monotonic() - state < SCHEMA_RECHECK_SECONDS:
+        return False
+    if TABLE in inspect(conn).get_table_names():
+        _ready_engines[key] = True
+        return True
+    if state is None and has_app_context():
+        current_app.logger.warning("%s is missing: writes are not indexed until it exists "
+                                   "(flask --app manage.py db upgrade)", TABLE)
+    _ready_engines[key] = time.monotonic()
+    return False
+
+
+# --- Writes ---
+
+def _as_int(value):
+    return int(value) if value is not None else None
+
+
+def _upsert(conn, doc):
+    # Routes assign ids from get_jwt_identity() (strings); FTS5 columns have no affinity
+    params = dict(doc, id=_doc_id(doc["kind"], doc["ref_id"]),
+                  user_id=_as_int(doc["user_id"]), group_id=_as_int(doc["group_id"]),
+                  plan_id=_as_int(doc["plan_id"]))
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        conn.execute(text(
+            f"INSERT INTO {TABLE} (id, kind, ref_id, user_id, group_id, plan_id, title, body) "
+            "VALUES (:id, :kind, :ref_id, :user_id, :group_id, :plan_id, :title, :body) "
+            "ON CONFLICT (id) DO UPDATE SET user_id = EXCLUDED.user_id, group_id = EXCLUDED.group_id, "
+            "plan_id = EXCLUDED.plan_id, title = EXCLUDED.title, body = EXCLUDED.body"
+        ), params)
+        return
+    # FTS5 has no upsert; delete-then-insert by rowid is two index lookups
+    key = "rowid" if dialect == "sqlite" else "id"
+    conn.execute(text(f"DELETE FROM {TABLE} WHERE {key} = :id"), {"id": params["id"]})
+    conn.execute(text(
+        f"INSERT INTO {TABLE} ({key}, kind, ref_id, user_id, group_id, plan_id, title, body) "
+        "VALUES (:id, :kind, :ref_id, :user_id, :group_id, :plan_id, :title, :body)"
+    ), params)
+
+
+def _delete(conn, kind, ref_id):
+    key = "rowid" if conn.dialect.name == "sqlite" else "id"
+    conn.execute(text(f"DELETE FROM {TABLE} WHERE {key} = :id"), {"id": _doc_id(kind, ref_id)})
+
+
+def delete_scope(conn, group_id=None, plan_id=None, user_id=None):
+    """Drop documents for a whole group, group plan or user (bulk deletes)."""
+    if not _schema_ready(conn):
+        return
+    for column, value in (("group_id", group_id), ("plan_id", plan_id), ("user_id", user_id)):
+        if value is not None:
+            conn.execute(text(f"DELETE FROM {TABLE} WHERE {column} = :v"), {"v": value})
+
+
+def _document(conn, obj, group_cache):
+    if isinstance(obj, Task):
+        return {"kind": "task", "ref_id": obj.id, "user_id": obj.user_id, "group_id": None,
+                "plan_id": None, "title": obj.title or "", "body": obj.description or ""}
+    if isinstance(obj, StudyPlan):
+        return {"kind": "plan", "ref_id": obj.id, "user_id": obj.user_id, "group_id": None,
+                "plan_id": None, "title": obj.title or "", "body": plan_text(obj.content)}
+    if isinstance(obj, GroupPlanTask):
+        if obj.plan_id not in group_cache:
+            group_cache[obj.plan_id] = conn.execute(
+                text("SELECT group_id FROM group_plans WHERE id = :id"), {"id": obj.plan_id}
+            ).scalar()
+        return {"kind": "group_task", "ref_id": obj.id, "user_id": None,
+                "group_id": group_cache[obj.plan_id], "plan_id": obj.plan_id,
+                "title": obj.task or "", "body": obj.notes or ""}
+    return None
+
+
+_KIND_OF = {Task: "task", StudyPlan: "plan", GroupPlanTask: "group_task"}
+
+
+@event.listens_for(Session, "after_flush", propagate=True)
+def _index_flushed(session, _ctx):
+    touched = [o for o in list(session.new) + list(session.dirty) + list(session.deleted)
+               if type(o) in _KIND_OF]
+    if not touched:
+        return
+    conn = session.connection()
+    if not _schema_ready(conn):
+        return
+    group_cache = {}
+    for obj in session.deleted:
+        if type(obj) in _KIND_OF:
+            _delete(conn, _KIND_OF[type(obj)], obj.id)
+    for obj in session.new:
+        if type(obj) in _KIND_OF:
+            _upsert(conn, _document(conn, obj, group_cache))
+    for obj in session.dirty:
+        if type(obj) in _KIND_OF and obj not in session.deleted and session.is_modified(obj):
+            _upsert(conn, _document(conn, obj, group_cache))
+
+
+def backfill(conn):
+    """Index every existing row using plain Core selects (usable from migrations)."""
+    conn.execute(text(f"DELETE FROM {TABLE}"))
+    count = 0
+    sources = (
+        ("SELECT id, user_id, title, description FROM tasks",
+         lambda r: {"kind": "task", "ref_id": r[0], "user_id": r[1], "group_id": None,
+                    "plan_id": None, "title": r[2] or "", "body": r[3] or ""}),
+        ("SELECT id, user_id, title, content FROM study_plans",
+         lambda r: {"kind": "plan", "ref_id": r[0], "user_id": r[1], "group_id": None,
+                    "plan_id": None, "title": r[2] or "",
+                    "body": plan_text(json.loads(r[3]) if isinstance(r[3], str) else r[3])}),
+        ("SELECT t.id, p.group_id, t.plan_id, t.task, t.notes FROM group_plan_tasks t "
+         "JOIN group_plans p ON p.id = t.plan_id",
+         lambda r: {"kind": "group_task", "ref_id": r[0], "user_id": None, "group_id": r[1],
+                    "plan_id": r[2], "title": r[3] or "", "body": r[4] or ""}),
+    )
+    for sql, to_doc in sources:
+        for row in conn.execute(text(sql)).fetchall():
+            _upsert(conn, to_doc(row))
+            count += 1
+    return count
+
+
+def reindex_all():
+    """Rebuild the index from the source tables (repair / after bulk imports)."""
+    conn = db.session.connection()
+    create_schema(conn)
+    _ready_engines[str(conn.engine.url)] = True
+    count = backfill(conn)
+    db.session.commit()
+    return count
+
+
+# --- Queries ---
+
+def _fts5_query(q):
+    """Quote each token and prefix-match the last one, so user input can't inject FTS syntax."""
+    tokens = _TOKEN.findall(q)
+    if not tokens:
+        return None
+    quoted = [f'"{t}"' for t in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(user_id, q, kinds=None, limit=20, offset=0):
+    """Ranked documents matching `q` visible to `user_id`. Returns (results, has_more)."""
+    conn = db.session.connection()
+    if not _schema_ready(conn):
+        return [], False
+    kinds = [k for k in (kinds or KINDS) if k in KINDS]
+    group_ids = [gid for (gid,) in db.session.query(GroupMembership.group_id)
+                 .filter_by(user_id=user_id).all()]
+    params = {"user_id": int(user_id), "limit": limit + 1, "offset": offset}
+    kind_sql = ", ".join(f":kind{i}" for i in range(len(kinds)))
+    params.update({f"kind{i}": k for i, k in enumerate(kinds)})
+    group_sql = ", ".join(f":group{i}" for i in range(len(group_ids))) or "NULL"
+    params.update({f"group{i}": g for i, g in enumerate(group_ids)})
+    scope = f"(user_id = :user_id OR group_id IN ({group_sql})) AND kind IN ({kind_sql})"
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        params["q"] = _fts5_query(q)
+        if not params["q"]:
+            return [], False
+        sql = (f"SELECT kind, ref_id, group_id, plan_id, title, "
+               f"snippet({TABLE}, 1, '[', ']', '…', 12) AS snippet, bm25({TABLE}, 4.0, 1.0) AS rank "
+               f"FROM {TABLE} WHERE {TABLE} MATCH :q AND {scope} "
+               "ORDER BY rank LIMIT :limit OFFSET :offset")
+    elif dialect == "postgresql":
+        params["q"] = q
+        sql = ("SELECT kind, ref_id, group_id, plan_id, title, "
+               "ts_headline('english', body, query, 'StartSel=[, StopSel=], MaxWords=24, MinWords=8') AS snippet, "
+               "ts_rank_cd(tsv, query) AS rank "
+               f"FROM {TABLE}, websearch_to_tsquery('english', :q) AS query "
+               f"WHERE tsv @@ query AND {scope} "
+               "ORDER BY rank DESC, id LIMIT :limit OFFSET :offset")
+    else:
+        params["q"] = f"%{q}%"
+        sql = ("SELECT kind, ref_id, group_id, plan_id, title, '' AS snippet, 0 AS rank "
+               f"FROM {TABLE} WHERE (title LIKE :q OR body LIKE :q) AND {scope} "
+               "ORDER BY id DESC LIMIT :limit OFFSET :offset")
+
+    rows = conn.execute(text(sql), params).mappings().all()
+    results = [{
+        "kind": r["kind"],
+        "id": int(r["ref_id"]),
+        "group_id": r["group_id"],
+        "plan_id": r["plan_id"],
+        "title": r["title"],
+        "snippet": r["snippet"],
+        "rank": float(r["rank"] or 0),
+    } for r in rows[:limit]]
+    return results, len(rows) > limit
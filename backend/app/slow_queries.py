@@ -0,0 +1,169 @@
+# -------------------------------------------------------------
+# Why: Find out which route queries are slow in production, with enough
+# context (endpoint, plan) to fix them, without logging user data.
+#
+# Why this design?
+#   - Statements slower than SLOW_QUERY_MS are kept in a fixed-size ring
+#     buffer (SLOW_QUERY_BUFFER), so memory stays bounded.
+#   - Bound parameters are reduced to their types/lengths before storage.
+#   - The worst offenders (over SLOW_QUERY_EXPLAIN_MS, once per query shape)
+#     get an EXPLAIN captured after the request, on a separate connection,
+#     so the request's own transaction is never touched. Plain EXPLAIN only:
+#     EXPLAIN ANALYZE would execute the statement a second time.
+#   - The "already explained" shapes are an LRU capped at
+#     _MAX_EXPLAINED_SHAPES, so ad-hoc statements can't grow it forever.
+#   - Each app keeps its own log (app.extensions) with listeners on its own
+#     engines, so a later create_app gets its own thresholds.
+#   - Viewable at /api/admin/slow-queries and exportable with
+#     `flask --app manage.py export-slow-queries`.
+# -------------------------------------------------------------
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+
+from . import metrics
+from .extensions import db
+
+SLOW_QUERIES = metrics.counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+
+_EXPLAIN_PREFIX = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN ", "mysql": "EXPLAIN "}
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACES = re.compile(r"\s+")
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_MAX_EXPLAINS_PER_REQUEST = 3
+_MAX_EXPLAINED_SHAPES = 1000
+
+
+def fingerprint(statement):
+    """Shape of a statement with literals and IN-list lengths collapsed."""
+    shape = _LITERALS.sub("?", statement)
+    shape = re.sub(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)", "(?+)", shape)
+    shape = _SPACES.sub(" ", shape).strip()
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def redact(params):
+    """Replace bound values with '<type>' / '<str:len>' placeholders."""
+    if isinstance(params, dict):
+        return {k: redact(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [redact(v) for v in params]
+    if params is None:
+        return None
+    if isinstance(params, (str, bytes)):
+        return f"<{type(params).__name__}:{len(params)}>"
+    return f"<{type(params).__name__}>"
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms, explain_ms, size):
+        self.threshold = threshold_ms / 1000.0
+        self.explain_threshold = explain_ms / 1000.0
+        self._entries = deque(maxlen=size)
+        self._explained = OrderedDict()   # fingerprint -> worst duration already explained (LRU)
+        self._pending = deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def record(self, engine, statement, params, duration):
+        fp = fingerprint(statement)
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration * 1000, 2),
+            "fingerprint": fp,
+            "sql": statement,
+            "params": redact(params),
+            "endpoint": request.endpoint if has_request_context() else None,
+            "method": request.method if has_request_context() else None,
+            "explain": None,
+        }
+        SLOW_QUERIES.inc(endpoint=entry["endpoint"] or "none")
+        with self._lock:
+            self._entries.append(entry)
+            if fp in self._explained:
+                self._explained.move_to_end(fp)
+            worse = duration > 2 * self._explained.get(fp, 0)
+            if duration >= self.explain_threshold and worse and _READ_ONLY.match(statement):
+                self._explained[fp] = duration
+                while len(self._explained) > _MAX_EXPLAINED_SHAPES:
+                    self._explained.popitem(last=False)
+                self._pending.append((engine, statement, params, entry))
+
+    def run_pending_explains(self):
+        for _ in range(_MAX_EXPLAINS_PER_REQUEST):
+            with self._lock:
+                if not self._pending:
+                    return
+                engine, statement, params, entry = self._pending.popleft()
+            prefix = _EXPLAIN_PREFIX.get(engine.dialect.name)
+            if prefix is None:
+                continue
+            try:
+                with engine.connect() as conn:
+                    rows = conn.exec_driver_sql(prefix + statement, params).fetchall()
+                entry["explain"] = [" | ".join(str(col) for col in row) for row in rows]
+            except Exception as e:  # plan capture must never break a request
+                entry["explain"] = [f"EXPLAIN failed: {e}"]
+
+    def entries(self, limit=None):
+        with self._lock:
+            items = list(self._entries)
+        items.reverse()
+        return items[:limit] if limit else items
+
+    def worst(self, limit=20):
+        """Slowest entry per fingerprint, slowest first."""
+        best = {}
+        for e in self.entries():
+            if e["fingerprint"] not in best or e["duration_ms"] > best[e["fingerprint"]]["duration_ms"]:
+                best[e["fingerprint"]] = e
+        return sorted(best.values(), key=lambda e: e["duration_ms"], reverse=True)[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._explained.clear()
+
+
+def get_log():
+    """The current app's SlowQueryLog, or None when it is disabled."""
+    return current_app.extensions.get("slow_query_log")
+
+
+def _before_cursor(_conn, _cursor, _statement, _params, context, _executemany):
+    if context is not None:
+        context._slow_query_start = time.perf_counter()
+
+
+def init_slow_query_log(app):
+    """Enable the recorder when SLOW_QUERY_MS is configured (> 0)."""
+    threshold = float(app.config.get("SLOW_QUERY_MS") or 0)
+    if threshold <= 0:
+        return
+    log = app.extensions["slow_query_log"] = SlowQueryLog(
+        threshold,
+        float(app.config.get("SLOW_QUERY_EXPLAIN_MS") or threshold * 2),
+        int(app.config.get("SLOW_QUERY_BUFFER", 200)),
+    )
+
+    def _after_cursor(conn, _cursor, statement, params, context, _executemany):
+        start = getattr(context, "_slow_query_start", None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        if duration >= log.threshold:
+            log.record(conn.engine, statement, params, duration)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor)
+            event.listen(engine, "after_cursor_execute", _after_cursor)
+
+    @app.teardown_request
+    def _explain_after_request(_exc):
+        log.run_pending_explains()
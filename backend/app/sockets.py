@@ -2,67 +2,212 @@
 # Why: Centralize Socket.IO event handlers for real-time features
 # (presence, live editing, notifications) separate from REST routes.
 # -------------------------------------------------------------
-from flask import request
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from flask_socketio import join_room, leave_room, rooms as socket_rooms
 from .extensions import socketio
 from .extensions import db
 from .models import Notification
+from . import collab, membership_cache, outbound
+from .user_cache import load_user
+
+# Outbound events go through per-connection queues (app/outbound.py),
+# which coalesce superseded presence/plan updates for slow clients.
 
 # In-memory presence map: { room: { sid: user_info } }
 presence = {}
+# Authenticated connections: { sid: {"id": user_id, "name": fullname} }
+connections = {}
 
 def _room_key(kind: str, identifier: str|int) -> str:
     return f"{kind}:{identifier}"
 
+# --- Connection auth and room authorization ---
+# The access token comes from the Socket.IO auth payload ({"token": ...}),
+# falling back to ?token= or an Authorization header. Rooms are checked
+# against cached ownership/membership (app/membership_cache.py).
+
+def _token_from_handshake(auth):
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    if request.args.get('token'):
+        return request.args['token']
+    header = request.headers.get('Authorization', '')
+    return header[7:] if header.startswith('Bearer ') else None
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    token = _token_from_handshake(auth)
+    try:
+        claims = decode_token(token) if token else None
+        user = load_user(claims['sub']) if claims and claims.get('type') == 'access' else None
+    except Exception:
+        user = None
+    if user is None:
+        return False  # rejects the handshake; the client sees connect_error
+    connections[request.sid] = {'id': user.id, 'name': user.fullname}
+
+def _current_user_id():
+    conn = connections.get(request.sid)
+    return conn['id'] if conn else None
+
+def can_join(user_id, room):
+    """Whether user_id may join `room` ("user:<id>", "plan:<id>", "group:<id>", "group-plan:<id>")."""
+    kind, _, ident = (room or '').partition(':')
+    try:
+        ident = int(ident)
+    except ValueError:
+        return False
+    if kind == 'user':
+        return ident == user_id
+    if kind == 'plan':
+        access = membership_cache.plan_access(ident)
+        return access is not None and (access[0] == user_id or access[1])
+    if kind == 'group':
+        return membership_cache.is_member(user_id, ident)
+    if kind == 'group-plan':
+        group_id = membership_cache.group_of_plan(ident)
+        return group_id is not None and membership_cache.is_member(user_id, group_id)
+    return False
+
+def _authorized_join(room):
+    """Join `room` for the current socket; returns an error string or None."""
+    user_id = _current_user_id()
+    if user_id is None:
+        return 'unauthorized'
+    joined = set(socket_rooms()) - {request.sid}
+    if room in joined:
+        return None
+    if len(joined) >= current_app.config.get('SOCKET_MAX_ROOMS', 50):
+        return 'too many rooms'
+    if not can_join(user_id, room):
+        return 'forbidden'
+    join_room(room)
+    return None
+
 @socketio.on('join')
 def handle_join(data):
-    room = data.get('room')
-    user = data.get('user')
+    room = (data or {}).get('room')
     if not room:
-        return
-    socketio.join_room(room)
-    presence.setdefault(room, {})[request.sid] = user or {}
-    socketio.emit('presence', list(presence.get(room, {}).values()), to=room)
+        return {'ok': False, 'error': 'room required'}
+    error = _authorized_join(room)
+    if error:
+        return {'ok': False, 'error': error}
+    # Presence shows the authenticated user, never a client-supplied one
+    presence.setdefault(room, {})[request.sid] = connections[request.sid]
+    outbound.emit('presence', list(presence.get(room, {}).values()), room)
+    return {'ok': True}
 
 @socketio.on('leave')
 def handle_leave(data):
-    room = data.get('room')
+    room = (data or {}).get('room')
     if not room:
         return
-    socketio.leave_room(room)
+    leave_room(room)
     if room in presence and request.sid in presence[room]:
         presence[room].pop(request.sid, None)
         if not presence[room]:
             presence.pop(room, None)
         else:
-            socketio.emit('presence', list(presence[room].values()), to=room)
+            outbound.emit('presence', list(presence[room].values()), room)
 
 @socketio.on('disconnect')
-def handle_disconnect():
+def handle_disconnect(*_args):
+    connections.pop(request.sid, None)
     # Remove from all rooms on disconnect
     empty_rooms = []
     for room, members in presence.items():
         if request.sid in members:
             members.pop(request.sid, None)
             if members:
-                socketio.emit('presence', list(members.values()), to=room)
+                outbound.emit('presence', list(members.values()), room)
             else:
                 empty_rooms.append(room)
     for r in empty_rooms:
         presence.pop(r, None)
+    outbound.forget(request.sid)
 
 def emit_plan_updated(plan_id: int, payload: dict):
     room = _room_key('plan', plan_id)
-    socketio.emit('plan_updated', payload, to=room)
+    outbound.emit('plan_updated', payload, room)
+
+def emit_group_plan_updated(plan_id: int, payload: dict):
+    room = _room_key('group-plan', plan_id)
+    outbound.emit('group_plan_updated', payload, room)
 
 def notify_user(user_id: int, message: str, type: str = 'info', invite_id: int | None = None):
     note = Notification(user_id=user_id, message=message, type=type, invite_id=invite_id)
     db.session.add(note)
     db.session.commit()
     user_room = _room_key('user', user_id)
-    socketio.emit('notify', {
+    outbound.emit('notify', {
         'id': note.id,
         'message': note.message,
         'type': note.type,
         'invite_id': note.invite_id,
         'created_at': note.created_at.isoformat()
-    }, to=user_room)
+    }, user_room)
+
+
+# --- Live group plan task editing (see app/collab.py) ---
+# Acks carry either {"ok": True, ...} or {"ok": False, "error": ...}.
+
+def _collab_plan(data):
+    """(user_id, plan_id, error) after checking the caller may edit the plan."""
+    user_id = _current_user_id()
+    if user_id is None:
+        return None, None, 'unauthorized'
+    try:
+        plan_id = int(data.get('plan_id'))
+    except (TypeError, ValueError):
+        return user_id, None, 'plan_id required'
+    if not can_join(user_id, _room_key('group-plan', plan_id)):
+        return user_id, None, 'forbidden'
+    return user_id, plan_id, None
+
+def emit_collab_ops(plan_id: int, entries: list):
+    outbound.emit('collab_ops', {'plan_id': plan_id, 'entries': entries}, _room_key('group-plan', plan_id))
+
+@socketio.on('collab_join')
+def handle_collab_join(data):
+    """Join a plan's editing room; the ack carries the current tasks and seq."""
+    _user_id, plan_id, error = _collab_plan(data or {})
+    error = error or _authorized_join(_room_key('group-plan', plan_id))
+    if error:
+        return {'ok': False, 'error': error}
+    state = collab.state(plan_id)
+    if state is None:
+        return {'ok': False, 'error': 'plan not found'}
+    return dict(state, ok=True)
+
+@socketio.on('collab_op')
+def handle_collab_op(data):
+    """Apply one op ({"op": "insert"|"move"|"update"|"delete", ...}) and broadcast it."""
+    user_id, plan_id, error = _collab_plan(data or {})
+    if error:
+        return {'ok': False, 'error': error}
+    try:
+        entries = collab.submit(plan_id, data.get('op'), user_id)
+        db.session.commit()
+    except collab.CollabError as e:
+        db.session.rollback()
+        return {'ok': False, 'error': str(e)}
+    if not entries:
+        return {'ok': True, 'noop': True}
+    emit_collab_ops(plan_id, entries)
+    return {'ok': True, 'seq': entries[0]['seq'], 'op': entries[0]['op']}
+
+@socketio.on('collab_sync')
+def handle_collab_sync(data):
+    """Entries after data["since"]; falls back to the full state if they are gone."""
+    _user_id, plan_id, error = _collab_plan(data or {})
+    if error:
+        return {'ok': False, 'error': error}
+    try:
+        since = int(data.get('since', 0))
+    except (TypeError, ValueError):
+        return {'ok': False, 'error': 'since must be an integer'}
+    entries = collab.ops_since(plan_id, since)
+    if entries is None:
+        return dict(collab.state(plan_id), ok=True, reset=True)
+    return {'ok': True, 'plan_id': plan_id, 'entries': entries}
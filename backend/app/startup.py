@@ -0,0 +1,124 @@
+# -------------------------------------------------------------
+# Why: Production ran `run.py` (debug on) or imported it per gunicorn
+# worker, so every worker built the app, configured mappers and compiled
+# routes on its own, and with AUTO_MIGRATE_ON_START every worker ran
+# `upgrade()` at the same time.
+#
+# Why this design?
+#   - gunicorn.conf.py preloads wsgi.py once in the master; workers fork
+#     from it. Everything that is the same in every worker (imports,
+#     mappers, schemas, the URL map) is built before the fork by warm_up().
+#   - gc.freeze() right before forking moves those objects out of the
+#     collector's generations, so a worker's collections don't write to
+#     (and un-share) the master's pages. Collection is paused while the
+#     master loads so nothing is half-collected when frozen.
+#   - Connections are per process: the master's pool is dropped without
+#     closing the sockets it shares with the children (dispose(close=False)),
+#     then each worker opens WARM_POOL_CONNECTIONS before taking traffic.
+#   - Migrations run once, in the master, under a database lock
+#     (pg_advisory_lock / GET_LOCK / a lock file for SQLite), so several
+#     instances starting together apply them one at a time and the others
+#     find nothing left to do.
+# -------------------------------------------------------------
+import gc
+import os
+import time
+import zlib
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from .extensions import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: SQLite there is development only
+    fcntl = None
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+LOCK_NAME = "study_planner_migrations"
+
+
+@contextmanager
+def advisory_lock(engine, name=LOCK_NAME, timeout=600):
+    """Hold a database-wide named lock (blocking up to `timeout` seconds where supported)."""
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        # Session-level lock: needs a real session, not PgBouncer transaction pooling
+        key = zlib.crc32(name.encode())
+        with engine.connect() as conn:
+            conn.execute(text(f"SET lock_timeout = {int(timeout * 1000)}"))
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+    elif dialect == "mysql":
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}).scalar() != 1:
+                raise TimeoutError(f"could not take lock {name!r} within {timeout}s")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+    elif dialect == "sqlite" and fcntl is not None and engine.url.database not in (None, "", ":memory:"):
+        with open(f"{engine.url.database}.{name}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def migrate_once(app):
+    """Apply pending migrations (alembic upgrade head) while holding the migration lock."""
+    from flask_migrate import Migrate, upgrade
+    if "migrate" not in app.extensions:
+        Migrate(app, db, directory=MIGRATIONS_DIR)
+    with app.app_context():
+        with advisory_lock(db.engine):
+            upgrade(directory=MIGRATIONS_DIR)
+        db.engine.dispose()
+
+
+def warm_up(app):
+    """Build what every worker would otherwise build on its first requests; returns seconds taken."""
+    start = time.perf_counter()
+    from . import schemas
+    configure_mappers()
+    for schema in vars(schemas).values():
+        if isinstance(schema, schemas.BaseSchema):
+            schema.dump([] if schema.many else {})
+    app.url_map.update()
+    # One request through the whole stack: hooks, error handlers, JSON provider
+    app.test_client().get("/api/health")
+    return time.perf_counter() - start
+
+
+def prepare_fork(app):
+    """Master, before the first fork: drop pooled connections and freeze the heap."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    gc.collect()
+    gc.freeze()
+
+
+def init_worker(app, connections):
+    """Worker, after fork: resume garbage collection and open `connections` per pool."""
+    gc.enable()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)  # nothing inherited from the master is reused
+            held = []
+            try:
+                for _ in range(max(0, connections)):
+                    conn = engine.connect()
+                    conn.execute(text("SELECT 1"))
+                    held.append(conn)
+            finally:
+                for conn in held:
+                    conn.close()
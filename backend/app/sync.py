@@ -0,0 +1,173 @@
+# -------------------------------------------------------------
+# Why: Clients re-downloaded whole lists after every socket event or page
+# focus. The change log lets them ask for "what changed since my token"
+# and pay for the changes only, not for the size of their data.
+#
+# Why this design?
+#   - Every insert/update/delete of a synced row (Task, StudyPlan,
+#     GroupPlan, GroupPlanTask, Notification) appends a ChangeLog row from
+#     a session `after_flush` hook on the same connection, so the log
+#     commits or rolls back with the data (as search.py does). The log id
+#     is the sync token; each row names its audience (owner or group).
+#   - /api/sync?since=<token> reads the caller's entries after the token
+#     through (user_id, id) / (group_id, id) indexes, keeps the latest
+#     entry per row and loads current rows with one query per kind.
+#     Deleted rows come back as tombstones.
+#   - Ids are assigned at flush, not commit, so a slow transaction can
+#     commit an id below one already returned. The returned token stops
+#     before entries younger than SYNC_SETTLE_SECONDS; those are sent
+#     again on the next poll (applying a change twice is harmless).
+#   - Joining or leaving a group (including its purge) logs a "group"
+#     entry for that member; reaching it makes the response a reset, since
+#     the client's group rows are now all wrong (missing or no longer
+#     visible) and the group's own entries are filtered by membership.
+#     Reset tokens stop at the settle cutoff too.
+#   - The log keeps SYNC_RETAIN_DAYS (`flask --app manage.py prune-changes`);
+#     an older token gets 410 and the client reloads its lists. Deleting a
+#     group plan tombstones it; its tasks go with it client-side.
+# -------------------------------------------------------------
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import ChangeLog, GroupMembership, GroupPlan, GroupPlanTask, Notification, StudyPlan, Task
+from .schemas import (group_plan_tasks_schema, notifications_schema, plans_schema, sync_group_plans_schema,
+                      tasks_schema)
+
+KINDS = {Task: "task", StudyPlan: "plan", GroupPlan: "group_plan", GroupPlanTask: "group_task",
+         Notification: "notification"}
+MODELS = {kind: model for model, kind in KINDS.items()}
+SCHEMAS = {"task": tasks_schema, "plan": plans_schema, "group_plan": sync_group_plans_schema,
+           "group_task": group_plan_tasks_schema, "notification": notifications_schema}
+
+
+class TokenExpired(Exception):
+    """The token is older than the retained change log."""
+
+
+class MembershipChanged(Exception):
+    """The user joined or left a group after the token; reload the lists."""
+
+
+def _as_int(value):
+    return int(value) if value is not None else None
+
+
+def _audience(conn, obj, group_cache):
+    """(user_id, group_id) of the users who may see a row."""
+    if isinstance(obj, GroupPlan):
+        return None, _as_int(obj.group_id)
+    if isinstance(obj, GroupPlanTask):
+        if obj.plan_id not in group_cache:
+            group_cache[obj.plan_id] = conn.execute(
+                select(GroupPlan.group_id).where(GroupPlan.id == obj.plan_id)).scalar()
+        return None, group_cache[obj.plan_id]
+    return _as_int(obj.user_id), None
+
+
+@event.listens_for(Session, "after_flush", propagate=True)
+def _log_flushed(session, _ctx):
+    changed = [(o, True) for o in session.deleted if type(o) in KINDS]
+    changed += [(o, False) for o in session.new if type(o) in KINDS]
+    changed += [(o, False) for o in session.dirty
+                if type(o) in KINDS and o not in session.deleted and session.is_modified(o)]
+    # Membership changes: audience is the member, row_id the group
+    joined = [(m, False) for m in session.new if isinstance(m, GroupMembership)]
+    joined += [(m, True) for m in session.deleted if isinstance(m, GroupMembership)]
+    if not changed and not joined:
+        return
+    conn = session.connection()
+    # Group plans in this flush (possibly being deleted along with their tasks)
+    group_cache = {o.id: _as_int(o.group_id) for o, _deleted in changed if isinstance(o, GroupPlan)}
+    now = datetime.utcnow()
+    rows = []
+    for obj, deleted in changed:
+        user_id, group_id = _audience(conn, obj, group_cache)
+        rows.append({"kind": KINDS[type(obj)], "row_id": obj.id, "deleted": deleted,
+                     "user_id": user_id, "group_id": group_id, "created_at": now})
+    rows += [{"kind": "group", "row_id": m.group_id, "deleted": deleted, "user_id": _as_int(m.user_id),
+              "group_id": None, "created_at": now} for m, deleted in joined]
+    conn.execute(ChangeLog.__table__.insert(), rows)
+
+
+def log_left_group(group_id, user_ids):
+    """Log members leaving a group whose memberships go by bulk SQL (purges); caller commits."""
+    now = datetime.utcnow()
+    rows = [{"kind": "group", "row_id": group_id, "deleted": True, "user_id": int(user_id), "group_id": None,
+             "created_at": now} for user_id in user_ids]
+    if rows:
+        db.session.execute(ChangeLog.__table__.insert(), rows)
+
+
+def current_token(settle_seconds=0):
+    """Newest log id, stopping before entries younger than settle_seconds."""
+    query = select(ChangeLog.id).order_by(ChangeLog.id.desc()).limit(1)
+    if settle_seconds:
+        query = query.where(ChangeLog.created_at <= datetime.utcnow() - timedelta(seconds=settle_seconds))
+    return db.session.scalar(query) or 0
+
+
+def _serialize(kind, rows):
+    return {item["id"]: item for item in SCHEMAS[kind].dump(rows)}
+
+
+def changes_since(user_id, group_ids, since, limit, settle_seconds):
+    """(changes, next token, more) for one user after token `since`.
+
+    Raises TokenExpired when entries after `since` were already pruned,
+    MembershipChanged when the user joined or left a group since.
+    """
+    oldest = db.session.scalar(select(func.min(ChangeLog.id)))
+    if oldest is not None and since + 1 < oldest:
+        raise TokenExpired()
+    audience = ChangeLog.user_id == user_id
+    if group_ids:
+        audience = or_(audience, ChangeLog.group_id.in_(list(group_ids)))
+    entries = db.session.execute(
+        select(ChangeLog).where(ChangeLog.id > since, audience).order_by(ChangeLog.id).limit(limit + 1)
+    ).scalars().all()
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    settled = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    token = since
+    for entry in entries:
+        if entry.created_at > settled:
+            break
+        token = entry.id
+    # Only page on when the whole page settled; otherwise the next poll resumes
+    more = more and token == entries[-1].id
+    if any(entry.kind == "group" and entry.id <= token for entry in entries):
+        raise MembershipChanged()
+
+    latest = {}
+    for entry in entries:
+        if entry.kind in MODELS:  # "group" entries past the settled token wait for the next poll
+            latest[(entry.kind, entry.row_id)] = entry
+    wanted = {}
+    for (kind, row_id), entry in latest.items():
+        if not entry.deleted:
+            wanted.setdefault(kind, []).append(row_id)
+    data = {}
+    for kind, ids in wanted.items():
+        model = MODELS[kind]
+        data[kind] = _serialize(kind, model.query.filter(model.id.in_(ids)).all())
+
+    changes = []
+    for (kind, row_id), entry in sorted(latest.items(), key=lambda item: item[1].id):
+        row = data.get(kind, {}).get(row_id)
+        if row is None:
+            changes.append({"kind": kind, "id": row_id, "op": "delete"})
+        else:
+            changes.append({"kind": kind, "id": row_id, "op": "upsert", "data": row})
+    return changes, token, more
+
+
+def prune(retain_days):
+    """Delete log entries older than retain_days; returns how many were removed."""
+    cutoff = datetime.utcnow() - timedelta(days=retain_days)
+    removed = ChangeLog.query.filter(ChangeLog.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
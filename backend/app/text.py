@@ -0,0 +1,24 @@
+# -------------------------------------------------------------
+# Why: One normalization for every searchable string, so values written
+# to indexed search columns and the queries run against them agree.
+# -------------------------------------------------------------
+import re
+import unicodedata
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(value):
+    """Lowercase, strip accents and collapse whitespace ("  Zoë  Ann" -> "zoe ann")."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(value))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _WS.sub(" ", stripped.casefold()).strip()
+
+
+def ngrams(value, n=3):
+    """Set of character n-grams of an already normalized string."""
+    if len(value) < n:
+        return {value} if value else set()
+    return {value[i:i + n] for i in range(len(value) - n + 1)}
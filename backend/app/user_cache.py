@@ -0,0 +1,117 @@
+# -------------------------------------------------------------
+# Why: Resolve the JWT identity to a User once per request and keep a
+# small bounded cache across requests, so protected routes get
+# `current_user` without re-issuing primary-key queries.
+#
+# Why this design?
+#   - Flask-JWT-Extended already memoizes the loader result per request;
+#     merging the cached snapshot into the session also puts the user in
+#     SQLAlchemy's identity map, so `db.session.get(User, id)` later in the
+#     same request is answered without SQL.
+#   - Snapshots are detached copies of the column values, never live
+#     session objects, so one request can't see another request's state.
+#   - Entries are evicted when a transaction that updated/deleted the User
+#     commits (ids collected at flush, as in app.recommend); evicting at
+#     flush would let a concurrent request re-cache the old row before the
+#     commit. They also expire after a short TTL to bound staleness across
+#     workers.
+# -------------------------------------------------------------
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from .extensions import db, jwt
+from .models import User
+
+
+class UserLRU:
+    """Thread-safe LRU with a TTL, keyed by id (User snapshots here; also app.membership_cache)."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            snapshot, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._data.pop(user_id, None)
+                return None
+            self._data.move_to_end(user_id)
+            return snapshot
+
+    def put(self, user_id, snapshot):
+        with self._lock:
+            self._data[user_id] = (snapshot, time.monotonic())
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = UserLRU(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 1024)),
+    ttl=int(os.getenv("USER_CACHE_TTL_SECONDS", 300)),
+)
+
+
+def _snapshot(user):
+    """Copy loaded column values into a detached, session-less User."""
+    values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    snap = User(**values)
+    make_transient_to_detached(snap)
+    return snap
+
+
+def load_user(user_id):
+    """Return a session-bound User for `user_id`, hitting the DB only on a cache miss."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    snap = user_cache.get(user_id)
+    if snap is not None:
+        # load=False attaches the snapshot without emitting a SELECT
+        return db.session.merge(snap, load=False)
+    user = db.session.get(User, user_id)
+    if user is not None:
+        user_cache.put(user_id, _snapshot(user))
+    return user
+
+
+@jwt.user_lookup_loader
+def _user_lookup_callback(_jwt_header, jwt_data):
+    return load_user(jwt_data["sub"])
+
+
+@event.listens_for(Session, "after_flush", propagate=True)
+def _collect_users(session, _ctx):
+    ids = session.info.setdefault("user_cache_evict", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            ids.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit", propagate=True)
+@event.listens_for(Session, "after_rollback", propagate=True)
+def _evict_users(session):
+    # Also on rollback: a snapshot cached mid-transaction may hold the
+    # rolled-back values
+    for user_id in session.info.pop("user_cache_evict", ()):
+        user_cache.invalidate(user_id)
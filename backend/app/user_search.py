@@ -0,0 +1,218 @@
+# -------------------------------------------------------------
+# Why: Typeahead search over the user directory (invites, sharing)
+# without scanning `users` on every keystroke.
+#
+# Why this design?
+#   - `users.search_name` holds a normalized fullname and is indexed, so
+#     prefix lookups are index range scans on every backend.
+#   - On Postgres a pg_trgm GIN index (see migration 002) also serves
+#     substring/fuzzy matches ("bob" finds "alice bobson").
+#   - SQLite has no trigram index, so an in-process n-gram inverted index
+#     is built once and kept current from committed User writes (those
+#     committed while it is being built are buffered and replayed). It is
+#     per-process, which is fine for the dev/test deployments that use it,
+#     and reset by create_app (init_user_search) so an app never searches
+#     the users of another app's database in the same process.
+# -------------------------------------------------------------
+import bisect
+import heapq
+import threading
+
+from sqlalchemy import event, func, or_, case
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import User
+from .text import normalize_text, ngrams
+
+MAX_RESULTS = 20
+
+
+def _rank(name, query):
+    """Sort key: full prefix, then word prefix, then substring; shorter first."""
+    if name.startswith(query):
+        tier = 0
+    elif f" {query}" in name:
+        tier = 1
+    else:
+        tier = 2
+    return (tier, len(name), name)
+
+
+class NgramIndex:
+    """Trigram inverted index plus a sorted name list for short prefixes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}      # user_id -> normalized name
+        self._grams = {}      # trigram -> set(user_id)
+        self._sorted = []     # [(name, user_id)] for bisect prefix lookups
+        self._backlog = None  # changes committed during a build, else None
+        self.ready = False
+
+    def begin_build(self):
+        """Buffer committed changes until build(); call before reading its rows."""
+        with self._lock:
+            self._backlog = []
+
+    def build(self, rows):
+        with self._lock:
+            self._names.clear(); self._grams.clear()
+            for user_id, name in rows:
+                self._add(user_id, name or "")
+            # Replay what committed while the rows were read (maybe after them)
+            for op, user_id, name in self._backlog or ():
+                self._remove(user_id)
+                if op == "upsert":
+                    self._add(user_id, name or "")
+            self._backlog = None
+            self._sorted = sorted((n, i) for i, n in self._names.items())
+            self.ready = True
+
+    def reset(self):
+        """Drop everything; the next search rebuilds from the database."""
+        with self._lock:
+            self._names.clear(); self._grams.clear()
+            self._sorted = []
+            self._backlog = None
+            self.ready = False
+
+    def _add(self, user_id, name):
+        self._names[user_id] = name
+        for g in ngrams(name):
+            self._grams.setdefault(g, set()).add(user_id)
+
+    def _remove(self, user_id):
+        name = self._names.pop(user_id, None)
+        if name is None:
+            return
+        for g in ngrams(name):
+            bucket = self._grams.get(g)
+            if bucket:
+                bucket.discard(user_id)
+                if not bucket:
+                    del self._grams[g]
+        pos = bisect.bisect_left(self._sorted, (name, user_id))
+        if pos < len(self._sorted) and self._sorted[pos] == (name, user_id):
+            del self._sorted[pos]
+
+    def apply(self, changes):
+        """Apply committed ("upsert" | "remove", user_id, name) changes.
+
+        Buffered during a build; dropped before the first one (it reads them).
+        """
+        with self._lock:
+            if self._backlog is not None:
+                self._backlog.extend(changes)
+                return
+            if not self.ready:
+                return
+            for op, user_id, name in changes:
+                self._remove(user_id)
+                if op == "upsert":
+                    self._add(user_id, name or "")
+                    bisect.insort(self._sorted, (name or "", user_id))
+
+    def search(self, query, limit):
+        with self._lock:
+            if len(query) < 3:
+                # Too short for trigrams: prefix range on the sorted list
+                pos = bisect.bisect_left(self._sorted, (query, -1))
+                out = []
+                while pos < len(self._sorted) and len(out) < limit:
+                    name, user_id = self._sorted[pos]
+                    if not name.startswith(query):
+                        break
+                    out.append(user_id)
+                    pos += 1
+                return out
+            postings = sorted((self._grams.get(g, set()) for g in ngrams(query)), key=len)
+            if not postings or not postings[0]:
+                return []
+            candidates = set(postings[0])
+            for bucket in postings[1:]:
+                candidates &= bucket
+                if not candidates:
+                    return []
+            hits = ((self._names[i], i) for i in candidates if query in self._names[i])
+            best = heapq.nsmallest(limit, hits, key=lambda h: _rank(h[0], query))
+            return [user_id for _name, user_id in best]
+
+
+ngram_index = NgramIndex()
+
+
+def init_user_search(app):
+    ngram_index.reset()
+
+
+def _ensure_ngram_index():
+    if not ngram_index.ready:
+        ngram_index.begin_build()
+        try:
+            ngram_index.build(db.session.query(User.id, User.search_name).yield_per(10000))
+        except Exception:
+            ngram_index.reset()
+            raise
+
+
+def search_users(query, limit=10):
+    """Return up to `limit` Users whose normalized name matches `query`."""
+    q = normalize_text(query)
+    if not q:
+        return []
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    dialect = db.engine.dialect.name
+
+    if dialect == "sqlite":
+        _ensure_ngram_index()
+        ids = ngram_index.search(q, limit)
+        if not ids:
+            return []
+        users = {u.id: u for u in User.query.filter(User.id.in_(ids)).all()}
+        return [users[i] for i in ids if i in users]
+
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    prefix = User.search_name.like(f"{escaped}%", escape="\\")
+    if dialect == "postgresql" and len(q) >= 3:
+        # GIN trigram index serves the substring match; prefix hits rank first
+        match = User.search_name.like(f"%{escaped}%", escape="\\")
+        order = (case((prefix, 0), else_=1), func.similarity(User.search_name, q).desc(), User.search_name)
+        return User.query.filter(or_(prefix, match)).order_by(*order).limit(limit).all()
+    return User.query.filter(prefix).order_by(User.search_name).limit(limit).all()
+
+
+def find_user_by_identifier(identifier):
+    """Resolve an invite identifier (email or exact full name) via indexed columns."""
+    ident = (identifier or "").strip()
+    if not ident:
+        return None
+    if "@" in ident:
+        return User.query.filter_by(email=ident.lower()).first()
+    return User.query.filter_by(search_name=normalize_text(ident)).first()
+
+
+# --- Keep the SQLite n-gram index in step with committed writes ---
+
+@event.listens_for(Session, "after_flush", propagate=True)
+def _collect_user_changes(session, _ctx):
+    # Collected even before the index is built: a build may start before this commits
+    pending = session.info.setdefault("user_search_pending", [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, User):
+            pending.append(("upsert", obj.id, obj.search_name))
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            pending.append(("remove", obj.id, None))
+
+
+@event.listens_for(Session, "after_commit", propagate=True)
+def _apply_user_changes(session):
+    changes = session.info.pop("user_search_pending", None)
+    if changes:
+        ngram_index.apply(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback", propagate=True)
+def _discard_user_changes(session, _previous_transaction):
+    session.info.pop("user_search_pending", None)
@@ -0,0 +1,46 @@
+"""Micro-benchmarks for app/planner.py (pytest-benchmark).
+
+Usage (from backend/):
+  pip install pytest-benchmark
+  python -m pytest benchmarks/bench_planner.py --benchmark-only
+  python -m pytest benchmarks/bench_planner.py --benchmark-save=planner
+  python -m pytest benchmarks/bench_planner.py --benchmark-compare
+
+Task counts run from 10 to 100k across 1-90 days; `--benchmark-save` keeps
+runs under .benchmarks/ so algorithm changes can be compared with numbers.
+"""
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.planner import build_plan, rebalance_plan  # noqa: E402
+
+TASK_COUNTS = (10, 100, 1000, 10000, 100000)
+DAY_COUNTS = (1, 7, 30, 90)
+
+
+def make_tasks(count, seed=0):
+    rng = random.Random(seed)
+    return [{"title": f"Task {i}", "estimate_minutes": rng.choice((15, 30, 45, 60, 90, 120)),
+             "description": ""} for i in range(count)]
+
+
+@pytest.mark.parametrize("days", DAY_COUNTS)
+@pytest.mark.parametrize("count", TASK_COUNTS)
+def test_build_plan(benchmark, count, days):
+    tasks = make_tasks(count)
+    benchmark.group = f"build_plan[{count}]"
+    content = benchmark(build_plan, tasks, days)
+    assert sum(len(v) for v in content.values()) == count
+
+
+@pytest.mark.parametrize("local_search", (False, True), ids=("lpt", "local_search"))
+@pytest.mark.parametrize("days", (7, 30))
+@pytest.mark.parametrize("count", TASK_COUNTS)
+def test_rebalance_plan(benchmark, count, days, local_search):
+    content = build_plan(make_tasks(count), days)
+    benchmark.group = f"rebalance_plan[{count}]"
+    rebuilt = benchmark(rebalance_plan, content, local_search=local_search)
+    assert sum(len(v) for v in rebuilt.values()) == count
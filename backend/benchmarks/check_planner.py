@@ -0,0 +1,193 @@
+"""Property-based checks for app/planner.py (hypothesis).
+
+Usage (from backend/):
+  pip install hypothesis
+  python -m pytest benchmarks/check_planner.py
+
+Invariants, for any task list and day count:
+  - every task is placed exactly once (nothing dropped or duplicated)
+  - the plan has exactly max(1, days) days, keyed "Day 1".."Day N"
+  - per-day load is balanced: item counts differ by at most one
+  - output is deterministic, and regeneration keeps the same items and days
+
+and for regeneration (rebalance_plan / balance):
+  - the busiest day is within one task of the average (LPT's list-scheduling
+    bound) and never busier than before
+  - pinned items keep their day; blocked days hold only pinned items
+  - local search never does worse than plain LPT
+  - regenerating an already rebalanced plan changes nothing
+  - items keep their other keys (group shares' group_task_id, due, priority)
+
+and for splitting a group plan (assign_members / schedule_items):
+  - every item goes to exactly one member, and after each deadline member
+    loads differ by at most the longest task
+  - a member's schedule has exactly max(1, days) days, in deadline order
+"""
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("hypothesis")
+
+from hypothesis import given, settings, strategies as st  # noqa: E402
+
+from app.planner import (assign_members, balance, build_plan, day_key, normalize_item, plan_diff,  # noqa: E402
+                         plan_item, plan_items, rebalance_plan, schedule_items)
+
+task_dicts = st.fixed_dictionaries({
+    "title": st.text(min_size=1, max_size=20),
+    "estimate_minutes": st.integers(min_value=1, max_value=600),
+    "description": st.text(max_size=20),
+})
+tasks = st.lists(st.one_of(task_dicts, st.text(min_size=1, max_size=20)), max_size=300)
+days = st.integers(min_value=-2, max_value=60)
+
+
+def _key(item):
+    return (item["task"], item["duration"], item["notes"])
+
+
+def _placed(content):
+    return Counter(_key(item) for items in content.values() for item in items)
+
+
+@settings(max_examples=300, deadline=None)
+@given(tasks, days)
+def test_every_task_placed_exactly_once(task_list, n):
+    content = build_plan(task_list, n)
+    assert _placed(content) == Counter(_key(normalize_item(t)) for t in task_list)
+
+
+@settings(max_examples=300, deadline=None)
+@given(tasks, days)
+def test_day_keys(task_list, n):
+    content = build_plan(task_list, n)
+    assert list(content) == [day_key(i) for i in range(1, max(1, n) + 1)]
+
+
+@settings(max_examples=300, deadline=None)
+@given(tasks, days)
+def test_per_day_balance(task_list, n):
+    sizes = [len(items) for items in build_plan(task_list, n).values()]
+    assert max(sizes) - min(sizes) <= 1
+
+
+@settings(max_examples=200, deadline=None)
+@given(tasks, days)
+def test_deterministic(task_list, n):
+    assert build_plan(task_list, n) == build_plan(list(task_list), n)
+
+
+def _loads(content):
+    return [sum(max(0, item["duration"]) for item in items) for items in content.values()]
+
+
+plans = st.builds(build_plan, tasks, st.integers(min_value=1, max_value=30))
+durations = st.lists(st.integers(min_value=0, max_value=600), max_size=200)
+
+
+@settings(max_examples=300, deadline=None)
+@given(plans)
+def test_rebalance_keeps_items_and_days(content):
+    rebuilt = rebalance_plan(content)
+    assert list(rebuilt) == list(content)
+    assert _placed(rebuilt) == _placed(content)
+
+
+@settings(max_examples=300, deadline=None)
+@given(plans, st.booleans())
+def test_rebalance_bound(content, local_search):
+    loads = _loads(rebalance_plan(content, local_search=local_search))
+    items = [item for day in content.values() for item in day]
+    longest = max((item["duration"] for item in items), default=0)
+    assert max(loads) <= sum(loads) / len(loads) + longest
+    assert max(loads) <= max(_loads(content))
+
+
+@settings(max_examples=300, deadline=None)
+@given(durations, st.integers(min_value=1, max_value=20))
+def test_local_search_never_worse(values, n):
+    def peak(assign):
+        loads = [0] * n
+        for i, d in enumerate(assign):
+            loads[d] += values[i]
+        return max(loads)
+    assert peak(balance(values, n, local_search=True)) <= peak(balance(values, n))
+
+
+@settings(max_examples=300, deadline=None)
+@given(plans, st.data())
+def test_rebalance_constraints(content, data):
+    keys = list(content)
+    blocked = data.draw(st.lists(st.sampled_from(keys), max_size=len(keys) - 1, unique=True))
+    refs = [{"day": key, "index": i} for key in keys for i in range(len(content[key]))]
+    pinned = data.draw(st.lists(st.sampled_from(refs), max_size=5,
+                                unique_by=lambda r: (r["day"], r["index"]))) if refs else []
+    rebuilt = rebalance_plan(content, pinned=pinned, blocked_days=blocked)
+    for ref in pinned:
+        assert normalize_item(content[ref["day"]][ref["index"]]) in rebuilt[ref["day"]]
+    for key in blocked:
+        kept = Counter(_key(normalize_item(content[key][r["index"]])) for r in pinned if r["day"] == key)
+        assert Counter(_key(item) for item in rebuilt[key]) == kept
+
+
+@settings(max_examples=200, deadline=None)
+@given(plans, st.booleans())
+def test_rebalance_is_stable(content, local_search):
+    once = rebalance_plan(content, local_search=local_search)
+    assert rebalance_plan(content, local_search=local_search) == once
+    assert plan_diff(once, rebalance_plan(once, local_search=local_search)) == {}
+
+
+def test_plan_items_orders_days_numerically():
+    content = {day_key(i): [{"task": str(i), "duration": 30, "notes": ""}] for i in (10, 2, 1)}
+    assert [item["task"] for item in plan_items(content)] == ["1", "2", "10"]
+
+
+group_items = st.lists(st.fixed_dictionaries({
+    "task": st.text(min_size=1, max_size=10),
+    "duration": st.integers(min_value=1, max_value=240),
+    "due": st.one_of(st.none(), st.dates().map(lambda d: d.isoformat())),
+    "priority": st.integers(min_value=1, max_value=5),
+}), max_size=200)
+
+
+@settings(max_examples=300, deadline=None)
+@given(group_items, st.integers(min_value=1, max_value=12))
+def test_assign_members_balanced(items, n):
+    assign = assign_members(items, list(range(n)))
+    assert len(assign) == len(items) and all(0 <= m < n for m in assign)
+    longest = max((item["duration"] for item in items), default=0)
+    for cutoff in sorted({item["due"] for item in items if item["due"]}):
+        loads = [0] * n
+        for item, m in zip(items, assign):
+            if item["due"] and item["due"] <= cutoff:
+                loads[m] += item["duration"]
+        assert max(loads) - min(loads) <= longest
+    loads = Counter()
+    for item, m in zip(items, assign):
+        loads[m] += item["duration"]
+    assert max(loads.values(), default=0) - min((loads[m] for m in range(n)), default=0) <= longest
+
+
+@settings(max_examples=300, deadline=None)
+@given(group_items, days, st.one_of(st.none(), st.integers(min_value=1, max_value=600)))
+def test_schedule_items(items, n, daily_minutes):
+    content = schedule_items(items, n, daily_minutes, start="2000-01-01")
+    assert list(content) == [day_key(k) for k in range(1, max(1, n) + 1)]
+    placed = [item for key in content for item in content[key]]
+    assert Counter(item["task"] for item in placed) == Counter(item["task"] for item in items)
+    dues = [item["due"] or "9999" for item in placed]
+    assert dues == sorted(dues)
+
+
+@settings(max_examples=200, deadline=None)
+@given(group_items, days, st.booleans())
+def test_rebalance_keeps_share_keys(items, n, local_search):
+    share = schedule_items([dict(item, group_task_id=i) for i, item in enumerate(items)], n)
+    rebuilt = rebalance_plan(share, local_search=local_search)
+    placed = sorted((item for day in rebuilt.values() for item in day), key=lambda item: item["group_task_id"])
+    assert placed == sorted((plan_item(item) for day in share.values() for item in day),
+                            key=lambda item: item["group_task_id"])
+    moved = {key for key in share if [plan_item(item) for item in share[key]] != rebuilt[key]}
+    assert set(plan_diff(share, rebuilt)) == moved
@@ -0,0 +1,72 @@
+"""Shared helpers for the benchmark scripts: percentiles, summaries, result files."""
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Latency percentiles in ms plus throughput for one scenario."""
+    return {
+        'ops': len(latencies),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_ops_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def timed(fn, iterations):
+    """Run fn() `iterations` times; return (latencies, elapsed, errors)."""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            ok = fn()
+        except Exception:
+            ok = False
+        if ok is False:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - started, errors
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def write_results(name, payload, output=None):
+    """Save results as JSON (default: results/<name>-<commit>.json) and return the path."""
+    commit = git_commit()
+    payload = dict(payload, meta={
+        'commit': commit,
+        'recorded_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+    })
+    path = output or os.path.join(RESULTS_DIR, f'{name}-{commit}.json')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
@@ -0,0 +1,71 @@
+"""Diff two benchmark result files and flag regressions.
+
+Usage (from backend/):
+  python -m benchmarks.compare results/api-small-abc123.json results/api-small-def456.json
+  python -m benchmarks.compare OLD NEW --metric p95_ms --threshold 15
+
+Exits with status 1 when any scenario's metric got worse by more than
+--threshold percent (or gained errors), so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+# Metrics where a larger number is better; everything else is latency-like
+HIGHER_IS_BETTER = {'throughput_ops_s', 'throughput_rps'}
+
+
+def _scenarios(payload):
+    """Normalize both result layouts ({'scenarios': {...}} and pool_load's list of runs)."""
+    if 'scenarios' in payload:
+        return payload['scenarios']
+    return {f"{run['profile']}@{run['concurrency']}": run for run in payload.get('results', [])}
+
+
+def compare(old, new, metric, threshold):
+    """Return (rows, regressed) where rows are (scenario, old, new, change_pct, flag)."""
+    before, after = _scenarios(old), _scenarios(new)
+    rows, regressed = [], False
+    for name in sorted(set(before) | set(after)):
+        a, b = before.get(name, {}).get(metric), after.get(name, {}).get(metric)
+        if a is None or b is None:
+            rows.append((name, a, b, None, 'missing'))
+            continue
+        change = ((b - a) / a * 100.0) if a else 0.0
+        worse = -change if metric in HIGHER_IS_BETTER else change
+        flag = ''
+        if worse > threshold:
+            flag, regressed = 'REGRESSION', True
+        elif worse < -threshold:
+            flag = 'improved'
+        errors = ('errors', 'timeouts')
+        if sum(after[name].get(k, 0) for k in errors) > sum(before[name].get(k, 0) for k in errors):
+            flag, regressed = (flag + ' +errors').strip(), True
+        rows.append((name, a, b, change, flag))
+    return rows, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--metric', default='p95_ms')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed change in percent')
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"{old.get('meta', {}).get('commit', '?')} -> {new.get('meta', {}).get('commit', '?')}"
+          f"  ({args.metric}, threshold {args.threshold:g}%)")
+    rows, regressed = compare(old, new, args.metric, args.threshold)
+    for name, a, b, change, flag in rows:
+        pct = f"{change:+7.1f}%" if change is not None else '      -'
+        print(f"  {name:32s} {a!s:>10} -> {b!s:>10} {pct}  {flag}")
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
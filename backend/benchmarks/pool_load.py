@@ -0,0 +1,102 @@
+"""Pool saturation scenario: many concurrent greenlets sharing one worker's pool.
+
+Each simulated request checks out a connection, runs a query and holds the
+connection for --hold-ms (standing in for ORM work + serialization), the way
+a gevent worker does under load. The same load is run against the old
+implicit QueuePool(5 + 10) and the configured DB_POOL_* settings, and checkout
+wait percentiles / timeouts / throughput are reported as JSON.
+
+Usage (from backend/):
+  python -m benchmarks.pool_load --concurrency 200 --requests 2000 --hold-ms 20
+  DATABASE_URL=postgresql://... python -m benchmarks.pool_load --pool-size 40 --max-overflow 40
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import gevent
+from gevent.pool import Pool
+from sqlalchemy import exc, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+_tmp_db = None
+if not os.environ.get('DATABASE_URL'):
+    _tmp_db = os.path.join(tempfile.mkdtemp(), 'pool_load.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{_tmp_db}'
+
+from app.main import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from benchmarks.common import percentile, write_results  # noqa: E402
+
+
+def run_profile(name, overrides, args):
+    # Measures pool behaviour, not the limiter: every request is the same client
+    app = create_app(dict(overrides, RATE_LIMIT_ENABLED=False))
+    waits, timeouts = [], [0]
+    with app.app_context():
+        engine = db.engine
+
+    def one_request():
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                waits.append(time.perf_counter() - start)
+                conn.execute(text('SELECT 1'))
+                gevent.sleep(args.hold_ms / 1000.0)
+        except exc.TimeoutError:
+            timeouts[0] += 1
+
+    with app.app_context():
+        engine.dispose()
+        pool = Pool(args.concurrency)
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            pool.spawn(one_request)
+        pool.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+    return {
+        'profile': name,
+        'pool_size': overrides.get('DB_POOL_SIZE'),
+        'max_overflow': overrides.get('DB_MAX_OVERFLOW'),
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'hold_ms': args.hold_ms,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(args.requests / elapsed, 1),
+        'wait_p50_ms': round(percentile(waits, 50) * 1000, 2),
+        'wait_p95_ms': round(percentile(waits, 95) * 1000, 2),
+        'wait_p99_ms': round(percentile(waits, 99) * 1000, 2),
+        'timeouts': timeouts[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--hold-ms', type=float, default=20)
+    parser.add_argument('--pool-size', type=int, default=int(os.getenv('DB_POOL_SIZE', 50)))
+    parser.add_argument('--max-overflow', type=int, default=int(os.getenv('DB_MAX_OVERFLOW', 50)))
+    parser.add_argument('--output', help='JSON path (default: benchmarks/results/pool_load-<commit>.json)')
+    args = parser.parse_args()
+
+    profiles = [
+        ('implicit_default', {'DB_POOL_SIZE': 5, 'DB_MAX_OVERFLOW': 10, 'DB_POOL_TIMEOUT': 30}),
+        ('tuned', {'DB_POOL_SIZE': args.pool_size, 'DB_MAX_OVERFLOW': args.max_overflow}),
+    ]
+    results = [run_profile(name, overrides, args) for name, overrides in profiles]
+    print(json.dumps(results, indent=2))
+    print('saved', write_results('pool_load', {'scenario': 'pool_load', 'results': results}, args.output))
+    if _tmp_db and os.path.exists(_tmp_db):
+        os.remove(_tmp_db)
+
+
+if __name__ == '__main__':
+    main()
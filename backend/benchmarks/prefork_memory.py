@@ -0,0 +1,128 @@
+"""Per-worker memory and first-request latency of forked workers (Linux).
+
+Forks --workers children the way gunicorn does and, in each, serves a few
+requests, runs a full collection and reads /proc/self/smaps_rollup. Three
+ways of starting a worker are compared:
+  cold     each child builds its own app after the fork (no preload_app)
+  preload  the master builds and warms the app; children inherit it
+  frozen   as preload, plus gc.freeze() before the fork (gunicorn.conf.py)
+USS (private memory) is what each extra worker really costs; PSS splits the
+shared pages between processes.
+
+Usage (from backend/):
+  python -m benchmarks.prefork_memory --workers 4
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'prefork.db')}"
+os.environ.setdefault('JWT_SECRET_KEY', 'prefork-benchmark-secret-key-0123456789abcdef')
+
+from benchmarks.common import write_results  # noqa: E402
+
+
+def _memory_kb():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {'uss_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), 'pss_kb': fields.get('Pss', 0)}
+
+
+def _serve(app, requests):
+    from flask_jwt_extended import create_access_token
+    client = app.test_client()
+    start = time.perf_counter()
+    client.get('/api/health')
+    first_ms = (time.perf_counter() - start) * 1000
+    with app.app_context():
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity='1')}
+    start = time.perf_counter()
+    client.get('/api/tasks', headers=headers)
+    first_db_ms = (time.perf_counter() - start) * 1000
+    for _ in range(requests):
+        client.get('/api/tasks', headers=headers)
+    gc.collect()
+    return {'first_request_ms': round(first_ms, 2), 'first_db_request_ms': round(first_db_ms, 2), **_memory_kb()}
+
+
+def _worker(mode, app, requests):
+    if mode == 'cold':
+        from app.main import create_app
+        app = create_app({'RATE_LIMIT_ENABLED': False})
+    else:
+        from app.startup import init_worker
+        init_worker(app, 1)
+    return _serve(app, requests)
+
+
+def run_mode(mode, workers, requests):
+    app = None
+    if mode != 'cold':
+        gc.disable()
+        from wsgi import app
+        app.config['RATE_LIMIT_ENABLED'] = False
+        if mode == 'frozen':
+            from app.startup import prepare_fork
+            prepare_fork(app)
+    samples = [_in_child(_worker, mode, app, requests) for _ in range(workers)]
+    return {key: round(sum(s[key] for s in samples) / len(samples), 2) for key in samples[0]}
+
+
+def _in_child(fn, *args):
+    """fn(*args) in a forked process; returns its JSON result."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.write(write_fd, json.dumps(fn(*args)).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        result = json.loads(f.read())
+    os.waitpid(pid, 0)
+    return result
+
+
+def _seed():
+    from app.main import create_app
+    from app.extensions import db
+    from app.models import User
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if db.session.get(User, 1) is None:
+            db.session.add(User(id=1, fullname='Bench', email='bench@prefork.local', password_hash='!'))
+            db.session.commit()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help='requests per worker before measuring')
+    parser.add_argument('--modes', default='cold,preload,frozen')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    _in_child(_seed)
+    results = {}
+    # Each mode runs in its own process, forked before anything imported the app
+    for mode in [m for m in args.modes.split(',') if m]:
+        results[mode] = _in_child(run_mode, mode, args.workers, args.requests)
+        print(f"{mode:8s} {json.dumps(results[mode])}")
+    print('saved', write_results('prefork_memory', {'scenario': 'prefork_memory', 'workers': args.workers,
+                                                    'results': results}, args.output))
+
+
+if __name__ == '__main__':
+    main()
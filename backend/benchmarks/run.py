@@ -0,0 +1,190 @@
+"""API and Socket.IO benchmark runner.
+
+Seeds a SQLite file (default) or the database in DATABASE_URL, then drives
+the real create_app() through the Flask test client and Socket.IO test
+clients. Reports p50/p95/p99 latency and throughput per scenario and saves
+them as JSON under benchmarks/results/ so runs can be diffed across commits
+with `python -m benchmarks.compare`.
+
+Usage (from backend/):
+  python -m benchmarks.run --profile small
+  python -m benchmarks.run --profile full --db sqlite:////tmp/bench_full.db
+  python -m benchmarks.run --reuse --scenarios task_listing,presence_churn
+  DATABASE_URL=postgresql://localhost/bench python -m benchmarks.run --profile full
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+SCENARIOS = ('task_listing', 'dashboard', 'plan_generation', 'invite_flow', 'notification_fanout', 'presence_churn')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', default='small', help='tiny | small | full (see benchmarks/seed.py)')
+    parser.add_argument('--db', help='database URL (default: DATABASE_URL, else a temp SQLite file)')
+    parser.add_argument('--reuse', action='store_true', help='skip seeding; reuse an already seeded --db')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--socket-clients', type=int, default=50)
+    parser.add_argument('--output', help='JSON path (default: benchmarks/results/api-<profile>-<commit>.json)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db_url = args.db or os.environ.get('DATABASE_URL') or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from app.main import create_app
+    from app.extensions import db, socketio
+    from app.models import GroupMembership
+    from app.search import create_schema
+    from app.sockets import notify_user
+    from benchmarks.common import summarize, timed, write_results
+    from benchmarks.seed import seed, PROFILES
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': db_url, 'RATE_LIMIT_ENABLED': False})
+    spec = PROFILES[args.profile]
+    rng = random.Random(7)
+    results = {}
+
+    with app.app_context():
+        if not args.reuse:
+            db.drop_all()
+            db.create_all()
+            with db.engine.begin() as conn:
+                create_schema(conn)
+            seed_info = seed(db, args.profile, log=lambda m: print('  seeded', m))
+        else:
+            seed_info = {'profile': args.profile, 'reused': True}
+        tokens = {}
+
+        def auth(uid):
+            if uid not in tokens:
+                tokens[uid] = {'Authorization': 'Bearer ' + create_access_token(identity=str(uid))}
+            return tokens[uid]
+
+        large_group = (seed_info.get('large_group_ids') or [spec['groups'] + 1])[0]
+        fanout_members = [m for (m,) in db.session.query(GroupMembership.user_id)
+                          .filter_by(group_id=large_group).all()]
+        db.session.remove()
+
+    client = app.test_client()
+    wanted = [s for s in args.scenarios.split(',') if s]
+    n = args.iterations
+    user_ids = list(range(1, spec['users'] + 1))
+
+    def run(name, fn, iterations):
+        latencies, elapsed, errors = timed(fn, iterations)
+        results[name] = summarize(latencies, elapsed, errors)
+        print(f"{name:22s} {json.dumps(results[name])}")
+
+    # Tokens are minted up front (create_access_token needs an app context)
+    with app.app_context():
+        for uid in user_ids:
+            auth(uid)
+
+    if 'task_listing' in wanted:
+        run('task_listing', lambda: client.get('/api/tasks', headers=auth(rng.choice(user_ids))).status_code == 200, n)
+        run('task_listing_due_today',
+            lambda: client.get('/api/tasks?due_today=true', headers=auth(rng.choice(user_ids))).status_code == 200, n)
+        run('task_next', lambda: client.get('/api/tasks/next', headers=auth(rng.choice(user_ids))).status_code == 200, n)
+
+    if 'dashboard' in wanted:
+        waterfall = ('/api/auth/me', '/api/tasks', '/api/plans', '/api/groups', '/api/invites/pending',
+                     '/api/notifications')
+
+        def dashboard_waterfall():
+            headers = auth(rng.choice(user_ids))
+            return all(client.get(path, headers=headers).status_code == 200 for path in waterfall)
+
+        run('dashboard_waterfall', dashboard_waterfall, n)
+        run('dashboard_bootstrap',
+            lambda: client.get('/api/bootstrap', headers=auth(rng.choice(user_ids))).status_code == 200, n)
+        run('dashboard_agenda_week',
+            lambda: client.get('/api/agenda?tz=Europe/Berlin',
+                               headers=auth(rng.choice(user_ids))).status_code == 200, n)
+
+    if 'plan_generation' in wanted:
+        run('plan_generation_db', lambda: client.post('/api/plans/generate', json={'days': 7, 'save': False},
+                                                      headers=auth(rng.choice(user_ids))).status_code == 200, n)
+        payload = {'days': 14, 'save': False,
+                   'tasks': [{'title': f'T{i}', 'estimate_minutes': 15 + i % 90} for i in range(2000)]}
+        # Above JOB_INLINE_PLAN_TASKS this measures the enqueue (202), not the planning
+        run('plan_generation_2k_payload',
+            lambda: client.post('/api/plans/generate', json=payload, headers=auth(1)).status_code in (200, 202),
+            max(n // 10, 10))
+
+    if 'invite_flow' in wanted:
+        invite_group = seed_info.get('invite_group_id')
+        invitees = iter(user_ids[1:])
+
+        def invite_once():
+            invitee = next(invitees)
+            r = client.post('/api/invites/send', headers=auth(1),
+                            json={'group_id': invite_group, 'identifier': f'user{invitee}@bench.local'})
+            if r.status_code != 201:
+                return False
+            r = client.post(f"/api/invites/{r.json['id']}/respond", json={'action': 'accept'},
+                            headers=auth(invitee))
+            return r.status_code == 200
+
+        if invite_group:
+            run('invite_flow', invite_once, min(n, len(user_ids) - 1))
+
+    if 'notification_fanout' in wanted:
+        listeners = [socketio.test_client(app, auth={'token': auth(uid)['Authorization'][7:]})
+                     for uid in fanout_members[:args.socket_clients]]
+        for uid, sc in zip(fanout_members, listeners):
+            sc.emit('join', {'room': f'user:{uid}'})
+
+        def fanout():
+            with app.app_context():
+                for uid in fanout_members:
+                    notify_user(uid, 'Benchmark fan-out', 'info')
+            for sc in listeners:
+                sc.get_received()
+
+        run(f'notification_fanout_{len(fanout_members)}', fanout, max(n // 50, 3))
+        for sc in listeners:
+            sc.disconnect()
+
+    if 'presence_churn' in wanted:
+        with app.app_context():
+            from app.models import StudyPlan
+            own_plan = {uid: pid for pid, uid in db.session.query(StudyPlan.id, StudyPlan.user_id)}
+        # Each client joins its own plan's room: other users' private plans are not joinable.
+        clients = [(uid, socketio.test_client(app, auth={'token': auth(uid)['Authorization'][7:]}))
+                   for uid in user_ids[:args.socket_clients] if uid in own_plan]
+
+        def churn():
+            uid, sc = rng.choice(clients)
+            room = f'plan:{own_plan[uid]}'
+            sc.emit('join', {'room': room}, callback=True)
+            sc.emit('leave', {'room': room})
+
+        run(f'presence_churn_{len(clients)}_clients', churn, n * 5)
+        for _uid, sc in clients:
+            sc.disconnect()
+
+    dialect = db_url.split(':', 1)[0]
+    path = write_results(f'api-{args.profile}', {
+        'suite': 'api',
+        'profile': args.profile,
+        'dialect': dialect,
+        'seed': seed_info,
+        'iterations': n,
+        'scenarios': results,
+    }, args.output)
+    print('saved', path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Bulk seeding of realistic data volumes for the benchmarks.
+
+Rows are written with Core executemany in large batches (no ORM events),
+so the 'full' profile (10k users, 1M tasks) seeds in minutes rather than
+hours. The full-text search index is not populated here; run
+`flask --app manage.py reindex-search` if a scenario needs it.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app.models import (User, Task, StudyPlan, StudyGroup, GroupMembership, GroupPlan,
+                        GroupPlanTask, Notification)
+from app.text import normalize_text
+
+PROFILES = {
+    # users, tasks per user, plans per user, regular groups x size, large groups x size,
+    # notifications per user, "deep history" users x notifications each
+    'tiny': dict(users=200, tasks_per_user=20, plans_per_user=2, groups=10, group_size=10,
+                 large_groups=1, large_group_size=100, notes_per_user=5, deep_users=2, deep_notes=500),
+    'small': dict(users=1000, tasks_per_user=20, plans_per_user=3, groups=50, group_size=15,
+                  large_groups=2, large_group_size=500, notes_per_user=20, deep_users=5, deep_notes=5000),
+    'full': dict(users=10000, tasks_per_user=100, plans_per_user=5, groups=500, group_size=20,
+                 large_groups=5, large_group_size=2000, notes_per_user=50, deep_users=20, deep_notes=50000),
+}
+
+BATCH = 10000
+WORDS = ('algebra calculus chemistry physics biology history essay lab review exam quiz chapter '
+         'reading notes flashcards problem set lecture project draft outline revise practice').split()
+FIRST = ('anna bob carl dina erik fatima george hana ivan julia kofi liam mia noah olga priya '
+         'quinn rosa sam tara uma victor wen xavier yara zoe').split()
+
+
+def _insert(conn, table, rows):
+    for i in range(0, len(rows), BATCH):
+        conn.execute(table.insert(), rows[i:i + BATCH])
+
+
+def _title(rng, n=3):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def seed(db, profile='small', seed_value=42, log=print):
+    """Populate an empty schema; returns a dict describing what was created."""
+    spec = PROFILES[profile]
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    password = generate_password_hash('benchmark')
+    started = time.perf_counter()
+    info = {'profile': profile}
+
+    with db.engine.begin() as conn:
+        users = []
+        for uid in range(1, spec['users'] + 1):
+            name = f"{rng.choice(FIRST).capitalize()} {rng.choice(FIRST).capitalize()}son {uid}"
+            users.append({'id': uid, 'fullname': name, 'search_name': normalize_text(name),
+                          'email': f'user{uid}@bench.local', 'password_hash': password,
+                          'created_at': now - timedelta(days=rng.randint(0, 365))})
+        _insert(conn, User.__table__, users)
+        log(f"users: {len(users)}")
+
+        task_rows, task_id = [], 0
+        for uid in range(1, spec['users'] + 1):
+            for _ in range(spec['tasks_per_user']):
+                task_id += 1
+                due = now + timedelta(hours=rng.randint(-72, 24 * 30)) if rng.random() < 0.7 else None
+                task_rows.append({
+                    'id': task_id, 'user_id': uid, 'title': _title(rng), 'description': _title(rng, 8),
+                    'estimate_minutes': rng.choice((15, 30, 45, 60, 90, 120)), 'due_date': due,
+                    'priority': rng.randint(1, 5), 'completed': rng.random() < 0.3,
+                    'created_at': now - timedelta(minutes=task_id),
+                })
+            if len(task_rows) >= BATCH:
+                _insert(conn, Task.__table__, task_rows)
+                task_rows = []
+        _insert(conn, Task.__table__, task_rows)
+        log(f"tasks: {task_id}")
+
+        plan_rows = []
+        for uid in range(1, spec['users'] + 1):
+            for p in range(spec['plans_per_user']):
+                content = {f"Day {d}": [{'task': _title(rng), 'duration': 30, 'notes': ''}
+                                        for _ in range(rng.randint(1, 4))] for d in range(1, 8)}
+                plan_rows.append({'user_id': uid, 'title': f'Plan {p + 1}', 'content': content,
+                                  'generated_at': now - timedelta(days=p), 'is_public': False})
+        _insert(conn, StudyPlan.__table__, plan_rows)
+        log(f"plans: {len(plan_rows)}")
+
+        groups, memberships = [], []
+        group_id = 0
+        sizes = [spec['group_size']] * spec['groups'] + [spec['large_group_size']] * spec['large_groups']
+        large_ids = []
+        for size in sizes:
+            group_id += 1
+            owner = rng.randint(1, spec['users'])
+            groups.append({'id': group_id, 'name': f'Group {group_id}', 'description': '',
+                           'created_by': owner, 'created_at': now})
+            members = {owner} | set(rng.sample(range(1, spec['users'] + 1), min(size, spec['users']) - 1))
+            for m in members:
+                memberships.append({'user_id': m, 'group_id': group_id,
+                                    'role': 'owner' if m == owner else 'member', 'joined_at': now})
+            if size == spec['large_group_size']:
+                large_ids.append(group_id)
+        # A group with only its owner, used by the invite-flow scenario
+        group_id += 1
+        groups.append({'id': group_id, 'name': 'Invite target', 'description': '',
+                       'created_by': 1, 'created_at': now})
+        memberships.append({'user_id': 1, 'group_id': group_id, 'role': 'owner', 'joined_at': now})
+        info['invite_group_id'] = group_id
+        info['large_group_ids'] = large_ids
+        _insert(conn, StudyGroup.__table__, groups)
+        _insert(conn, GroupMembership.__table__, memberships)
+        log(f"groups: {len(groups)} ({len(memberships)} memberships)")
+
+        gplans, gtasks = [], []
+        for gid in range(1, group_id):
+            gplans.append({'id': gid, 'group_id': gid, 'title': f'Shared plan {gid}', 'content': {},
+                           'description': '', 'created_by': groups[gid - 1]['created_by'], 'created_at': now})
+            for position in range(1, rng.randint(5, 30) + 1):
+                gtasks.append({'plan_id': gid, 'task': _title(rng), 'duration': 30, 'notes': '',
+                               'due': (now + timedelta(days=rng.randint(0, 30))).date(),
+                               'priority': rng.randint(1, 5), 'position': float(position), 'created_at': now})
+        _insert(conn, GroupPlan.__table__, gplans)
+        _insert(conn, GroupPlanTask.__table__, gtasks)
+        log(f"group plans: {len(gplans)} ({len(gtasks)} tasks)")
+
+        notes, count = [], 0
+        deep = set(range(1, spec['deep_users'] + 1))
+        for uid in range(1, spec['users'] + 1):
+            for i in range(spec['deep_notes'] if uid in deep else spec['notes_per_user']):
+                notes.append({'user_id': uid, 'message': f'Notification {i}', 'type': 'info',
+                              'read': rng.random() < 0.8, 'created_at': now - timedelta(minutes=i)})
+            if len(notes) >= BATCH:
+                _insert(conn, Notification.__table__, notes)
+                count += len(notes)
+                notes = []
+        _insert(conn, Notification.__table__, notes)
+        count += len(notes)
+        log(f"notifications: {count}")
+
+        if conn.dialect.name == 'postgresql':
+            # Explicit ids above don't advance the serial sequences
+            for table in ('users', 'tasks', 'study_groups', 'group_plans'):
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+
+    info['users'] = spec['users']
+    info['tasks'] = task_id
+    info['seconds'] = round(time.perf_counter() - started, 1)
+    return info
@@ -0,0 +1,142 @@
+"""Cold start of the API: import, create_app() and the first response.
+
+Each run is a fresh interpreter that imports app.main, builds the app and
+serves GET /api/health through the test client, timing each step; the
+median over --runs is reported. Two configurations:
+  default  Config with DATABASE_URL pointing at a temporary SQLite file
+  test     TestConfig (in-memory SQLite, tables created by create_app)
+
+--importtime runs `python -X importtime` on the same start-up and lists the
+slowest imports (cumulative) next to benchmarks/importtime_baseline.txt,
+the profile of the tree when it was last written (--write-baseline).
+
+Usage (from backend/):
+  python -m benchmarks.startup --runs 7
+  python -m benchmarks.startup --importtime
+  python -m benchmarks.startup --importtime --write-baseline
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'importtime_baseline.txt')
+
+sys.path.insert(0, BACKEND)
+
+from benchmarks.common import write_results  # noqa: E402
+
+_CHILD = """
+import json, time
+t0 = time.perf_counter()
+from app.main import create_app
+t1 = time.perf_counter()
+if {test!r}:
+    from app.config import TestConfig
+    app = create_app(config_class=TestConfig)
+else:
+    app = create_app({{'RATE_LIMIT_ENABLED': False}})
+t2 = time.perf_counter()
+assert app.test_client().get('/api/health').status_code == 200
+t3 = time.perf_counter()
+print(json.dumps({{'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000,
+                  'first_response_ms': (t3 - t2) * 1000, 'total_ms': (t3 - t0) * 1000}}))
+"""
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    env.setdefault('JWT_SECRET_KEY', 'startup-benchmark-secret-key-0123456789abcdef')
+    return env
+
+
+def run_once(mode, extra_args=()):
+    """One cold start in a new interpreter; (timings, stderr)."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, *extra_args, '-c', _CHILD.format(test=mode == 'test')],
+                          cwd=BACKEND, env=_env(), capture_output=True, text=True, check=True)
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings['process_ms'] = (time.perf_counter() - started) * 1000
+    return timings, proc.stderr
+
+
+def measure(mode, runs):
+    samples = [run_once(mode)[0] for _ in range(runs)]
+    return {key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]}
+
+
+def parse_importtime(stderr):
+    """({module: cumulative us}, total us of top-level imports)."""
+    modules, total = {}, 0
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        modules[name] = max(modules.get(name, 0), cumulative)
+        if indent == 0:
+            total += cumulative
+    return modules, total
+
+
+def read_baseline(path=BASELINE):
+    modules = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and not line.startswith('#') and parts[0].isdigit():
+                    modules[parts[1]] = int(parts[0])
+    return modules
+
+
+def write_baseline(modules, total, top, path=BASELINE):
+    ranked = sorted(modules.items(), key=lambda kv: -kv[1])[:top]
+    with open(path, 'w') as f:
+        f.write('# python -X importtime of create_app() + first response (benchmarks/startup.py)\n')
+        f.write(f'# total {total} us; top {top} modules by cumulative import time (us)\n')
+        for name, cumulative in ranked:
+            f.write(f'{cumulative:>9} {name}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modes', default='default,test')
+    parser.add_argument('--importtime', action='store_true', help='list the slowest imports instead')
+    parser.add_argument('--top', type=int, default=40)
+    parser.add_argument('--write-baseline', action='store_true')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    if args.importtime:
+        modules, total = parse_importtime(run_once('default', ('-X', 'importtime'))[1])
+        baseline = read_baseline()
+        print(f"{'module':50s} {'now ms':>8s} {'base ms':>8s}")
+        for name, cumulative in sorted(modules.items(), key=lambda kv: -kv[1])[:args.top]:
+            base = f"{baseline[name] / 1000:8.1f}" if name in baseline else f"{'-':>8s}"
+            print(f"{name:50s} {cumulative / 1000:8.1f} {base}")
+        print(f"total imports: {total / 1000:.1f} ms")
+        if args.write_baseline:
+            write_baseline(modules, total, args.top)
+            print('wrote', BASELINE)
+        return
+
+    results = {}
+    for mode in [m for m in args.modes.split(',') if m]:
+        results[mode] = measure(mode, args.runs)
+        print(f"{mode:8s} {json.dumps(results[mode])}")
+    print('saved', write_results('startup', {'scenario': 'startup', 'runs': args.runs, 'results': results},
+                                 args.output))
+
+
+if __name__ == '__main__':
+    main()
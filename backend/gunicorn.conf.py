@@ -0,0 +1,50 @@
+# -------------------------------------------------------------
+# Why: The production server settings, in the repo instead of a start
+# command on the hosting dashboard.
+#
+# Why this design?
+#   - gevent patches the standard library before anything imports it:
+#     with preload_app the app is imported here, in the master.
+#   - Collection is paused while the master loads; each worker is forked
+#     from a frozen heap and turns it back on (app/startup.py).
+#   - More than one worker needs sticky sessions for Socket.IO polling
+#     and SOCKETIO_MESSAGE_QUEUE so workers see each other's events.
+#
+# Usage (from backend/):  gunicorn -c gunicorn.conf.py
+# -------------------------------------------------------------
+from gevent import monkey
+monkey.patch_all()
+
+import gc
+import os
+
+gc.disable()
+
+wsgi_app = "wsgi:app"
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+# Recycling is cheap when workers fork from a warm master; 0 turns it off
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")  # e.g. "-" for stdout
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    import wsgi
+    from app.startup import prepare_fork
+    prepare_fork(wsgi.app)
+
+
+def post_fork(server, worker):
+    import wsgi
+    from app.startup import init_worker
+    init_worker(wsgi.app, int(wsgi.app.config.get("WARM_POOL_CONNECTIONS", 2)))
+    server.log.info("worker %s ready", worker.pid)
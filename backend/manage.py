@@ -12,6 +12,14 @@ Usage:
   flask --app manage.py db migrate -m "message"
   flask --app manage.py db upgrade
   flask --app manage.py create-db
+  flask --app manage.py reindex-search
+  flask --app manage.py export-slow-queries --url https://api.example.com -o slow.json
+  flask --app manage.py prune-changes [--days 30]
+  flask --app manage.py purge-group <group_id>
+  flask --app manage.py purge-user <user_id>
+  flask --app manage.py purge-resume
+  flask --app manage.py worker [--processes 4] [--burst]
+  flask --app manage.py prune-jobs [--days 7]
  Use run.py for running the server.
 """
 
@@ -19,17 +27,111 @@ from dotenv import load_dotenv
 import os
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
+import click
 from flask import Flask
 from app.models import db, User, Task, StudyPlan, StudyGroup, GroupMembership
-from app.config import Config
+from app.config import Config, resolve_database
 from flask_migrate import Migrate
 
 app = Flask(__name__)
 app.config.from_object(Config)
+resolve_database(app.config)
 db.init_app(app)
 Migrate(app, db)
 @app.cli.command("create-db")
 def create_db():
     """Create all database tables."""
     db.create_all()
+    from app.search import create_schema
+    with db.engine.begin() as conn:
+        create_schema(conn)
     print("Database tables created!")
+
+@app.cli.command("reindex-search")
+def reindex_search():
+    """Rebuild the full-text search index from tasks, plans and group plan tasks."""
+    from app.search import reindex_all
+    count = reindex_all()
+    print(f"Indexed {count} documents")
+
+@app.cli.command("prune-changes")
+@click.option("--days", type=int, default=None, help="Keep this many days (default SYNC_RETAIN_DAYS)")
+def prune_changes(days):
+    """Delete old /api/sync change log entries; older sync tokens then get 410 and reload."""
+    from app.sync import prune
+    removed = prune(days if days is not None else app.config["SYNC_RETAIN_DAYS"])
+    print(f"Removed {removed} change log entries")
+
+def _print_job(job):
+    print(f"Purge job {job.id} ({job.kind} {job.target_id}): {job.status}, {job.deleted_rows} rows deleted")
+
+@app.cli.command("purge-group")
+@click.argument("group_id", type=int)
+def purge_group(group_id):
+    """Delete a study group and everything in it, in chunks (resumable)."""
+    from app.purge import run_job, start_job
+    job = start_job("group", group_id, None, queue=False)
+    if run_job(job.id, app.config["PURGE_CHUNK_SIZE"]) is None:
+        print(f"Purge job {job.id} is running elsewhere")
+        return
+    _print_job(job)
+
+@app.cli.command("purge-user")
+@click.argument("user_id", type=int)
+def purge_user(user_id):
+    """Delete an account, the groups it owns and all its data, in chunks (resumable)."""
+    from app.purge import run_job, start_job
+    job = start_job("user", user_id, None, queue=False)
+    if run_job(job.id, app.config["PURGE_CHUNK_SIZE"]) is None:
+        print(f"Purge job {job.id} is running elsewhere")
+        return
+    _print_job(job)
+
+@app.cli.command("purge-resume")
+def purge_resume():
+    """Finish purge jobs that are pending, failed or were interrupted (stale heartbeat)."""
+    from app.purge import resume_jobs
+    jobs = resume_jobs(app.config["PURGE_CHUNK_SIZE"])
+    for job in jobs:
+        _print_job(job)
+    print(f"Resumed {len(jobs)} purge jobs")
+
+@app.cli.command("worker")
+@click.option("--processes", type=int, default=1, help="Worker processes to run")
+@click.option("--burst", is_flag=True, help="Exit once the queue is empty")
+def worker(processes, burst):
+    """Run background jobs (plan generation, imports, fan-outs) from the jobs table."""
+    from app.jobs import run_workers
+    run_workers(processes, burst)
+
+@app.cli.command("prune-jobs")
+@click.option("--days", type=int, default=None, help="Keep this many days (default JOB_RETAIN_DAYS)")
+def prune_jobs(days):
+    """Delete finished and failed background jobs older than the retention window."""
+    from app.jobs import prune
+    removed = prune(days if days is not None else app.config["JOB_RETAIN_DAYS"])
+    print(f"Removed {removed} jobs")
+
+@app.cli.command("export-slow-queries")
+@click.option("--url", default=lambda: os.getenv("API_URL", "http://localhost:5000"), help="Base URL of the running API")
+@click.option("--token", default=lambda: os.getenv("ADMIN_TOKEN"), help="ADMIN_TOKEN of that deployment")
+@click.option("--worst", is_flag=True, help="Only the slowest entry per query shape")
+@click.option("-o", "--output", type=click.Path(), help="Write JSON here instead of stdout")
+def export_slow_queries(url, token, worst, output):
+    """Download the slow-query ring buffer (with captured EXPLAIN plans) as JSON."""
+    import json
+    import requests
+    resp = requests.get(
+        f"{url.rstrip('/')}/api/admin/slow-queries",
+        params={"limit": 1000, "view": "worst" if worst else "recent"},
+        headers={"X-Admin-Token": token or ""},
+        timeout=30,
+    )
+    resp.raise_for_status()
+    text = json.dumps(resp.json(), indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+        print(f"Wrote {len(resp.json().get('entries', []))} entries to {output}")
+    else:
+        print(text)
@@ -11,7 +11,7 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+fileConfig(config.config_file_name, disable_existing_loggers=False)  # keep gunicorn/app loggers when migrating at startup
 logger = logging.getLogger('alembic.env')
 
 
@@ -51,6 +51,23 @@ def get_metadata():
     return target_db.metadata
 
 
+# Objects created by raw SQL in migrations and absent from the models:
+# the search index (FTS5 virtual table + shadow tables on SQLite, tsvector
+# table on PostgreSQL, app/search.py) and the pg_trgm index on users. Without
+# this, autogenerate would emit drops for them.
+SEARCH_TABLE_PREFIX = 'search_documents'
+UNMODELED_INDEXES = {'ix_users_search_name_trgm'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and name.startswith(SEARCH_TABLE_PREFIX):
+        return False
+    if type_ == 'index' and (name in UNMODELED_INDEXES
+                             or object.table.name.startswith(SEARCH_TABLE_PREFIX)):
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +82,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +111,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
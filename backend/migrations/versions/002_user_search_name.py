@@ -0,0 +1,64 @@
+"""add users.search_name for indexed user search
+
+Revision ID: 002_user_search_name
+Revises: 001_create_all_tables
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+from app.text import normalize_text
+
+
+# revision identifiers, used by Alembic.
+revision = '002_user_search_name'
+down_revision = '001_create_all_tables'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    columns = [c['name'] for c in inspector.get_columns('users')]
+
+    if 'search_name' not in columns:
+        op.add_column('users', sa.Column('search_name', sa.String(length=120), nullable=True))
+
+    # Backfill with the same normalization the model applies on write,
+    # BACKFILL_BATCH users per executemany (keyset pages by id)
+    users = sa.table('users', sa.column('id', sa.Integer), sa.column('fullname', sa.String),
+                     sa.column('search_name', sa.String))
+    update = (users.update().where(users.c.id == sa.bindparam('user_id'))
+              .values(search_name=sa.bindparam('name')))
+    last_id = 0
+    while True:
+        rows = conn.execute(sa.select(users.c.id, users.c.fullname).where(users.c.id > last_id)
+                            .order_by(users.c.id).limit(BACKFILL_BATCH)).fetchall()
+        if not rows:
+            break
+        conn.execute(update, [{'user_id': user_id, 'name': normalize_text(fullname)} for user_id, fullname in rows])
+        last_id = rows[-1][0]
+
+    if conn.dialect.name == 'postgresql':
+        # varchar_pattern_ops lets LIKE 'abc%' use the btree under any collation;
+        # the trigram GIN index serves substring typeahead.
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index('ix_users_search_name', 'users', ['search_name'],
+                        postgresql_ops={'search_name': 'varchar_pattern_ops'})
+        op.execute("CREATE INDEX IF NOT EXISTS ix_users_search_name_trgm "
+                   "ON users USING gin (search_name gin_trgm_ops)")
+    else:
+        op.create_index('ix_users_search_name', 'users', ['search_name'])
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_users_search_name_trgm")
+    op.drop_index('ix_users_search_name', table_name='users')
+    op.drop_column('users', 'search_name')
@@ -0,0 +1,27 @@
+"""create full-text search documents (tsvector on Postgres, FTS5 on SQLite)
+
+Revision ID: 003_search_documents
+Revises: 002_user_search_name
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+from app.search import create_schema, drop_schema, backfill
+
+
+# revision identifiers, used by Alembic.
+revision = '003_search_documents'
+down_revision = '002_user_search_name'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    create_schema(conn)
+    backfill(conn)
+
+
+def downgrade():
+    drop_schema(op.get_bind())
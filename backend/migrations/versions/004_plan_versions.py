@@ -0,0 +1,45 @@
+"""plan versions and the plan_ops edit log
+
+Revision ID: 004_plan_versions
+Revises: 003_search_documents
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_plan_versions'
+down_revision = '003_search_documents'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('study_plans') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    with op.batch_alter_table('group_plans') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+    op.create_table(
+        'plan_ops',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('plan_kind', sa.String(length=20), nullable=False),
+        sa.Column('plan_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('ops', sa.JSON(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('plan_kind', 'plan_id', 'version', name='uq_plan_ops_version'),
+    )
+
+
+def downgrade():
+    op.drop_table('plan_ops')
+    with op.batch_alter_table('group_plans') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('study_plans') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,35 @@
+"""group plan task positions and the live editor's sequence number
+
+Revision ID: 005_group_plan_task_positions
+Revises: 004_plan_versions
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_group_plan_task_positions'
+down_revision = '004_plan_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('group_plan_tasks') as batch_op:
+        batch_op.add_column(sa.Column('position', sa.Float(), nullable=True))
+    with op.batch_alter_table('group_plans') as batch_op:
+        batch_op.add_column(sa.Column('tasks_seq', sa.Integer(), nullable=False, server_default='0'))
+
+    # Existing tasks keep their creation order (ids are assigned in that order)
+    op.execute("UPDATE group_plan_tasks SET position = id")
+    op.create_index('ix_group_plan_tasks_plan_position', 'group_plan_tasks', ['plan_id', 'position'])
+
+
+def downgrade():
+    op.drop_index('ix_group_plan_tasks_plan_position', table_name='group_plan_tasks')
+    with op.batch_alter_table('group_plans') as batch_op:
+        batch_op.drop_column('tasks_seq')
+    with op.batch_alter_table('group_plan_tasks') as batch_op:
+        batch_op.drop_column('position')
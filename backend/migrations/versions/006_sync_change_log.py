@@ -0,0 +1,55 @@
+"""updated_at columns and the change log behind /api/sync
+
+Revision ID: 006_sync_change_log
+Revises: 005_group_plan_task_positions
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_sync_change_log'
+down_revision = '005_group_plan_task_positions'
+branch_labels = None
+depends_on = None
+
+# table -> column holding the existing rows' last known change time
+UPDATED_FROM = {
+    'tasks': 'created_at',
+    'study_plans': 'generated_at',
+    'group_plans': 'created_at',
+    'group_plan_tasks': 'created_at',
+    'notifications': 'created_at',
+}
+
+
+def upgrade():
+    for table, source in UPDATED_FROM.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = {source}")
+
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('group_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_change_log_user_seq', 'change_log', ['user_id', 'id'])
+    op.create_index('ix_change_log_group_seq', 'change_log', ['group_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_change_log_group_seq', table_name='change_log')
+    op.drop_index('ix_change_log_user_seq', table_name='change_log')
+    op.drop_table('change_log')
+    for table in reversed(list(UPDATED_FROM)):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
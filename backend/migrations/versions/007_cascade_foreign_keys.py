@@ -0,0 +1,79 @@
+"""ON DELETE CASCADE / SET NULL foreign keys
+
+Revision ID: 007_cascade_foreign_keys
+Revises: 006_sync_change_log
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_cascade_foreign_keys'
+down_revision = '006_sync_change_log'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table, ON DELETE)
+FOREIGN_KEYS = [
+    ('tasks', 'user_id', 'users', 'CASCADE'),
+    ('tasks', 'depends_on_id', 'tasks', 'SET NULL'),
+    ('study_plans', 'user_id', 'users', 'CASCADE'),
+    ('study_groups', 'created_by', 'users', 'SET NULL'),
+    ('group_memberships', 'user_id', 'users', 'CASCADE'),
+    ('group_memberships', 'group_id', 'study_groups', 'CASCADE'),
+    ('group_invites', 'inviter_id', 'users', 'CASCADE'),
+    ('group_invites', 'invitee_id', 'users', 'CASCADE'),
+    ('group_invites', 'group_id', 'study_groups', 'CASCADE'),
+    ('group_plans', 'group_id', 'study_groups', 'CASCADE'),
+    ('group_plans', 'created_by', 'users', 'SET NULL'),
+    ('group_plan_participants', 'user_id', 'users', 'CASCADE'),
+    ('notifications', 'user_id', 'users', 'CASCADE'),
+    ('plan_ops', 'user_id', 'users', 'SET NULL'),
+]
+# created_by survives its account as NULL
+NULLABLE = [('study_groups', 'created_by'), ('group_plans', 'created_by')]
+
+# Names SQLite's unnamed constraints get when batch mode reflects them
+NAMING = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _fk_name(inspector, table, column, referred):
+    for fk in inspector.get_foreign_keys(table):
+        if fk['constrained_columns'] == [column] and fk['referred_table'] == referred:
+            return fk['name'] or f'fk_{table}_{column}_{referred}'
+    return None
+
+
+def _replace_foreign_keys(cascading):
+    inspector = sa.inspect(op.get_bind())
+    tables = {}
+    for table, column, referred, ondelete in FOREIGN_KEYS:
+        tables.setdefault(table, []).append((column, referred, ondelete if cascading else None))
+    for table, keys in tables.items():
+        names = [_fk_name(inspector, table, column, referred) for column, referred, _ondelete in keys]
+        with op.batch_alter_table(table, naming_convention=NAMING) as batch_op:
+            for name, (column, referred, ondelete) in zip(names, keys):
+                if name:
+                    batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(f'fk_{table}_{column}_{referred}', referred, [column], ['id'],
+                                            ondelete=ondelete)
+            for nullable_table, column in NULLABLE:
+                if nullable_table == table:
+                    batch_op.alter_column(column, existing_type=sa.Integer(), nullable=cascading)
+
+
+def upgrade():
+    _replace_foreign_keys(cascading=True)
+
+
+def downgrade():
+    # Creators that were deleted become the group's owner; ownerless rows cannot be kept
+    op.execute("UPDATE study_groups SET created_by = (SELECT m.user_id FROM group_memberships m "
+               "WHERE m.group_id = study_groups.id AND m.role = 'owner' LIMIT 1) WHERE created_by IS NULL")
+    op.execute("UPDATE group_plans SET created_by = (SELECT g.created_by FROM study_groups g "
+               "WHERE g.id = group_plans.group_id) WHERE created_by IS NULL")
+    for table, column in NULLABLE:
+        op.execute(f"DELETE FROM {table} WHERE {column} IS NULL")
+    _replace_foreign_keys(cascading=False)
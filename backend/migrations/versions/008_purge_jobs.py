@@ -0,0 +1,40 @@
+"""purge_jobs table for background group/account deletion
+
+Revision ID: 008_purge_jobs
+Revises: 007_cascade_foreign_keys
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_purge_jobs'
+down_revision = '007_cascade_foreign_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'purge_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.Column('requested_by', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('step', sa.String(length=40), nullable=True),
+        sa.Column('deleted_rows', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_purge_jobs_status', 'purge_jobs', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_purge_jobs_status', table_name='purge_jobs')
+    op.drop_table('purge_jobs')
@@ -0,0 +1,33 @@
+"""study_plans.group_plan_id: members' shares of a group plan
+
+Revision ID: 010_group_plan_schedules
+Revises: 009_job_queue
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_group_plan_schedules'
+down_revision = '009_job_queue'
+branch_labels = None
+depends_on = None
+
+NAMING = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def upgrade():
+    with op.batch_alter_table('study_plans', naming_convention=NAMING) as batch_op:
+        batch_op.add_column(sa.Column('group_plan_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_study_plans_group_plan_id_group_plans', 'group_plans',
+                                    ['group_plan_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index('ix_study_plans_group_plan_id', ['group_plan_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('study_plans', naming_convention=NAMING) as batch_op:
+        batch_op.drop_index('ix_study_plans_group_plan_id')
+        batch_op.drop_constraint('fk_study_plans_group_plan_id_group_plans', type_='foreignkey')
+        batch_op.drop_column('group_plan_id')
@@ -0,0 +1,32 @@
+"""indexes for /api/agenda date range queries
+
+Revision ID: 011_agenda_indexes
+Revises: 010_group_plan_schedules
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '011_agenda_indexes'
+down_revision = '010_group_plan_schedules'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_tasks_user_due', 'tasks', ['user_id', 'due_date']),
+    ('ix_study_plans_user_generated', 'study_plans', ['user_id', 'generated_at']),
+    ('ix_group_plans_group', 'group_plans', ['group_id']),
+    ('ix_group_plan_tasks_plan_due', 'group_plan_tasks', ['plan_id', 'due']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -39,24 +39,24 @@ import os
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
 from app.main import create_app
-from app.extensions import socketio, db
-from flask_migrate import Migrate
-app = create_app()
+from app.extensions import socketio
+# Development server: background jobs run in this process unless JOB_EMBEDDED_WORKER=0
+app = create_app({'JOB_EMBEDDED_WORKER': os.getenv('JOB_EMBEDDED_WORKER', '1') == '1'})
 """
 Optional: Apply DB migrations automatically on start.
 Enable by setting environment variable AUTO_MIGRATE_ON_START=1.
-This is useful on Render when shell access is disabled.
+This is useful on Render when shell access is disabled. The upgrade holds
+a database lock, so processes starting together run it one at a time
+(production: gunicorn -c gunicorn.conf.py, which loads wsgi.py once).
 """
 try:
     if os.getenv("AUTO_MIGRATE_ON_START") == "1":
-        Migrate(app, db)
-        from flask_migrate import upgrade
-        with app.app_context():
-            upgrade()
+        from app.startup import migrate_once
+        migrate_once(app)
         print("[startup] Applied DB migrations (upgrade head)")
 except Exception as e:
     print(f"[startup] Migration on start failed: {e}")
 if __name__ == '__main__':
     # Use Socket.IO server to enable WebSocket/long-polling transport
     port = int(os.getenv('PORT', '5000'))
-    socketio.run(app, host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=port, debug=os.getenv('FLASK_DEBUG') == '1')
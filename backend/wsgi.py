@@ -0,0 +1,22 @@
+# -------------------------------------------------------------
+# Why: Production entry point for gunicorn (settings in gunicorn.conf.py).
+#
+# Why this design?
+#   - With preload_app the master imports this once: migrations (if
+#     AUTO_MIGRATE_ON_START=1) run here a single time under a database lock,
+#     and warm_up() builds mappers, schemas and routes before workers fork
+#     and share those pages (see app/startup.py).
+#   - run.py stays the development server.
+# -------------------------------------------------------------
+from dotenv import load_dotenv
+import os
+load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+
+from app.main import create_app
+from app.startup import migrate_once, warm_up
+
+app = create_app()
+if os.getenv("AUTO_MIGRATE_ON_START") == "1":
+    migrate_once(app)
+    print("[startup] Applied DB migrations (upgrade head)")
+print(f"[startup] Warm-up took {warm_up(app):.3f}s")
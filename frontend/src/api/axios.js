@@ -83,6 +83,8 @@ export const deleteGroupPlan = (plan_id) => api.delete(`/group-plans/${plan_id}`
 export const joinGroupPlan = (plan_id) => api.post(`/group-plans/${plan_id}/join`);
 export const updateGroupPlan = (plan_id, data) => api.put(`/group-plans/${plan_id}`, data);
 export const getGroupPlanParticipants = (plan_id) => api.get(`/group-plans/${plan_id}/participants`);
+// 201 with the schedules, or 202 with a job for large groups (see api/jobs.js resultOf)
+export const generateGroupSchedules = (plan_id, data) => api.post(`/group-plans/${plan_id}/schedules`, data);
 
 
 // Group Plan Tasks (normalized)
@@ -0,0 +1,18 @@
+// Background jobs: large requests answer 202 with {job}; poll /jobs/<id> until it finishes.
+import api from './axios';
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+// Resolve with the job's result (or the response body if it was not queued)
+export async function resultOf(res, { intervalMs = 500, timeoutMs = 120000 } = {}) {
+  if (res.status !== 202 || !res.data?.job) return res.data;
+  const deadline = Date.now() + timeoutMs;
+  let job = res.data.job;
+  while (job.status !== 'done') {
+    if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+    if (Date.now() > deadline) throw new Error('Timed out waiting for the job');
+    await sleep(intervalMs);
+    job = (await api.get(`/jobs/${job.id}`)).data;
+  }
+  return job.result;
+}
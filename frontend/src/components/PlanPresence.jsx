@@ -13,7 +13,7 @@ export default function PlanPresence({ planId, currentUser }){
     const s = getSocket()
     const onPresence = (list)=> setMembers(Array.isArray(list)? list : [])
     s.on('presence', onPresence)
-    joinRoom(room, { id: currentUser?.id, name: currentUser?.fullname })
+    joinRoom(room)
     return ()=>{
       leaveRoom(room)
       s.off('presence', onPresence)
@@ -37,11 +37,14 @@ export function AuthProvider({ children }){
       window.dispatchEvent(new CustomEvent('sp-notify', { detail: payload }))
     }
     s.on('notify', onNotify)
+    // Server dropped queued messages for this (slow) connection: refetch
+    s.on('resync', onNotify)
     if (user?.id){
-      joinRoom(`user:${user.id}`, { id: user.id, name: user.fullname })
+      joinRoom(`user:${user.id}`)
     }
     return ()=>{
       s.off('notify', onNotify)
+      s.off('resync', onNotify)
       if (user?.id){
         leaveRoom(`user:${user.id}`)
       }
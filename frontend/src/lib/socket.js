@@ -1,6 +1,8 @@
 // -------------------------------------------------------------
 // Why: Centralize Socket.IO client connection for real-time updates,
 // presence, and notifications across the app.
+// The server authenticates the connection itself, so the access token is
+// sent in the handshake `auth` payload (re-read on every reconnect).
 // -------------------------------------------------------------
 import { io } from 'socket.io-client'
 
@@ -13,14 +15,19 @@ let socket
 
 export function getSocket(){
   if (!socket){
-    socket = io(origin, { withCredentials: true })
+    socket = io(origin, {
+      withCredentials: true,
+      auth: (cb) => cb({ token: localStorage.getItem('access_token') }),
+    })
   }
   return socket
 }
 
-export function joinRoom(room, user){
+export function joinRoom(room){
   const s = getSocket()
-  s.emit('join', { room, user })
+  // A connection refused before login (no token yet) is not retried automatically
+  if (!s.connected) s.connect()
+  s.emit('join', { room })
 }
 
 export function leaveRoom(room){
@@ -6,6 +6,7 @@
 //Makes it easy to extend with new editor tools or collaboration features.
 import React, { useEffect, useState } from 'react'
 import api from '../api/axios'
+import { resultOf } from '../api/jobs'
 import PlanPreviewModal from '../components/PlanPreviewModal'
 
 export default function PlannerPage(){
@@ -22,7 +23,7 @@ export default function PlannerPage(){
     try{
       const payload = { task_ids: tasks.map(t=>t.id), days, save: false }
       const res = await api.post('/plans/generate', payload)
-      setPlan(res.data)
+      setPlan(await resultOf(res))
       setShowPreview(true)
     } catch(e){
       alert('Generate failed: ' + (e.response?.data?.msg || e.message))